@@ -3,14 +3,89 @@
 This module provides :class:`Conveyor`, a lightweight structure that
 transports numeric items between other structures using an internal queue.
 
-The conveyor stores items as dictionaries with ``value`` and ``position``
-keys where ``position`` progresses from 0.0 to 1.0 during transmission.
+Items are stored run-length encoded: a mine keeps pushing the same value
+at the same interval, so the queue holds :class:`BeltRun` records
+``(value, count, head, gap)`` instead of one record per item. ``head`` is
+the position (0.0 to 1.0) of the run's first item and the others follow
+``gap`` behind each other. Movement and in-place value updates are O(runs);
+runs are only expanded item by item when a consumer pops or for drawing.
 """
 
+import math
 import pygame as pg
 from collections import deque
 from .structure import Structure
 from patterns.iterator import FlowIterator
+from settings import CELL_SIZE_PX, RENDER_TIER_NO_ITEM_LABELS, CONVEYOR_CAPACITY, CONVEYOR_ITEM_SPACING_PX
+from utils.number_format import format_number, label_surface
+
+
+def accepts(target):
+    """True if ``target`` can take one more item right now.
+
+    Targets without ``can_accept`` (wells, legacy structures) always accept.
+    """
+    if target is None:
+        return False
+    can_accept = getattr(target, 'can_accept', None)
+    if can_accept is None:
+        return True
+    try:
+        return bool(can_accept())
+    except Exception:
+        return True
+
+
+# tolerancia al comparar posiciones (fracciones de cinta) al unir tramos
+RUN_EPS = 1e-6
+
+# marcador de ítem cuando el governor omite las etiquetas
+ITEM_MARKER_COLOR = (255, 255, 255)
+ITEM_MARKER_RADIUS = 3
+
+
+class BeltRun:
+    """``count`` items of the same ``value`` spaced ``gap`` apart.
+
+    The first item sits at ``head``; item ``k`` at ``head - k * gap``.
+    """
+
+    __slots__ = ('value', 'count', 'head', 'gap')
+
+    def __init__(self, value, count=1, head=0.0, gap=0.0):
+        self.value = value
+        self.count = count
+        self.head = head
+        self.gap = gap
+
+    @property
+    def tail(self):
+        return self.head - (self.count - 1) * self.gap
+
+    def positions(self):
+        return [self.head - k * self.gap for k in range(self.count)]
+
+    def __repr__(self):
+        return f"BeltRun({self.value!r}, x{self.count}, head={self.head:.3f}, gap={self.gap:.3f})"
+
+
+def expand_runs(runs):
+    """Yield ``(value, position)`` for every item of ``(value, count, head, gap)`` runs."""
+    for value, count, head, gap in runs:
+        for k in range(count):
+            yield value, head - k * gap
+
+
+def _mergeable(a, b):
+    """Gap between run ``a`` and the next run ``b`` if they form one run, else None."""
+    if a.value != b.value:
+        return None
+    d = a.tail - b.head
+    if a.count > 1 and abs(d - a.gap) > RUN_EPS:
+        return None
+    if b.count > 1 and abs(d - b.gap) > RUN_EPS:
+        return None
+    return d
 
 
 class Conveyor(Structure):
@@ -20,20 +95,39 @@ class Conveyor(Structure):
     ----------
     start_pos, end_pos: pg.Vector2
         Pixel coordinates for the conveyor endpoints.
+    start_cell, end_cell: tuple
+        Grid cells of the endpoints, fixed at creation.
     queue: collections.deque
-        Items waiting on the belt. Each item is a dict with ``value`` and
-        ``position`` (0.0..1.0).
+        Items waiting on the belt, as :class:`BeltRun` records (front first).
     travel_time: float
         Time in milliseconds required for an item to travel the full belt.
+    capacity: int
+        Maximum number of items on the belt at once.
+    spacing: float
+        Minimum gap between consecutive items as a fraction of the belt.
+
+    Items never overtake the one ahead, so when the end is blocked the belt
+    fills up from the front and :meth:`push` starts refusing items.
     """
 
+    __slots__ = (
+        'start_pos', 'end_pos', 'start_cell', 'end_cell', 'position', 'gameManager', 'speed', 'queue',
+        'width', 'color', 'length', 'pixels_per_second', 'travel_time',
+        'outputConveyor', 'capacity', 'spacing', '_items',
+        # campos de mejora: sin asignar hasta la primera mejora (hasattr)
+        '_base_travel_time', '_speed_upgraded',
+    )
+
     def __init__(self, start_pos, end_pos, gameManager, speed=1):
         self.start_pos = pg.Vector2(start_pos)
         self.end_pos = pg.Vector2(end_pos)
+        self.start_cell = (int(self.start_pos.x) // CELL_SIZE_PX, int(self.start_pos.y) // CELL_SIZE_PX)
+        self.end_cell = (int(self.end_pos.x) // CELL_SIZE_PX, int(self.end_pos.y) // CELL_SIZE_PX)
         self.position = self.start_pos
         self.gameManager = gameManager
         self.speed = speed
         self.queue = deque()
+        self._items = 0
         self.width = 12
         self.color = (189, 195, 199)
 
@@ -45,22 +139,63 @@ class Conveyor(Structure):
         else:
             self.travel_time = 100
 
+        # capacidad: tantos ítems como quepan con la separación mínima
+        if self.length > 0:
+            self.spacing = min(1.0, CONVEYOR_ITEM_SPACING_PX / self.length)
+            self.capacity = max(1, min(CONVEYOR_CAPACITY, int(self.length // CONVEYOR_ITEM_SPACING_PX) + 1))
+        else:
+            self.spacing = 0.0
+            self.capacity = 1
+
         self.outputConveyor = None
 
+    def can_accept(self):
+        """True if a new item fits at the start of the belt."""
+        if self._items >= self.capacity:
+            return False
+        return not self.queue or self.queue[-1].tail >= self.spacing - RUN_EPS
+
     def push(self, number):
-        """Enqueue a number at the start of the conveyor."""
-        self.queue.append({'value': number, 'position': 0.0})
+        """Enqueue a number at the start of the conveyor.
+
+        Returns False (and drops nothing) when the belt is full or the last
+        item is still closer than ``spacing`` to the start. A value equal to
+        the last run's, pushed at the run's own interval, extends that run.
+        """
+        if not self.can_accept():
+            return False
+        last = self.queue[-1] if self.queue else None
+        if last is not None and last.value == number and (last.count == 1 or abs(last.tail - last.gap) <= RUN_EPS):
+            last.gap = last.tail if last.count == 1 else last.gap
+            last.count += 1
+        else:
+            self.queue.append(BeltRun(number, 1, 0.0, self.spacing))
+        self._items += 1
+        rewind = getattr(self.gameManager, 'rewind', None)
+        if rewind is not None:
+            rewind.on_push(self, number)
         try:
-            print(f"Conveyor: pushed {number}, queue size now {len(self.queue)}")
+            print(f"Conveyor: pushed {format_number(number)}, queue size now {self._items}")
         except Exception:
             pass
+        return True
 
     def pop(self):
         """Remove and return the value at the end of the belt if ready."""
-        if self.queue and self.queue[0]['position'] >= 1.0:
-            val = self.queue.popleft()['value']
+        if self.queue and self.queue[0].head >= 1.0:
+            run = self.queue[0]
+            val = run.value
+            if run.count == 1:
+                self.queue.popleft()
+            else:
+                run.count -= 1
+                run.head -= run.gap
+            self._items -= 1
+            rewind = getattr(self.gameManager, 'rewind', None)
+            if rewind is not None:
+                rewind.on_pop(self, val)
             try:
-                print(f"Conveyor: popped {val}, queue size now {len(self.queue)}")
+                print(f"Conveyor: popped {format_number(val)}, queue size now {self._items}")
             except Exception:
                 pass
             return val
@@ -69,35 +204,89 @@ class Conveyor(Structure):
     def peek(self):
         """Return the value at the front of the queue without removing it."""
         if self.queue:
-            return self.queue[0]['value']
+            return self.queue[0].value
         return None
 
     def isEmpty(self):
-        return len(self.queue) == 0
+        return self._items == 0
 
     def isReady(self):
         """Return True if an item is positioned at the conveyor end."""
-        return self.queue and self.queue[0]['position'] >= 1.0
+        return bool(self.queue) and self.queue[0].head >= 1.0
 
     def size(self):
-        return len(self.queue)
+        return self._items
 
     def createIterator(self):
-        return FlowIterator([item['value'] for item in self.queue])
+        return FlowIterator([run.value for run in self.queue for _ in range(run.count)])
+
+    def _advance(self, delta):
+        """Move every run by ``delta`` without overtaking, in O(runs).
 
-    def update(self):
+        A run whose head is blocked splits into a prefix packed at
+        ``spacing`` behind the obstacle and a suffix that still moves at its
+        own gap; adjacent runs that line up again are merged.
+        """
+        spacing = self.spacing
+        moved = deque()
+        limit = 1.0
+        for run in self.queue:
+            want = run.head + delta
+            if want < limit - RUN_EPS:
+                run.head = want
+                moved.append(run)
+                limit = run.tail - spacing
+                continue
+
+            stop = max(run.head, limit)
+            if run.count == 1 or run.gap <= spacing + RUN_EPS:
+                run.head = stop
+                moved.append(run)
+                limit = run.tail - spacing
+                continue
+
+            # el ítem k queda bloqueado si k * (gap - spacing) < want - stop
+            blocked = min(run.count, max(1, math.ceil((want - stop) / (run.gap - spacing))))
+            rest = run.count - blocked
+            if rest:
+                free_head = run.head - blocked * run.gap + delta
+                moved.append(BeltRun(run.value, blocked, stop, spacing))
+                tail_run = BeltRun(run.value, rest, free_head, run.gap)
+                moved.append(tail_run)
+                limit = tail_run.tail - spacing
+            else:
+                run.head = stop
+                run.gap = spacing
+                moved.append(run)
+                limit = run.tail - spacing
+
+        merged = deque()
+        for run in moved:
+            if merged:
+                gap = _mergeable(merged[-1], run)
+                if gap is not None:
+                    merged[-1].count += run.count
+                    merged[-1].gap = gap
+                    continue
+            merged.append(run)
+        self.queue = merged
+
+    def update(self, dt=None):
         """Advance item positions based on the game delta time and move items
-        to the next conveyor when they reach the end."""
-        delta = self.gameManager.delta_time / self.travel_time
-        for item in self.queue:
-            item['position'] += delta
-            if item['position'] > 1.0:
-                item['position'] = 1.0
-
-        if self.queue and self.queue[0]['position'] >= 1.0 and self.outputConveyor:
-            number = self.pop()
-            if number is not None:
-                self.outputConveyor.push(number)
+        to the next conveyor when they reach the end.
+
+        ``dt`` is the elapsed time in milliseconds; when omitted the
+        GameManager's ``delta_time`` is used (single-threaded loop).
+        """
+        if dt is None:
+            dt = self.gameManager.delta_time
+        if self.queue:
+            self._advance(dt / self.travel_time)
+
+        # solo se saca el ítem si el destino lo acepta (backpressure)
+        if self.queue and self.queue[0].head >= 1.0 and self.outputConveyor:
+            if self.outputConveyor.push(self.queue[0].value) is not False:
+                self.pop()
 
     @property
     def output(self):
@@ -111,19 +300,37 @@ class Conveyor(Structure):
         """Convenience to set the conveyor output."""
         self.output = conveyor
 
-    def draw(self):
-        """Render the conveyor and the queued item values on screen."""
+    def snapshot_runs(self):
+        """Return an immutable ``((value, count, head, gap), ...)`` copy of the belt, in O(runs)."""
+        return tuple((run.value, run.count, run.head, run.gap) for run in self.queue)
+
+    def draw(self, runs=None):
+        """Render the conveyor and the queued item values on screen.
+
+        ``runs`` is an optional ``((value, count, head, gap), ...)`` sequence
+        taken from a simulation snapshot (:meth:`snapshot_runs`); it is only
+        expanded into items here, for belts that are drawn. When omitted the
+        live queue is drawn.
+        """
         cam = getattr(self.gameManager, 'camera', pg.Vector2(0, 0))
         start = (int(self.start_pos.x - cam.x), int(self.start_pos.y - cam.y))
         end = (int(self.end_pos.x - cam.x), int(self.end_pos.y - cam.y))
         pg.draw.line(self.gameManager.screen, self.color, start, end, self.width)
 
-        font = pg.font.Font(None, 20)
-        for item in self.queue:
-            t = item['position']
+        # Bajo presión de frame el governor omite las etiquetas por ítem:
+        # cada ítem se marca con un punto en lugar de su valor
+        labels = getattr(self.gameManager, 'render_tier', 0) < RENDER_TIER_NO_ITEM_LABELS
+
+        if runs is None:
+            runs = self.snapshot_runs()
+        for value, t in expand_runs(runs):
             pos_x = (self.start_pos.x + (self.end_pos.x - self.start_pos.x) * t) - cam.x
             pos_y = (self.start_pos.y + (self.end_pos.y - self.start_pos.y) * t) - cam.y
-            text = font.render(str(item['value']), True, (44, 62, 80))
+            if not labels:
+                pg.draw.circle(self.gameManager.screen, ITEM_MARKER_COLOR, (int(pos_x), int(pos_y)), ITEM_MARKER_RADIUS)
+                continue
+            # etiqueta abreviada (1.2K, 3.4e15) cacheada por valor
+            text = label_surface(value)
             text_rect = text.get_rect(center=(pos_x, pos_y))
             self.gameManager.screen.blit(text, text_rect)
 
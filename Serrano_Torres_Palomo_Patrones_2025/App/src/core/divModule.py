@@ -11,6 +11,8 @@ from utils.app_paths import APP_ROOT as BASE_DIR
 
 
 class DivModule(Module):
+    __slots__ = ('inConveyor1', 'inConveyor2', 'outConveyor', 'outConveyor2', 'img')
+
     def __init__(self, position, gameManager):
         self.gameManager = gameManager
         self.position = position
@@ -38,9 +40,7 @@ class DivModule(Module):
         '''
         Divide the first input by the second input and returns the result.
         '''
-        number1 = self.inConveyor1.pop()
-        number2 = self.inConveyor2.pop()
-        if number1 is not None and number2 is not None:
+        for number1, number2 in self.buffered_pairs(self.inConveyor1, self.inConveyor2, self.outConveyor, self.outConveyor2):
             if number2 != 0:
                 self.outConveyor.push(number1 / number2)
                 self.outConveyor2.push(number1 % number2)
@@ -1,8 +1,9 @@
 """Merger module: takes two inputs and merges them into one output.
 
 This module provides the MergerModule class which combines items from two
-input conveyors and forwards them to a single output conveyor. Docstrings
-here describe behavior only; implementation is unchanged.
+(or more) input conveyors and forwards them to a single output conveyor. The
+input served next is chosen by a :class:`core.routing.Router`, so one busy
+input cannot starve the others.
 """
 
 import pygame as pg
@@ -10,9 +11,16 @@ from settings import CELL_SIZE_PX
 import pathlib
 from .structure import *
 from utils.app_paths import APP_ROOT as BASE_DIR
+from .conveyor import accepts
+from .routing import merger_router
 
 
 class MergerModule(Structure):
+    __slots__ = (
+        'grid_position', 'position', 'gameManager',
+        'inputConveyor1', 'inputConveyor2', 'outputConveyor', 'extra_inputs', 'router',
+        'original_sprite', 'radius', 'color',
+    )
 
     def __init__(self, position, gameManager):
         # position is grid coords (x,y)
@@ -26,6 +34,9 @@ class MergerModule(Structure):
         self.inputConveyor1 = None
         self.inputConveyor2 = None
         self.outputConveyor = None
+        # entradas adicionales (unión de N vías)
+        self.extra_inputs = []
+        self.router = merger_router()
 
         # Cargar sprite PNG
         try:
@@ -107,20 +118,29 @@ class MergerModule(Structure):
             return "down" if dy > 0 else "up"
         
     def process(self):
-        '''Combines numbers from two inputs into one output'''
+        '''Combines numbers from every input into one output'''
         if self.outputConveyor is None:
             return
-            
-        if self.inputConveyor1 and not self.inputConveyor1.isEmpty():
-            number = self.inputConveyor1.pop()
-            if number is not None:
-                self.outputConveyor.push(number)
-        
-        if self.inputConveyor2 and not self.inputConveyor2.isEmpty():
-            number = self.inputConveyor2.pop()
-            if number is not None:
-                self.outputConveyor.push(number)
-    
+
+        inputs = self.inputs
+        # una ronda por entrada y tick: cada entrada lista tiene su turno
+        for _ in range(len(inputs)):
+            # cada entrada solo se consume si la salida tiene hueco
+            if not accepts(self.outputConveyor):
+                return
+            index = self.router.pick_input(inputs)
+            if index is None:
+                return
+            number = inputs[index].peek()
+            if number is None or self.outputConveyor.push(number) is False:
+                return
+            inputs[index].pop()
+
+    @property
+    def inputs(self):
+        """All input slots in order: input1, input2 and the extra ones."""
+        return [self.inputConveyor1, self.inputConveyor2, *self.extra_inputs]
+
     @property
     def input1(self):
         return self.inputConveyor1
@@ -150,6 +170,9 @@ class MergerModule(Structure):
     
     def connectInput2(self, conveyor):
         self.input2 = conveyor
+
+    def connectExtraInput(self, conveyor):
+        self.extra_inputs.append(conveyor)
     
     def connectOutput(self, conveyor):
         self.output = conveyor
\ No newline at end of file
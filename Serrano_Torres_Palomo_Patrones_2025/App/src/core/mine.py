@@ -22,8 +22,21 @@ class Mine(Structure):
         the effective value).
     gameManager: object
         Reference to the GameManager instance used for timing and rendering.
+
+    Upgrade fields (``_base_number``, ``_eff_number_increase``,
+    ``_effective_number`` and the one-shot decorator flags) are declared
+    slots that stay unset until the first upgrade, so ``hasattr`` checks in
+    the upgrade code keep working.
     """
 
+    __slots__ = (
+        'grid_position', 'position', 'number', 'gameManager', 'radius', 'color',
+        'outputConveyor',
+        # campos de mejora
+        '_base_number', '_eff_number_increase', '_effective_number',
+        '_speed_upgraded', '_efficiency_upgraded',
+    )
+
     def __init__(self, position, number, gameManager):
         # position expected as grid coords (x, y)
         gx, gy = int(position[0]), int(position[1])
@@ -48,17 +61,26 @@ class Mine(Structure):
     def produce(self, conveyor):
         """Push the mine's value into the provided conveyor.
 
-        Uses an upgraded effective value when available.
+        Uses an upgraded effective value when available. Returns False when
+        the belt refuses the item; the mine simply holds until the next
+        production tick (its value is constant, so nothing is lost).
         """
         val = getattr(self, '_effective_number', self.number)
-        conveyor.push(val)
+        return conveyor.push(val) is not False
 
-    def draw(self):
-        """Render the mine and the current number on screen."""
+    def draw(self, view=None):
+        """Render the mine and the current number on screen.
+
+        ``view`` is the snapshot state (:class:`gm.simulation.StructureView`)
+        to draw instead of the live number.
+        """
         cam = getattr(self.gameManager, 'camera', pg.Vector2(0, 0))
         draw_pos = (int(self.position.x - cam.x), int(self.position.y - cam.y))
         pg.draw.circle(self.gameManager.screen, self.color, draw_pos, self.radius)
-        effective = getattr(self, '_effective_number', getattr(self, '_base_number', self.number))
+        if view is not None:
+            effective = view.number
+        else:
+            effective = getattr(self, '_effective_number', getattr(self, '_base_number', self.number))
         font = pg.font.Font(None, 24)
         text = font.render(str(effective), True, (255, 255, 255))
         text_rect = text.get_rect(center=draw_pos)
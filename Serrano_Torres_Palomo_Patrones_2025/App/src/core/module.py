@@ -8,6 +8,8 @@ the game grid.
 import pygame as pg
 from settings import CELL_SIZE_PX
 from .structure import Structure
+from .conveyor import accepts
+from .port_buffer import PortBuffer
 
 
 class Module(Structure):
@@ -17,6 +19,8 @@ class Module(Structure):
     operation.
     """
 
+    __slots__ = ('grid_position', 'position', 'gameManager', 'radius', 'color', 'buffer1', 'buffer2')
+
     def __init__(self, position, gameManager):
         gx, gy = int(position[0]), int(position[1])
         px = gx * CELL_SIZE_PX + CELL_SIZE_PX // 2
@@ -37,6 +41,28 @@ class Module(Structure):
         draw_pos = (int(self.position.x - cam.x), int(self.position.y - cam.y))
         pg.draw.circle(self.gameManager.screen, self.color, draw_pos, self.radius)
 
+    def input_buffers(self):
+        """Return the two input :class:`PortBuffer` objects, creating them on first use."""
+        try:
+            return self.buffer1, self.buffer2
+        except AttributeError:
+            # las subclases no llaman a Module.__init__
+            self.buffer1 = PortBuffer()
+            self.buffer2 = PortBuffer()
+            return self.buffer1, self.buffer2
+
+    def buffered_pairs(self, in1, in2, *outputs):
+        """Yield buffered ``(a, b)`` input pairs while every output accepts an item.
+
+        Arrived items are first moved from ``in1``/``in2`` into the input
+        buffers, so an input that is ahead of the other keeps flowing.
+        """
+        buf1, buf2 = self.input_buffers()
+        buf1.fill(in1)
+        buf2.fill(in2)
+        while buf1 and buf2 and all(accepts(out) for out in outputs):
+            yield buf1.pop(), buf2.pop()
+
     def calcular(self):
         """Compute the module-specific operation. Subclasses must override."""
         pass
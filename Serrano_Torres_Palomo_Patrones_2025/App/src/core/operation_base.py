@@ -1,6 +1,10 @@
 import pygame as pg
 from settings import CELL_SIZE_PX
 from .structure import Structure
+from utils.number_format import format_number
+from utils.value_domain import normalize_value
+from .conveyor import accepts
+from .port_buffer import PortBuffer
 
 
 class OperationModule(Structure):
@@ -8,6 +12,13 @@ class OperationModule(Structure):
 
     Concrete operation logic (operate) must be implemented by subclasses.
     """
+
+    __slots__ = (
+        'grid_position', 'position', 'gameManager',
+        '_inputConveyor1', '_inputConveyor2', '_outputConveyor',
+        'radius', 'color', 'sprite', 'buffer1', 'buffer2',
+    )
+
     def __init__(self, position, gameManager):
         gx, gy = int(position[0]), int(position[1])
         px = gx * CELL_SIZE_PX + CELL_SIZE_PX // 2
@@ -19,6 +30,9 @@ class OperationModule(Structure):
         self._inputConveyor1 = None
         self._inputConveyor2 = None
         self._outputConveyor = None
+        # colas de entrada: un input adelantado no bloquea su cinta
+        self.buffer1 = PortBuffer()
+        self.buffer2 = PortBuffer()
 
         self.radius = 15
         self.color = (255, 218, 185)
@@ -110,21 +124,17 @@ class OperationModule(Structure):
         if not self.output:
             return
 
-        ready1 = hasattr(self.input1, 'isReady') and self.input1.isReady()
-        ready2 = hasattr(self.input2, 'isReady') and self.input2.isReady()
-
-        if ready1 and ready2:
-            print(f"OperationModule: both inputs ready! Popping values...")
-            val1 = self.input1.pop()
-            val2 = self.input2.pop()
-
-            if val1 is not None and val2 is not None:
-                result = self.operate(val1, val2)
-                print(f"OperationModule: {val1} {self.get_symbol()} {val2} = {result}. Pushing to output.")
-                self.output.push(result)
-        elif ready1 or ready2:
-            # waiting for both
-            pass
+        # mover a los buffers lo que ya llegó al final de cada cinta
+        self.buffer1.fill(self.input1)
+        self.buffer2.fill(self.input2)
+
+        # combinar todos los pares completos mientras la salida tenga hueco
+        while self.buffer1 and self.buffer2 and accepts(self.output):
+            val1 = self.buffer1.pop()
+            val2 = self.buffer2.pop()
+            result = normalize_value(self.operate(val1, val2))
+            print(f"OperationModule: {format_number(val1)} {self.get_symbol()} {format_number(val2)} = {format_number(result)}. Pushing to output.")
+            self.output.push(result)
 
     def operate(self, a, b):
         raise NotImplementedError()
@@ -3,6 +3,8 @@ from .sprite_loader import load_sprite_from_assets
 
 
 class SumModule(OperationModule):
+    __slots__ = ()
+
     def get_symbol(self):
         return "+"
 
@@ -14,6 +16,8 @@ class SumModule(OperationModule):
 
 
 class MultiplyModule(OperationModule):
+    __slots__ = ()
+
     def get_symbol(self):
         return "x"
 
@@ -25,6 +29,8 @@ class MultiplyModule(OperationModule):
 
 
 class DivModule(OperationModule):
+    __slots__ = ()
+
     def get_symbol(self):
         return "÷"
 
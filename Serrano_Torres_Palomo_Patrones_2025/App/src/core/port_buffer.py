@@ -0,0 +1,57 @@
+"""Small FIFO input buffer for a module port.
+
+Operation modules used to fire only when both input belts had an item at
+the end in the same tick; otherwise the ready belt stalled until the other
+one caught up. Each input port now owns a :class:`PortBuffer` that pulls
+arrived items off its belt (up to ``depth``), and the module combines as
+many buffered pairs per tick as its output accepts.
+"""
+
+from collections import deque
+
+from settings import OPERATION_BUFFER_DEPTH
+
+
+class PortBuffer:
+    """Bounded FIFO of values taken from one input conveyor.
+
+    Args:
+        depth: Maximum number of buffered values; once full the belt keeps
+            its items (backpressure).
+    """
+
+    __slots__ = ('items', 'depth')
+
+    def __init__(self, depth: int = OPERATION_BUFFER_DEPTH):
+        self.items = deque()
+        self.depth = max(1, int(depth))
+
+    def fill(self, conveyor) -> int:
+        """Move every item that reached the end of ``conveyor`` into the buffer."""
+        if conveyor is None:
+            return 0
+        taken = 0
+        while len(self.items) < self.depth:
+            try:
+                if not conveyor.isReady():
+                    break
+                value = conveyor.pop()
+            except Exception:
+                break
+            if value is None:
+                break
+            self.items.append(value)
+            taken += 1
+        return taken
+
+    def pop(self):
+        return self.items.popleft()
+
+    def clear(self) -> None:
+        self.items.clear()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
@@ -0,0 +1,117 @@
+"""Routing policies for splitters (fan-out) and mergers (fan-in).
+
+A :class:`Router` picks which output receives the next item, or which input
+gives the next item. Only ports that are connected and able to move an item
+are considered, so a full or missing branch never drops or blocks an item
+while another branch has room.
+
+Splitter policies (``SPLITTER_POLICY``):
+
+- ``"round_robin"``: rotate over the outputs, skipping full ones.
+- ``"least_loaded"``: the output with the fewest items on it.
+- ``"weighted"``: smooth weighted round robin using ``SPLITTER_WEIGHTS``.
+- ``"overflow"``: always the first output; later ones only get the overflow.
+
+Merger policies (``MERGER_POLICY``):
+
+- ``"round_robin"``: rotate over the inputs that have an item ready.
+- ``"longest_queue"``: the ready input with the most items waiting.
+- ``"priority"``: always the first ready input, in connection order.
+"""
+
+from settings import SPLITTER_POLICY, SPLITTER_WEIGHTS, MERGER_POLICY
+from .conveyor import accepts
+
+SPLITTER_POLICIES = ('round_robin', 'least_loaded', 'weighted', 'overflow')
+MERGER_POLICIES = ('round_robin', 'longest_queue', 'priority')
+
+
+def _load(conveyor) -> int:
+    try:
+        return int(conveyor.size())
+    except Exception:
+        return 0
+
+
+def _ready(conveyor) -> bool:
+    try:
+        return bool(conveyor.isReady())
+    except Exception:
+        return False
+
+
+class Router:
+    """Per-structure routing state.
+
+    Args:
+        policy: Name of the policy (see the module docstring).
+        weights: Weights for the ``"weighted"`` policy, one per port; missing
+            entries count as 1.
+    """
+
+    __slots__ = ('policy', 'weights', 'cursor', 'credit')
+
+    def __init__(self, policy: str, weights=()):
+        self.policy = policy
+        self.weights = tuple(weights)
+        self.cursor = 0
+        self.credit = []
+
+    def _weight(self, index: int) -> int:
+        if index < len(self.weights):
+            return max(0, int(self.weights[index]))
+        return 1
+
+    def _rotate(self, candidates, count: int):
+        """First candidate index at or after the cursor, then advance it."""
+        for step in range(count):
+            i = (self.cursor + step) % count
+            if i in candidates:
+                self.cursor = (i + 1) % count
+                return i
+        return None
+
+    def pick_output(self, outputs):
+        """Index into ``outputs`` that should receive the next item, or None."""
+        candidates = [i for i, out in enumerate(outputs) if out is not None and accepts(out)]
+        if not candidates:
+            return None
+        if self.policy == 'least_loaded':
+            return min(candidates, key=lambda i: _load(outputs[i]))
+        if self.policy == 'overflow':
+            return candidates[0]
+        if self.policy == 'weighted':
+            # smooth weighted round robin (sin ráfagas hacia la misma salida)
+            if len(self.credit) != len(outputs):
+                self.credit = [0] * len(outputs)
+            weighted = [i for i in candidates if self._weight(i) > 0] or candidates
+            total = sum(self._weight(i) for i in weighted) or len(weighted)
+            for i in weighted:
+                self.credit[i] += self._weight(i) or 1
+            best = max(weighted, key=lambda i: self.credit[i])
+            self.credit[best] -= total
+            return best
+        return self._rotate(set(candidates), len(outputs))
+
+    def pick_input(self, inputs):
+        """Index into ``inputs`` whose head item should be taken next, or None."""
+        candidates = [i for i, inp in enumerate(inputs) if inp is not None and _ready(inp)]
+        if not candidates:
+            return None
+        if self.policy == 'longest_queue':
+            return max(candidates, key=lambda i: _load(inputs[i]))
+        if self.policy == 'priority':
+            return candidates[0]
+        return self._rotate(set(candidates), len(inputs))
+
+
+def splitter_router() -> Router:
+    """Router configured from ``SPLITTER_POLICY``/``SPLITTER_WEIGHTS``."""
+    policy = SPLITTER_POLICY if SPLITTER_POLICY in SPLITTER_POLICIES else 'round_robin'
+    return Router(policy, SPLITTER_WEIGHTS)
+
+
+def merger_router() -> Router:
+    """Router configured from ``MERGER_POLICY``."""
+    policy = MERGER_POLICY if MERGER_POLICY in MERGER_POLICIES else 'round_robin'
+    return Router(policy)
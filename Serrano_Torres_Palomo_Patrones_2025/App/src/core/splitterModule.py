@@ -1,8 +1,8 @@
 """Splitter module: routes items from a single input to two outputs.
 
-The SplitterModule alternates which output conveyor receives each item.
-This file contains only documentation additions; implementation is left
-unchanged.
+The SplitterModule hands each item to one of its output conveyors, chosen by
+a :class:`core.routing.Router` (round robin, least loaded, weighted or
+overflow). Besides the two main outputs it can fan out to extra belts.
 """
 
 import pygame as pg
@@ -10,9 +10,16 @@ from settings import CELL_SIZE_PX
 import pathlib
 from .structure import *
 from utils.app_paths import APP_ROOT as BASE_DIR
+from .routing import splitter_router
+from utils.number_format import format_number
 
 
 class SplitterModule(Structure):
+    __slots__ = (
+        'grid_position', 'position', 'gameManager',
+        'inputConveyor', 'outputConveyor1', 'outputConveyor2', 'extra_outputs', 'router',
+        'original_sprite', 'radius', 'color',
+    )
 
     def __init__(self, position, gameManager):
         gx, gy = int(position[0]), int(position[1])
@@ -25,7 +32,9 @@ class SplitterModule(Structure):
         self.inputConveyor = None
         self.outputConveyor1 = None
         self.outputConveyor2 = None
-        self.alternate = False
+        # salidas adicionales (reparto a N vías)
+        self.extra_outputs = []
+        self.router = splitter_router()
 
         # Cargar sprite PNG
         try:
@@ -109,26 +118,42 @@ class SplitterModule(Structure):
             return "down" if dy > 0 else "up"
         
     def process(self):
-        '''Splits numbers from input alternating between two outputs'''
+        '''Routes every number ready at the end of the input to an output'''
         if self.inputConveyor is None:
             return
-        
-        # Only process if a number has reached the end of the input conveyor
-        number = self.inputConveyor.pop()
-        if number is None:
-            return
-        
-        if self.alternate:
-            if self.outputConveyor1:
-                self.outputConveyor1.push(number)
-                print(f"Splitter: sent {number} to output1 (upper)")
-        else:
-            if self.outputConveyor2:
-                self.outputConveyor2.push(number)
-                print(f"Splitter: sent {number} to output2 (lower)")
-        
-        self.alternate = not self.alternate
-    
+
+        outputs = self.outputs
+        while self.inputConveyor.isReady():
+            number = self.inputConveyor.peek()
+            if number is None:
+                return
+            # si ninguna salida acepta el número, se queda en la entrada
+            index = self._send(outputs, number)
+            if index is None:
+                return
+            self.inputConveyor.pop()
+            print(f"Splitter: sent {format_number(number)} to output{index + 1}")
+
+    def _send(self, outputs, number):
+        """Push ``number`` to the output the router picks; returns its index or None.
+
+        An output that refuses the push (``push`` returned False) is left
+        out and the router picks again among the rest.
+        """
+        candidates = list(outputs)
+        while True:
+            index = self.router.pick_output(candidates)
+            if index is None:
+                return None
+            if candidates[index].push(number) is not False:
+                return index
+            candidates[index] = None
+
+    @property
+    def outputs(self):
+        """All output slots in order: output1, output2 and the extra ones."""
+        return [self.outputConveyor1, self.outputConveyor2, *self.extra_outputs]
+
     @property
     def input(self):
         return self.inputConveyor
@@ -160,4 +185,7 @@ class SplitterModule(Structure):
         self.output1 = conveyor
     
     def connectOutput2(self, conveyor):
-        self.output2 = conveyor
\ No newline at end of file
+        self.output2 = conveyor
+
+    def connectExtraOutput(self, conveyor):
+        self.extra_outputs.append(conveyor)
\ No newline at end of file
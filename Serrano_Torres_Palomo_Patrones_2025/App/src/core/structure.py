@@ -8,7 +8,13 @@ from abc import ABC, abstractmethod
 
 
 class Structure(ABC):
-    """Abstract base class for all placeable structures (mines, modules, etc.)."""
+    """Abstract base class for all placeable structures (mines, modules, etc.).
+
+    Declares empty ``__slots__`` so concrete structures that list their own
+    fields are stored without a per-instance ``__dict__``.
+    """
+
+    __slots__ = ()
 
     @abstractmethod
     def update(self):
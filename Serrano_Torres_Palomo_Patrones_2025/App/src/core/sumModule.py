@@ -9,8 +9,11 @@ import pygame as pg
 from core import conveyor
 from .module import *
 from utils.app_paths import APP_ROOT as BASE_DIR
+from utils.value_domain import normalize_value
 
 class SumModule(Module):
+    __slots__ = ('inConveyor1', 'inConveyor2', 'outConveyor', 'img')
+
     def __init__(self, position, gameManager):
         self.gameManager = gameManager
         self.position = position
@@ -40,10 +43,8 @@ class SumModule(Module):
         '''
         Suma los números de entrada y devuelve el resultado.
         '''
-        number1 = self.inConveyor1.pop()
-        number2 = self.inConveyor2.pop()
-        if number1 is not None and number2 is not None:
-            self.outConveyor.push(number1 + number2)
+        for number1, number2 in self.buffered_pairs(self.inConveyor1, self.inConveyor2, self.outConveyor):
+            self.outConveyor.push(normalize_value(number1 + number2))
         return None
     
     def draw(self):
@@ -9,11 +9,24 @@ Only documentation and docstrings are added; implementation is unchanged.
 import pygame as pg
 import pathlib
 from .structure import *
-from settings import CELL_SIZE_PX
+from settings import CELL_SIZE_PX, RENDER_TIER_NO_WELL_POINTS
+from utils.number_theory import points_for_number
+from map.registry import KIND_MINE
 from utils.app_paths import APP_ROOT as BASE_DIR
+from utils.number_format import format_number
 
 
 class Well(Structure):
+    # Los campos de mejora quedan sin asignar hasta la primera mejora
+    # (el código de mejoras comprueba su existencia con hasattr)
+    __slots__ = (
+        'grid_position', 'position', 'consumingNumber', 'gameManager', 'radius', 'color',
+        'coin_img', '_lock_color', 'locked', 'difficulty', 'points_reward', 'lock_img',
+        # campos de mejora
+        '_base_consumingNumber', '_eff_consuming_increase',
+        '_speed_upgraded', '_efficiency_upgraded',
+    )
+
     def __init__(self, position,  consumingNumber, gameManager, locked: bool = False):
         ''' 
         Inicializa el pozo usando coordenadas de grilla (x,y). La posición
@@ -93,45 +106,20 @@ class Well(Structure):
         - Puntos base: el número mismo
         - Bonus: ×1.2 (redondeado) si es primo (más difícil de generar)
         """
-        if num <= 1:
-            return num
-        
-        # Verificar si es primo
-        def is_prime(n):
-            if n < 2:
-                return False
-            if n == 2:
-                return True
-            if n % 2 == 0:
-                return False
-            for i in range(3, int(n**0.5) + 1, 2):
-                if n % i == 0:
-                    return False
-            return True
-        
-        # Puntos base = el número consumido
-        points = num
-        
-        # Bonus por ser primo: multiplicar por 1.2 y redondear
-        if is_prime(num):
-            points = round(num * 1.2)
-        
-        return points
+        # Tabla compartida: criba + Miller-Rabin con LRU de resultados
+        return points_for_number(num)
     
     def _get_current_mine_number(self):
         '''Obtiene el número efectivo actual de la mina que corresponde a este pozo'''
         try:
-            # Buscar todas las minas en el mapa
-            for row in self.gameManager.map.cells:
-                for cell in row:
-                    if not cell.isEmpty():
-                        struct = cell.getStructure()
-                        if struct.__class__.__name__ == 'Mine':
-                            # Verificar si esta mina corresponde a este pozo (mismo número base)
-                            mine_base_number = getattr(struct, 'number', 0)
-                            if mine_base_number == self.consumingNumber:
-                                # Retornar el número efectivo (mejorado) de la mina
-                                return getattr(struct, '_effective_number', mine_base_number)
+            # Recorrer solo las minas del registro del mapa
+            for struct in self.gameManager.map.structures_of(KIND_MINE):
+                if struct.__class__.__name__ == 'Mine':
+                    # Verificar si esta mina corresponde a este pozo (mismo número base)
+                    mine_base_number = getattr(struct, 'number', 0)
+                    if mine_base_number == self.consumingNumber:
+                        # Retornar el número efectivo (mejorado) de la mina
+                        return getattr(struct, '_effective_number', mine_base_number)
         except Exception:
             pass
         # Si no se encuentra la mina, usar el consumingNumber base
@@ -145,10 +133,9 @@ class Well(Structure):
 
     def push(self, number):
         '''Permite que un conveyor empuje un número directamente al pozo'''
-        # Si está bloqueado, ignorar todo
+        # Si está bloqueado, rechazar el número: la cinta se queda esperando
         if getattr(self, 'locked', False):
-            # consume attempt ignored
-            return
+            return False
 
         # Siempre consume el número (lo hace desaparecer)
         if number is not None:
@@ -161,16 +148,17 @@ class Well(Structure):
                     self.gameManager.points += points
                 except Exception:
                     pass
-                print(f"Well consumed {number}! +{points} points | Total: {getattr(self.gameManager, 'points', 0)}")
+                print(f"Well consumed {format_number(number)}! +{format_number(points)} points | Total: {format_number(getattr(self.gameManager, 'points', 0))}")
             else:
                 # Número incorrecto: se consume pero no suma puntos
-                print(f"Well rejected {number} (expected multiple of {self.consumingNumber}), no points awarded")
+                print(f"Well rejected {format_number(number)} (expected multiple of {self.consumingNumber}), no points awarded")
             # avisar al gameManager para comprobar si hay que desbloquear pozos
             try:
                 if hasattr(self.gameManager, 'unlock_next_well_if_needed'):
                     self.gameManager.unlock_next_well_if_needed()
             except Exception:
                 pass
+        return True
 
     def consume(self, conveyor):
         number = conveyor.pop()
@@ -178,9 +166,10 @@ class Well(Structure):
             points = number
             # NOTE: prime-based doubling removed per request — points equal the consumed number
             self.gameManager.points += points
-            print(f"Well consumed {number}! +{points} points | Total: {self.gameManager.points}")
+            print(f"Well consumed {format_number(number)}! +{format_number(points)} points | Total: {format_number(self.gameManager.points)}")
 
-    def draw(self):
+    def draw(self, view=None):
+        """Render the well; ``view`` is the snapshot state to draw instead of the live one."""
         cam = getattr(self.gameManager, 'camera', pg.Vector2(0, 0))
         draw_pos = (int(self.position.x - cam.x), int(self.position.y - cam.y))
 
@@ -189,28 +178,35 @@ class Well(Structure):
         pg.draw.circle(self.gameManager.screen, self.color, draw_pos, self.radius)
 
         font = pg.font.Font(None, 24)
-        text = font.render(str(self.consumingNumber), True, (255, 255, 255))
+        number = view.number if view is not None else self.consumingNumber
+        text = font.render(str(number), True, (255, 255, 255))
         text_rect = text.get_rect(center=draw_pos)
         self.gameManager.screen.blit(text, text_rect)
 
-        # Calcular puntos dinámicamente basándose en el número actual que la mina produciría
-        # Buscar la mina correspondiente para obtener su número efectivo
-        current_mine_number = self._get_current_mine_number()
-        points_value = self._calculate_points_by_difficulty(current_mine_number)
+        # El governor de render puede omitir la moneda y los puntos
+        if getattr(self.gameManager, 'render_tier', 0) < RENDER_TIER_NO_WELL_POINTS:
+            # Calcular puntos dinámicamente basándose en el número actual que la mina produciría
+            # Buscar la mina correspondiente para obtener su número efectivo
+            if view is not None and view.points is not None:
+                points_value = view.points
+            else:
+                current_mine_number = self._get_current_mine_number()
+                points_value = self._calculate_points_by_difficulty(current_mine_number)
+
+            if self.coin_img:
+                coin_x = int(self.position.x - cam.x - 25)
+                coin_y = int(self.position.y - cam.y - 35)
+                self.gameManager.screen.blit(self.coin_img, (coin_x, coin_y))
 
-        if self.coin_img:
-            coin_x = int(self.position.x - cam.x - 25)
-            coin_y = int(self.position.y - cam.y - 35)
-            self.gameManager.screen.blit(self.coin_img, (coin_x, coin_y))
-        
-        points_font = pg.font.Font(None, 20)
-        points_text = points_font.render(f"+{points_value}", True, (255, 215, 0))
-        points_rect = points_text.get_rect(center=(int(self.position.x - cam.x + 5), int(self.position.y - cam.y - 35)))
-        self.gameManager.screen.blit(points_text, points_rect)
+            points_font = pg.font.Font(None, 20)
+            points_text = points_font.render(f"+{points_value}", True, (255, 215, 0))
+            points_rect = points_text.get_rect(center=(int(self.position.x - cam.x + 5), int(self.position.y - cam.y - 35)))
+            self.gameManager.screen.blit(points_text, points_rect)
 
         # Si el pozo está bloqueado, superponer únicamente la imagen de candado
         # ya cargada (lock.png / lock.svg). No dibujamos un fallback gráfico.
-        if getattr(self, 'locked', False) and self.lock_img:
+        locked = view.locked if view is not None else getattr(self, 'locked', False)
+        if locked and self.lock_img:
             lw, lh = self.lock_img.get_size()
             lock_pos = (int(self.position.x - cam.x - lw // 2), int(self.position.y - cam.y - lh // 2))
             try:
@@ -2,7 +2,6 @@ import pygame as pg
 import sys
 import os
 import json
-import random
 """Game manager: orchestrates game state, objects and the main loop.
 
 This module defines :class:`GameManager`, a Singleton that initializes the
@@ -31,9 +30,16 @@ from gm.gm_update import update as gm_update
 from gm.gm_draw import draw as gm_draw
 import gm.action_buffer as action_buffer
 import gm.persistence as persistence
+from gm.simulation import SimulationThread
+from gm.autosave import AutosaveWriter
+from gm.rewind import RewindBuffer
+from gm.recorder import InputRecorder, current_tick, write_recording
+from gm.connection_graph import ConnectionGraph
+from gm.belt_index import BeltSpatialIndex
 
 from utils.mouseControl import MouseControl
 from patterns.singleton import Singleton
+from patterns.memento import GameCaretaker, GameOriginator
 from ui.hud import HUD, Colors
 from core.mine import Mine
 from core.well import Well
@@ -44,6 +50,7 @@ from core.splitterCreator import SplitterCreator
 from core.operationCreator import SumCreator, MultiplyCreator
 from core.conveyor import Conveyor
 from map.map import Map
+from map.registry import KIND_MINE, KIND_WELL
 
 
 class GameManager(Singleton):
@@ -74,9 +81,18 @@ class GameManager(Singleton):
         init_well_positions(self)
 
         self.running = True
+        self.simulation = None
 
         # Construir mapa y estructuras
         self.new_game()
+        self._schedule_autosave()
+        self.originator = GameOriginator(self)
+        self.caretaker = GameCaretaker(CHECKPOINT_HISTORY, CHECKPOINT_KEYFRAME_EVERY)
+        self._schedule_checkpoints()
+        self.rewind = RewindBuffer(self) if REWIND_SECONDS else None
+        self.recorder = None
+        if INPUT_RECORDING:
+            self.start_recording(RNG_SEED)
         
         # Inicializar HUD después de que el juego esté configurado
         self.hud = HUD(self)
@@ -119,6 +135,8 @@ class GameManager(Singleton):
             "SumModule": SumModuleCreator(),
             "MulModule": MulModuleCreator(),
         }
+        # también los usa la restauración de checkpoints (GameOriginator)
+        self.creators = creators
 
         # Asegurar que existe el directorio de guardado
         os.makedirs(self.save_dir, exist_ok=True)
@@ -190,149 +208,54 @@ class GameManager(Singleton):
         if not hasattr(self, 'points'):
             self.points = 0
 
-        print(f"Establishing connections for {len(self.conveyors)} conveyors...")
-        self._reconnect_structures()
+        if not loaded:
+            # la carga ya deja cableadas las cintas, structures y wells
+            print(f"Establishing connections for {len(self.conveyors)} conveyors...")
+            self._reconnect_structures()
+            self._collect_structures()
+
+        if not hasattr(self, 'production_timer'):
+            self.production_timer = 0
+        if not hasattr(self, 'consumption_timer'):
+            self.consumption_timer = 0
 
+    def _collect_structures(self):
+        """Rebuild ``self.structures`` (belts + placed structures) and ``self.wells``."""
         self.structures = []
         for conv in self.conveyors:
             self.structures.append(conv)
-        for row in self.map.cells:
-            for cell in row:
-                if not cell.isEmpty():
-                    self.structures.append(cell.structure)
+        for _, struct in self.map.iter_structures():
+            self.structures.append(struct)
 
         # Build wells list from current map so loaded games have the same
         # wells collection as newly created maps. Preserve any saved `locked`
         # state stored on the Well instances.
         self.wells = []
         try:
-            for row in self.map.cells:
-                for cell in row:
-                    if not cell.isEmpty() and cell.structure.__class__.__name__ == 'Well':
-                        self.wells.append(cell.structure)
+            for struct in self.map.structures_of(KIND_WELL):
+                if struct.__class__.__name__ == 'Well':
+                    self.wells.append(struct)
         except Exception:
             self.wells = getattr(self, 'wells', [])
 
-        if not hasattr(self, 'production_timer'):
-            self.production_timer = 0
-        if not hasattr(self, 'consumption_timer'):
-            self.consumption_timer = 0
-
     def _reconnect_structures(self):
-        """Re-establish connections between structures and conveyors after loading from save."""
-        def find_structure_at(grid_x, grid_y):
-            if 0 <= grid_y < len(self.map.cells) and 0 <= grid_x < len(self.map.cells[grid_y]):
-                cell = self.map.cells[grid_y][grid_x]
-                if not cell.isEmpty():
-                    return cell.structure
-            return None
+        """Re-establish connections between structures and conveyors after loading from save.
 
-        # Limpiar conexiones previas en todas las estructuras del mapa
-        for row in self.map.cells:
-            for cell in row:
-                if not cell.isEmpty():
-                    struct = cell.structure
-                    # Limpiar inputs
-                    if hasattr(struct, 'input1'): struct.input1 = None
-                    if hasattr(struct, 'input2'): struct.input2 = None
-                    if hasattr(struct, 'inputConveyor1'): struct.inputConveyor1 = None
-                    if hasattr(struct, 'inputConveyor2'): struct.inputConveyor2 = None
-                    # Limpiar outputs
-                    if hasattr(struct, 'output'): struct.output = None
-                    if hasattr(struct, 'outputConveyor'): struct.outputConveyor = None
-
-        # Primero, recopilar todas las cintas que llegan/salen de cada estructura
-        struct_connections = {}  # {structure: {'inputs': [conveyors], 'outputs': [conveyors]}}
-        
-        for conv in self.conveyors:
-            start_grid_x = int(conv.start_pos.x) // CELL_SIZE_PX
-            start_grid_y = int(conv.start_pos.y) // CELL_SIZE_PX
-            end_grid_x = int(conv.end_pos.x) // CELL_SIZE_PX
-            end_grid_y = int(conv.end_pos.y) // CELL_SIZE_PX
-
-            start_struct = find_structure_at(start_grid_x, start_grid_y)
-            end_struct = find_structure_at(end_grid_x, end_grid_y)
-
-            # La cinta sale de start_struct (output para la estructura)
-            if start_struct:
-                if start_struct not in struct_connections:
-                    struct_connections[start_struct] = {'inputs': [], 'outputs': []}
-                struct_connections[start_struct]['outputs'].append(conv)
-
-            # La cinta llega a end_struct (input para la estructura)
-            if end_struct:
-                if end_struct not in struct_connections:
-                    struct_connections[end_struct] = {'inputs': [], 'outputs': []}
-                struct_connections[end_struct]['inputs'].append(conv)
-
-        # Ahora conectar según el tipo de estructura
-        for struct, connections in struct_connections.items():
-            struct_type = struct.__class__.__name__.lower()
-            inputs = connections['inputs']
-            outputs = connections['outputs']
-
-            # MINAS: solo output
-            if 'mine' in struct_type:
-                if outputs and hasattr(struct, 'connectOutput'):
-                    struct.connectOutput(outputs[0])
-
-            # POZOS (WELLS): solo input
-            elif 'well' in struct_type:
-                if inputs and hasattr(struct, 'connectInput'):
-                    struct.connectInput(inputs[0])
-
-            # OPERADORES (suma, mul, div): 2 inputs, 1 output
-            elif any(x in struct_type for x in ['sum', 'mul', 'div', 'operation']):
-                # Conectar inputs (hasta 2)
-                if len(inputs) >= 1 and hasattr(struct, 'connectInput1'):
-                    struct.connectInput1(inputs[0])
-                if len(inputs) >= 2 and hasattr(struct, 'connectInput2'):
-                    struct.connectInput2(inputs[1])
-                # Conectar output
-                if outputs and hasattr(struct, 'connectOutput'):
-                    struct.connectOutput(outputs[0])
-
-            # MERGER: 2 inputs, 1 output
-            elif 'merger' in struct_type:
-                # Conectar inputs (hasta 2)
-                if len(inputs) >= 1 and hasattr(struct, 'connectInput1'):
-                    struct.connectInput1(inputs[0])
-                if len(inputs) >= 2 and hasattr(struct, 'connectInput2'):
-                    struct.connectInput2(inputs[1])
-                # Conectar output
-                if outputs and hasattr(struct, 'connectOutput'):
-                    struct.connectOutput(outputs[0])
-
-            # SPLITTER: 1 input, 2 outputs
-            elif 'splitter' in struct_type:
-                # Conectar input
-                if inputs and hasattr(struct, 'connectInput'):
-                    struct.connectInput(inputs[0])
-                # Conectar outputs (hasta 2)
-                if len(outputs) >= 1 and hasattr(struct, 'connectOutput1'):
-                    struct.connectOutput1(outputs[0])
-                if len(outputs) >= 2 and hasattr(struct, 'connectOutput2'):
-                    struct.connectOutput2(outputs[1])
-
-        # Conectar cintas entre sí (cuando una termina donde otra empieza)
-        for i, conv in enumerate(self.conveyors):
-            for other_conv in self.conveyors:
-                if conv != other_conv:
-                    if (int(conv.end_pos.x) == int(other_conv.start_pos.x) and
-                        int(conv.end_pos.y) == int(other_conv.start_pos.y)):
-                        grid_x = int(conv.end_pos.x) // CELL_SIZE_PX
-                        grid_y = int(conv.end_pos.y) // CELL_SIZE_PX
-                        struct = find_structure_at(grid_x, grid_y)
-                        if struct is None:
-                            conv.connectOutput(other_conv)
+        Rebuilds the endpoint index of :class:`gm.connection_graph.ConnectionGraph`
+        (O(C + S)) and the belt picking index (:class:`gm.belt_index.BeltSpatialIndex`). Single belt/structure edits should use
+        :meth:`_connect_conveyor`, :meth:`_disconnect_conveyor` and
+        :meth:`_rewire_cell`, which only touch the affected cells.
+        """
+        self.connections = ConnectionGraph(self)
+        self.connections.rebuild(self.conveyors)
+        # índice espacial para seleccionar cintas con el ratón
+        self.belt_index = BeltSpatialIndex()
+        self.belt_index.rebuild(self.conveyors)
 
         if len(self.conveyors) > 0:
-            for row in self.map.cells:
-                for cell in row:
-                    if not cell.isEmpty() and cell.structure.__class__.__name__ == 'Mine':
-                        self.mine = cell.structure
-                        break
-                if hasattr(self, 'mine') and self.mine:
+            for struct in self.map.structures_of(KIND_MINE):
+                if struct.__class__.__name__ == 'Mine':
+                    self.mine = struct
                     break
 
             self.final_conveyor = None
@@ -340,13 +263,51 @@ class GameManager(Singleton):
             for conv in self.conveyors:
                 end_grid_x = int(conv.end_pos.x) // CELL_SIZE_PX
                 end_grid_y = int(conv.end_pos.y) // CELL_SIZE_PX
-                if 0 <= end_grid_y < len(self.map.cells) and 0 <= end_grid_x < len(self.map.cells[end_grid_y]):
-                    cell = self.map.cells[end_grid_y][end_grid_x]
-                    if not cell.isEmpty() and cell.structure.__class__.__name__ == 'Well':
+                if self.map.isInsideBounds(end_grid_x, end_grid_y):
+                    struct = self.map.registry.at(end_grid_x, end_grid_y)
+                    if struct is not None and struct.__class__.__name__ == 'Well':
                         self.final_conveyor = conv
-                        self.well = cell.structure
+                        self.well = struct
                         break
 
+    def _connect_conveyor(self, conveyor):
+        """Wire a newly built conveyor to the structures at its two endpoints."""
+        self._note_build('conveyor_built', conveyor)
+        if getattr(self, 'connections', None) is None:
+            self._reconnect_structures()
+            return
+        self.connections.add_conveyor(conveyor)
+        self.belt_index.add(conveyor)
+
+    def _disconnect_conveyor(self, conveyor):
+        """Unwire a removed conveyor from the structures at its two endpoints."""
+        self._note_build('conveyor_removed', conveyor)
+        if getattr(self, 'connections', None) is None:
+            self._reconnect_structures()
+            return
+        self.connections.remove_conveyor(conveyor)
+        self.belt_index.remove(conveyor)
+
+    def _rewire_cell(self, grid_x, grid_y):
+        """Reconnect whatever occupies ``(grid_x, grid_y)`` after a structure change."""
+        self._note_build('cell_changed', (int(grid_x), int(grid_y)))
+        if getattr(self, 'connections', None) is None:
+            self._reconnect_structures()
+            return
+        self.connections.rewire_cell((int(grid_x), int(grid_y)))
+
+    def _apply_batch(self, added=(), removed=(), cells=()):
+        """Wire a batch of belt/structure changes with one pass over the touched cells."""
+        self._note_build('batch', (len(added), len(removed), len(cells)))
+        if getattr(self, 'connections', None) is None:
+            self._reconnect_structures()
+            return
+        self.connections.apply_batch(added, removed, cells)
+        for conv in removed:
+            self.belt_index.remove(conv)
+        for conv in added:
+            self.belt_index.add(conv)
+
     def unlock_next_well_if_needed(self):
         """Comprueba si la puntuación actual alcanza el objetivo del siguiente pozo bloqueado
         y lo desbloquea (se usa la tupla `self.well_objectives`)."""
@@ -392,6 +353,7 @@ class GameManager(Singleton):
                         if w_base_num == int(min_num) and getattr(w, 'locked', False):
                             w.locked = False
                             unlocked = True
+                            self.mark_views_dirty()
                             break
                     except Exception:
                         pass
@@ -419,7 +381,12 @@ class GameManager(Singleton):
             return False
 
     def save_and_exit(self):
-        # Guardar y volver al menú principal en vez de cerrar la app
+        # Guardar y volver al menú principal en vez de cerrar la app.
+        # Parar antes el hilo de simulación para guardar un estado estable.
+        self._stop_simulation()
+        self.stop_recording()
+        # que un autoguardado pendiente no sobrescriba este guardado
+        self._stop_autosave_writer()
         try:
             self.save_map()
         except Exception:
@@ -474,6 +441,9 @@ class GameManager(Singleton):
                     if event.key == pg.K_v:
                             self.setState(self.buildState)
                             self.state.setFactory(SumModuleCreator())       
+                    if event.key == pg.K_F3:
+                            # overlay de depuración del governor de render
+                            self.show_render_debug = not getattr(self, 'show_render_debug', False)
 
             #pulsacion de raton
             if event.type == pg.MOUSEBUTTONUP and event.button == 1:
@@ -600,7 +570,7 @@ class GameManager(Singleton):
                     # enqueue upgrade actions (global)
                     if self.hud and self.hud.speed_button.collidepoint(event.pos):
                         # avoid enqueueing more than remaining capacity (max 10 uses total)
-                        queued = sum(1 for a in self.action_buffer if a.get('type') == 'speed')
+                        queued = sum(1 for a in self.pending_actions() if a.get('type') == 'speed')
                         if queued + self.speed_uses_used >= 10:
                             print("No speed upgrades available to queue")
                         elif queued >= 1:
@@ -610,11 +580,11 @@ class GameManager(Singleton):
                             print("No tienes puntos suficientes para Mejora Velocidad")
                         else:
                             # append action (will be processed in update())
-                            self.action_buffer.append({'type': 'speed', 'tries': 0, 'max_tries': 30})
-                            print(f"Queued Speed upgrade action (queue size={len(self.action_buffer)})")
+                            self.queue_action('speed')
+                            print(f"Queued Speed upgrade action (queue size={len(self.pending_actions())})")
 
                     elif self.hud and self.hud.efficiency_button.collidepoint(event.pos):
-                        queued = sum(1 for a in self.action_buffer if a.get('type') == 'eff')
+                        queued = sum(1 for a in self.pending_actions() if a.get('type') == 'eff')
                         if queued + self.eff_uses_used >= 10:
                             print("No efficiency upgrades available to queue")
                         elif queued >= 1:
@@ -623,12 +593,12 @@ class GameManager(Singleton):
                             print("No tienes puntos suficientes para Mejora Eficiencia")
                         
                         else:
-                            self.action_buffer.append({'type': 'eff', 'tries': 0, 'max_tries': 30})
-                            print(f"Queued Efficiency upgrade action (queue size={len(self.action_buffer)})")
+                            self.queue_action('eff')
+                            print(f"Queued Efficiency upgrade action (queue size={len(self.pending_actions())})")
 
                     elif self.hud and self.hud.new_mine_button.collidepoint(event.pos):
                         # enqueue a 'mine' purchase action (similar to speed/eff)
-                        queued = sum(1 for a in self.action_buffer if a.get('type') == 'mine')
+                        queued = sum(1 for a in self.pending_actions() if a.get('type') == 'mine')
                         # No limit on queued mine purchases — allow unlimited
                         if queued >= 1:
                             print("Ya hay una compra de Mina pendiente")
@@ -649,8 +619,8 @@ class GameManager(Singleton):
                             if next_cost is None or getattr(self, 'points', 0) < (next_cost or 0):
                                 print("No tienes puntos suficientes para comprar una Mina")
                             else:
-                                self.action_buffer.append({'type': 'mine', 'tries': 0, 'max_tries': 30})
-                                print(f"Queued Mine purchase action (queue size={len(self.action_buffer)})")
+                                self.queue_action('mine')
+                                print(f"Queued Mine purchase action (queue size={len(self.pending_actions())})")
                     elif self.hud and self.hud.shop_button.collidepoint(event.pos):
                         print("Has pulsado el botón nuevo")
                         self.hud.show_popup("¡Botón activado!") 
@@ -666,17 +636,70 @@ class GameManager(Singleton):
                         except Exception:
                             skip_state = False
                 if not skip_state:
-                    self.state.handleClickEvent(event)
+                    self._dispatch_to_state(event)
             except Exception:
                 try:
-                    self.state.handleClickEvent(event)
+                    self._dispatch_to_state(event)
                 except Exception:
                     pass
+
+    def _dispatch_to_state(self, event):
+        """Forward ``event`` to the current state.
+
+        While the simulation thread is running the state handlers (which
+        build and destroy structures) are posted to it, so the world is
+        only ever mutated from the simulation thread.
+        """
+        state = self.state
+        sim = getattr(self, 'simulation', None)
+        if sim is not None and sim.is_alive():
+            sim.post(lambda: state.handleClickEvent(event))
+        else:
+            state.handleClickEvent(event)
+
+    def _start_simulation(self):
+        """Start the simulation worker thread if enabled in settings."""
+        if not SIMULATION_THREADED:
+            return
+        if self.simulation is not None and self.simulation.is_alive():
+            return
+        try:
+            self.simulation = SimulationThread(self)
+            self.simulation.start()
+        except Exception as e:
+            print("Failed to start simulation thread, running inline:", e)
+            self.simulation = None
+
+    def _stop_simulation(self):
+        """Stop the simulation worker thread (no-op if it is not running)."""
+        sim = getattr(self, 'simulation', None)
+        if sim is None:
+            return
+        try:
+            sim.stop()
+        except Exception:
+            pass
+        # el guardado posterior y un nuevo hilo continúan desde este tick
+        self.resume_tick = sim.tick
+        self.simulation = None
+
+    def mark_views_dirty(self):
+        """Flag that a structure label changed without a placement or removal
+        (efficiency upgrade, well unlock) so the next snapshot rebuilds the
+        structure views (:func:`gm.simulation.capture_snapshot`)."""
+        self.view_version = getattr(self, 'view_version', 0) + 1
+
     def run(self):
-        while self.running:
-            self.checkEvents()
-            self.update()
-            self.draw()
+        self._start_simulation()
+        try:
+            while self.running:
+                self.checkEvents()
+                self.update()
+                self.draw()
+        finally:
+            self._stop_simulation()
+            self.stop_recording()
+            self._stop_autosave_writer()
 #region setState
 
     def setState(self,state):
@@ -732,61 +755,78 @@ class GameManager(Singleton):
         if width <= 0 or height <= 0:
             return False
 
-        max_tries = width * height * 2
-        tries = 0
-        while tries < max_tries:
-            x = random.randrange(0, width)
-            y = random.randrange(0, height)
-            cell = self.map.getCell(x, y)
-            if cell and cell.isEmpty():
+        # Celda libre en O(1) desde el índice del mapa (o la más cercana a la red)
+        cell_pos = self._pick_free_cell()
+        if cell_pos is None:
+            return False
+        x, y = cell_pos
+        try:
+            mine = MineCreator().createStructure((x, y), 1, self)
+            ok = self.map.placeStructure(x, y, mine)
+            if ok:
+                self._rewire_cell(x, y)
                 try:
-                    mine = MineCreator().createStructure((x, y), 1, self)
-                    ok = self.map.placeStructure(x, y, mine)
-                    if ok:
-                        try:
-                            if not hasattr(self, 'structures'):
-                                self.structures = []
-                            self.structures.append(mine)
-                        except Exception:
-                            pass
-                        if not hasattr(self, 'mine') or self.mine is None:
-                            self.mine = mine
-                        
-                        # NEW BEHAVIOR: newly created mines should always spawn with
-                        # base number 1. Efficiency upgrades apply only to existing
-                        # structures at the time of purchase — they must not make
-                        # newly created mines start at a higher number.
-                        try:
-                            mine._base_number = 1
-                            # Clear any effective override so the mine shows/produces
-                            # its canonical base value unless upgrades are applied
-                            # specifically to this instance later.
-                            try:
-                                if hasattr(mine, '_effective_number'):
-                                    delattr(mine, '_effective_number')
-                            except Exception:
-                                pass
-                            # Ensure any internal eff counters start at 0 for new mines
-                            try:
-                                mine._eff_number_increase = 0
-                            except Exception:
-                                pass
-                        except Exception:
-                            pass
-                        
-                        try:
-                            self._popup_message = f"Mina creada en ({x},{y})"
-                            self._popup_timer = 3000
-                        except Exception:
-                            pass
-                        print(f"Nueva mina creada en {x},{y}")
-                        return True
-                except Exception as e:
-                    print("Fallo al crear mina:", e)
-            tries += 1
+                    if not hasattr(self, 'structures'):
+                        self.structures = []
+                    self.structures.append(mine)
+                except Exception:
+                    pass
+                if not hasattr(self, 'mine') or self.mine is None:
+                    self.mine = mine
+                
+                # NEW BEHAVIOR: newly created mines should always spawn with
+                # base number 1. Efficiency upgrades apply only to existing
+                # structures at the time of purchase — they must not make
+                # newly created mines start at a higher number.
+                try:
+                    mine._base_number = 1
+                    # Clear any effective override so the mine shows/produces
+                    # its canonical base value unless upgrades are applied
+                    # specifically to this instance later.
+                    try:
+                        if hasattr(mine, '_effective_number'):
+                            delattr(mine, '_effective_number')
+                    except Exception:
+                        pass
+                    # Ensure any internal eff counters start at 0 for new mines
+                    try:
+                        mine._eff_number_increase = 0
+                    except Exception:
+                        pass
+                except Exception:
+                    pass
+                
+                try:
+                    self._popup_message = f"Mina creada en ({x},{y})"
+                    self._popup_timer = 3000
+                except Exception:
+                    pass
+                print(f"Nueva mina creada en {x},{y}")
+                return True
+        except Exception as e:
+            print("Fallo al crear mina:", e)
 
         return False
 
+    def _pick_free_cell(self):
+        """Choose an empty cell for a new mine according to ``MINE_PLACEMENT``.
+
+        ``"random"`` picks uniformly among free cells; ``"near_network"`` picks
+        the free cell closest to any placed structure or belt endpoint.
+        Returns None only when the map has no free cell.
+        """
+        free_cells = getattr(self.map, 'free_cells', None)
+        if free_cells is None:
+            return None
+        if MINE_PLACEMENT == 'near_network':
+            sources = [pos for pos, _ in self.map.iter_structures()]
+            connections = getattr(self, 'connections', None)
+            if connections is not None:
+                sources.extend(connections.outgoing)
+                sources.extend(connections.incoming)
+            return free_cells.nearest_to(sources, rng=self.rng)
+        return free_cells.random_cell(rng=self.rng)
+
     def _apply_mine_action(self) -> bool:
         """Attempt to purchase and create a new mine in a random empty cell.
 
@@ -837,6 +877,184 @@ class GameManager(Singleton):
         except Exception:
             return True
 
+    # ---- Popup temporal ----
+    @property
+    def _popup_timer(self):
+        """Remaining milliseconds of the transient popup, or None.
+
+        Setting it arms (or re-arms) an expiry timer on ``self.ui_timers``
+        that clears ``_popup_message``; the HUD no longer counts it down.
+        """
+        timer = getattr(self, '_popup_expiry', None)
+        if timer is None or not timer.active:
+            return None
+        return int(timer.remaining_ms())
+
+    @_popup_timer.setter
+    def _popup_timer(self, ms):
+        old = getattr(self, '_popup_expiry', None)
+        if old is not None:
+            old.cancel()
+        self._popup_expiry = None
+        wheel = getattr(self, 'ui_timers', None)
+        if ms is None or wheel is None:
+            return
+        self._popup_expiry = wheel.schedule(ms, self._expire_popup)
+
+    def _expire_popup(self):
+        self._popup_expiry = None
+        self._popup_message = None
+
+    # ---- Autosave ----
+    def _schedule_autosave(self):
+        """Arm the repeating autosave timer on ``self.timers`` (AUTOSAVE_INTERVAL_MS)."""
+        old = getattr(self, '_autosave_timer', None)
+        if old is not None:
+            old.cancel()
+        self._autosave_timer = None
+        if AUTOSAVE_INTERVAL_MS and getattr(self, 'timers', None) is not None:
+            self._autosave_timer = self.timers.schedule(
+                AUTOSAVE_INTERVAL_MS, self._autosave, repeat=AUTOSAVE_INTERVAL_MS)
+
+    def _autosave(self):
+        """Capture the world now and let the autosave thread write it to disk."""
+        if self._rewinding():
+            return
+        try:
+            print("Autosave...")
+            writer = getattr(self, 'autosave_writer', None)
+            if writer is None or not writer.is_alive():
+                writer = self.autosave_writer = AutosaveWriter()
+                writer.start()
+            os.makedirs(self.save_dir, exist_ok=True)
+            writer.submit(self.save_file, persistence.capture_save(self))
+        except Exception:
+            pass
+
+    # ---- Rewind ----
+    def _rewinding(self):
+        """True while the rewind buffer is replaying ticks during a seek."""
+        rewind = getattr(self, 'rewind', None)
+        return rewind is not None and rewind.paused
+
+    def _streaming(self):
+        """True while a chunk-streamed save is still being placed (:mod:`gm.stream_loader`)."""
+        loader = getattr(self, 'stream_loader', None)
+        return loader is not None and not loader.done
+
+    def _note_build(self, kind, detail=None):
+        rewind = getattr(self, 'rewind', None)
+        if rewind is not None:
+            rewind.on_build(kind, detail)
+
+    def rewind_to(self, tick):
+        """Move the world back to simulation ``tick`` (see :mod:`gm.rewind`).
+
+        Runs on the simulation thread when it is alive, like any other world
+        mutation.
+        """
+        rewind = getattr(self, 'rewind', None)
+        if rewind is None:
+            return False
+
+        def seek():
+            at = current_tick(self)
+            try:
+                ms = rewind.seek(int(tick))
+                self._record_input('rewind', tick=at, target=int(tick))
+                print(f"Rewound to tick {tick} in {ms:.1f} ms")
+            except ValueError as e:
+                print(e)
+
+        sim = getattr(self, 'simulation', None)
+        if sim is not None and sim.is_alive():
+            sim.post(seek)
+        else:
+            seek()
+        return True
+
+    # ---- Input recording ----
+    def start_recording(self, seed=None):
+        """Start logging input commands for deterministic replay (:mod:`gm.recorder`).
+
+        Needs the threaded simulation, whose fixed step makes ticks
+        reproducible. Returns False when recording is not possible.
+        """
+        if not SIMULATION_THREADED:
+            print("Input recording needs SIMULATION_THREADED")
+            return False
+        recorder = InputRecorder(self, seed)
+        sim = getattr(self, 'simulation', None)
+        if sim is not None and sim.is_alive():
+            sim.post(recorder.begin)
+        else:
+            recorder.begin()
+        self.recorder = recorder
+        print(f"Recording input (seed {recorder.seed})")
+        return True
+
+    def stop_recording(self, filepath=None):
+        """Stop recording and write it to ``filepath`` (``saves/INPUT_RECORDING_FILE``).
+
+        The final world digest is taken on the simulation thread when it is
+        running, so the file is written from there too.
+        """
+        recorder = getattr(self, 'recorder', None)
+        if recorder is None:
+            return False
+        self.recorder = None
+        filepath = filepath or (self.save_dir / INPUT_RECORDING_FILE)
+
+        def finish():
+            try:
+                write_recording(filepath, recorder.finish())
+                print(f"Input recording ({len(recorder.events)} events) written to {filepath}")
+            except Exception as e:
+                print("Failed to write input recording:", e)
+
+        sim = getattr(self, 'simulation', None)
+        if sim is not None and sim.is_alive():
+            sim.post(finish)
+        else:
+            finish()
+        return True
+
+    def _record_input(self, kind, tick=None, **payload):
+        recorder = getattr(self, 'recorder', None)
+        if recorder is not None and not self._rewinding():
+            recorder.record(kind, payload, tick)
+
+    # ---- Checkpoints ----
+    def _schedule_checkpoints(self):
+        """Arm the repeating checkpoint timer on ``self.timers`` (CHECKPOINT_INTERVAL_MS)."""
+        old = getattr(self, '_checkpoint_timer', None)
+        if old is not None:
+            old.cancel()
+        self._checkpoint_timer = None
+        if CHECKPOINT_INTERVAL_MS and getattr(self, 'timers', None) is not None:
+            self._checkpoint_timer = self.timers.schedule(
+                CHECKPOINT_INTERVAL_MS, self._checkpoint, repeat=CHECKPOINT_INTERVAL_MS)
+
+    def _checkpoint(self):
+        """Store an in-memory checkpoint (a delta against the last keyframe)."""
+        if self._rewinding() or self._streaming():
+            return
+        try:
+            self.caretaker.checkpoint(self.originator)
+        except Exception:
+            pass
+
+    def _stop_autosave_writer(self):
+        """Finish any pending background write (no-op without a writer)."""
+        writer = getattr(self, 'autosave_writer', None)
+        if writer is None:
+            return
+        try:
+            writer.stop()
+        except Exception:
+            pass
+        self.autosave_writer = None
+
     # ---- Action buffer processing ----
     def process_action_buffer(self, max_per_frame: int = 5):
         """Process up to `max_per_frame` queued upgrade actions.
@@ -852,6 +1070,57 @@ class GameManager(Singleton):
             # keep previous silent-fail behavior
             pass
 
+    def queue_action(self, kind):
+        """Queue an upgrade action of ``kind`` ('speed', 'eff' or 'mine').
+
+        Like build clicks, the action is appended on the simulation thread
+        when it is running, so it lands on a well-defined tick (and is
+        recorded with it, see :mod:`gm.recorder`).
+        """
+        action = {'type': kind, 'tries': 0, 'max_tries': 30}
+        posted = self._posted_actions
+
+        def enqueue():
+            try:
+                posted.remove(action)
+            except ValueError:
+                pass
+            self.action_buffer.append(action)
+            self._record_input('action', type=kind)
+
+        sim = getattr(self, 'simulation', None)
+        if sim is not None and sim.is_alive():
+            posted.append(action)
+            sim.post(enqueue)
+        else:
+            enqueue()
+
+    def set_tutorial_paused(self, paused):
+        """Pause or resume the world while the tutorial modal is open.
+
+        The flag is read by the simulation step, so it is changed on the
+        simulation thread when it is running and recorded with that tick
+        (:mod:`gm.recorder`), like any other input.
+        """
+        paused = bool(paused)
+
+        def apply():
+            if bool(getattr(self, '_tutorial_paused', False)) != paused:
+                self._tutorial_paused = paused
+                self._record_input('pause', paused=paused)
+
+        sim = getattr(self, 'simulation', None)
+        if sim is not None and sim.is_alive():
+            sim.post(apply)
+        else:
+            apply()
+
+    def pending_actions(self):
+        """Queued actions (also those still posted to the simulation thread)
+        plus the ones waiting for a retry on ``self.timers``."""
+        return (tuple(getattr(self, '_posted_actions', ())) + tuple(self.action_buffer)
+                + tuple(getattr(self, 'deferred_actions', ())))
+
     def _apply_speed_action(self) -> bool:
         """Attempt to apply a single global speed upgrade.
 
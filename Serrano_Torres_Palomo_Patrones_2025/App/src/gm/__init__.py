@@ -6,6 +6,6 @@ public API used by the rest of the project remains stable.
 """
 
 __all__ = [
-    'action_buffer', 'gm_draw', 'gm_init', 'gm_update', 'gm_upgrades',
-    'persistence', 'renderer', 'update_helpers', 'upgrades_impl'
+    'action_buffer', 'autosave', 'belt_index', 'connection_graph', 'gm_draw', 'gm_init', 'gm_update', 'gm_upgrades',
+    'persistence', 'recorder', 'render_governor', 'renderer', 'replay', 'rewind', 'sim_state', 'simulation', 'stream_loader', 'timer_wheel', 'update_helpers', 'upgrades_impl'
 ]
@@ -6,6 +6,9 @@ the logic isolated for easier testing and maintenance.
 """
 from collections import deque
 
+from map.registry import KIND_MINE, unwrap
+from .upgrades_impl import requeue_action
+
 
 def process_action_buffer(gm, max_per_frame: int = 5):
     """Process up to ``max_per_frame`` queued upgrade actions.
@@ -43,7 +46,7 @@ def process_action_buffer(gm, max_per_frame: int = 5):
         # failed to apply: retry later unless too many tries
         action['tries'] = action.get('tries', 0) + 1
         if action['tries'] < action.get('max_tries', 30):
-            gm.action_buffer.append(action)
+            requeue_action(gm, action)
         else:
             try:
                 print(f"Dropping action {action.get('type')} after {action['tries']} failed tries")
@@ -118,22 +121,7 @@ def _apply_speed_action(gm) -> bool:
 
 def _apply_eff_action(gm) -> bool:
     """Attempt to apply a single global efficiency upgrade."""
-    mines_found = False
-    for y, row in enumerate(gm.map.cells):
-        for x, cell in enumerate(row):
-            if cell and not cell.isEmpty():
-                s = cell.structure
-                base_s = s
-                try:
-                    while hasattr(base_s, 'target'):
-                        base_s = base_s.target
-                except Exception:
-                    pass
-                if hasattr(base_s, 'number'):
-                    mines_found = True
-                    break
-        if mines_found:
-            break
+    mines_found = any(hasattr(unwrap(s), 'number') for s in gm.map.structures_of(KIND_MINE))
 
     if not mines_found:
         return False
@@ -148,55 +136,50 @@ def _apply_eff_action(gm) -> bool:
         return False
 
     applied = 0
-    for y, row in enumerate(gm.map.cells):
-        for x, cell in enumerate(row):
-            if cell and not cell.isEmpty():
-                s = cell.structure
-                base_s = s
+    for _, s in gm.map.iter_structures():
+        base_s = unwrap(s)
+        if hasattr(base_s, 'number'):
+            if not hasattr(base_s, '_base_number'):
+                try:
+                    base_s._base_number = int(base_s.number)
+                except Exception:
+                    base_s._base_number = getattr(base_s, 'number', 1)
+            try:
+                base_s._base_number = int(base_s._base_number) + 1
+                base_s._effective_number = max(1, int(base_s._base_number))
+                applied += 1
+            except Exception:
+                pass
+        if hasattr(base_s, 'consumingNumber'):
+            if not hasattr(base_s, '_base_consumingNumber'):
+                try:
+                    base_s._base_consumingNumber = int(base_s.consumingNumber)
+                except Exception:
+                    base_s._base_consumingNumber = getattr(base_s, 'consumingNumber', 1)
+            try:
+                base_s._base_consumingNumber = int(base_s._base_consumingNumber) + 1
+                base_val = max(1, int(base_s._base_consumingNumber))
+                base_s.consumingNumber = base_val
                 try:
-                    while hasattr(base_s, 'target'):
-                        base_s = base_s.target
+                    if s is not base_s and hasattr(s, 'consumingNumber'):
+                        s.consumingNumber = base_val
                 except Exception:
                     pass
-                if hasattr(base_s, 'number'):
-                    if not hasattr(base_s, '_base_number'):
-                        try:
-                            base_s._base_number = int(base_s.number)
-                        except Exception:
-                            base_s._base_number = getattr(base_s, 'number', 1)
-                    try:
-                        base_s._base_number = int(base_s._base_number) + 1
-                        base_s._effective_number = max(1, int(base_s._base_number))
-                        applied += 1
-                    except Exception:
-                        pass
-                if hasattr(base_s, 'consumingNumber'):
-                    if not hasattr(base_s, '_base_consumingNumber'):
-                        try:
-                            base_s._base_consumingNumber = int(base_s.consumingNumber)
-                        except Exception:
-                            base_s._base_consumingNumber = getattr(base_s, 'consumingNumber', 1)
-                    try:
-                        base_s._base_consumingNumber = int(base_s._base_consumingNumber) + 1
-                        base_val = max(1, int(base_s._base_consumingNumber))
-                        base_s.consumingNumber = base_val
-                        try:
-                            if s is not base_s and hasattr(s, 'consumingNumber'):
-                                s.consumingNumber = base_val
-                        except Exception:
-                            pass
-                        applied += 1
-                    except Exception:
-                        pass
+                applied += 1
+            except Exception:
+                pass
 
     if applied > 0:
+        mark_views_dirty = getattr(gm, 'mark_views_dirty', None)
+        if mark_views_dirty is not None:
+            mark_views_dirty()
         try:
             delta = 1
             for conv in getattr(gm, 'conveyors', []):
                 try:
                     for item in conv.queue:
                         try:
-                            item['value'] = int(item.get('value', 0)) + delta
+                            item.value = int(item.value) + delta
                         except Exception:
                             pass
                 except Exception:
@@ -0,0 +1,80 @@
+"""Background autosave writer.
+
+Autosave is split in two so it never stalls a frame or a simulation tick:
+
+1. :func:`gm.persistence.capture_save` builds a plain dict of the world on
+   the thread that owns it (the autosave timer fires on ``gm.timers``, i.e.
+   on the simulation thread). This only copies a few attributes per
+   structure and belt.
+2. :class:`AutosaveWriter` encodes that dict and writes it with
+   :func:`map.save_format.write_save` (temp file, fsync, atomic rename,
+   rotating backups) on its own thread.
+
+Only the newest pending snapshot is kept: if a write is still running when
+the next autosave fires, the older queued snapshot is replaced instead of
+piling up.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from settings import AUTOSAVE_BACKUPS, SAVE_COMPRESS
+from map.save_format import write_save
+
+
+class AutosaveWriter(threading.Thread):
+    """Worker thread that writes submitted save snapshots to disk.
+
+    Args:
+        backups: Number of rotating backups kept next to the save file.
+        compress: Whether to zlib-compress the written saves.
+    """
+
+    def __init__(self, backups: int = AUTOSAVE_BACKUPS, compress: bool = SAVE_COMPRESS):
+        super().__init__(name="autosave", daemon=True)
+        self.backups = int(backups)
+        self.compress = bool(compress)
+        self.writes = 0
+        self._pending: Optional[Tuple[str, Dict]] = None
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopping = False
+
+    def submit(self, filepath, data: Dict) -> None:
+        """Queue ``data`` to be written to ``filepath``, replacing any queued snapshot."""
+        with self._cond:
+            self._pending = (str(filepath), data)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is queued or being written. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write whatever is queued, then finish the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._stopping)
+                if self._pending is None:
+                    return
+                filepath, data = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                write_save(filepath, data, compress=self.compress, backups=self.backups)
+                self.writes += 1
+                print(f"Autosave written to {filepath}")
+            except Exception as e:
+                print(f"Autosave failed: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
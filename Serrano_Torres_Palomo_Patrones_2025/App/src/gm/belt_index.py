@@ -0,0 +1,125 @@
+"""Uniform-grid spatial index of conveyor segments.
+
+Destroy mode used to project every click onto every belt. Each belt is now
+registered in the grid buckets covered by its bounding box (padded by the
+pick threshold), so a point query only tests the few belts stored in one
+bucket and a rectangle query only visits the buckets it overlaps.
+
+Queries return belts in build order, so a click on overlapping belts picks
+the same one as the old linear scan over ``gm.conveyors``.
+"""
+
+from typing import Dict, List, Tuple
+
+from settings import CELL_SIZE_PX
+
+PICK_THRESHOLD = 20
+
+
+def near_segment(px, py, ax, ay, bx, by, threshold=PICK_THRESHOLD):
+    """True if ``(px, py)`` projects inside segment ``a-b`` within ``threshold`` px.
+
+    Same rule as ``DestroyState._point_near_line``: points beyond either end
+    and zero-length belts never match.
+    """
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return False
+    t = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    if t < 0.0 or t > 1.0:
+        return False
+    cx = ax + t * dx
+    cy = ay + t * dy
+    return (px - cx) ** 2 + (py - cy) ** 2 <= threshold * threshold
+
+
+class BeltSpatialIndex:
+    """Grid buckets of belts keyed by ``(bx, by)`` bucket coordinates.
+
+    Args:
+        bucket_px: Bucket size in world pixels (one map cell by default).
+        pad: Extra pixels added around each segment's bounding box; must be
+            at least the largest threshold used with :meth:`at_point`.
+    """
+
+    def __init__(self, bucket_px: int = CELL_SIZE_PX, pad: float = PICK_THRESHOLD):
+        self.bucket_px = int(bucket_px)
+        self.pad = float(pad)
+        self._buckets: Dict[Tuple[int, int], List] = {}
+        self._entries: Dict[int, Tuple[int, Tuple[float, float, float, float], Tuple[Tuple[int, int], ...]]] = {}
+        self._seq = 0
+
+    def _bucket_range(self, x0, y0, x1, y1):
+        b = self.bucket_px
+        for by in range(int(y0 // b), int(y1 // b) + 1):
+            for bx in range(int(x0 // b), int(x1 // b) + 1):
+                yield (bx, by)
+
+    def add(self, conv) -> None:
+        if id(conv) in self._entries:
+            self.remove(conv)
+        ax, ay = float(conv.start_pos.x), float(conv.start_pos.y)
+        bx, by = float(conv.end_pos.x), float(conv.end_pos.y)
+        seg = (ax, ay, bx, by)
+        keys = tuple(self._bucket_range(min(ax, bx) - self.pad, min(ay, by) - self.pad,
+                                        max(ax, bx) + self.pad, max(ay, by) + self.pad))
+        for key in keys:
+            self._buckets.setdefault(key, []).append(conv)
+        self._entries[id(conv)] = (self._seq, seg, keys)
+        self._seq += 1
+
+    def remove(self, conv) -> None:
+        entry = self._entries.pop(id(conv), None)
+        if entry is None:
+            return
+        for key in entry[2]:
+            bucket = self._buckets.get(key)
+            if bucket and conv in bucket:
+                bucket.remove(conv)
+                if not bucket:
+                    del self._buckets[key]
+
+    def rebuild(self, conveyors) -> None:
+        self._buckets.clear()
+        self._entries.clear()
+        self._seq = 0
+        for conv in conveyors:
+            self.add(conv)
+
+    def at_point(self, x: float, y: float, threshold: float = PICK_THRESHOLD):
+        """Return the first-built belt within ``threshold`` px of ``(x, y)``, or None."""
+        key = (int(x // self.bucket_px), int(y // self.bucket_px))
+        best = None
+        best_seq = None
+        for conv in tuple(self._buckets.get(key, ())):
+            entry = self._entries.get(id(conv))
+            if entry is None:
+                continue
+            seq, seg, _ = entry
+            if best_seq is not None and seq > best_seq:
+                continue
+            if near_segment(x, y, *seg, threshold=threshold):
+                best, best_seq = conv, seq
+        return best
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> List:
+        """Belts whose bounding box overlaps the world rectangle, in build order."""
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        found = {}
+        for key in self._bucket_range(x0, y0, x1, y1):
+            for conv in tuple(self._buckets.get(key, ())):
+                entry = self._entries.get(id(conv))
+                if entry is None or id(conv) in found:
+                    continue
+                ax, ay, bx, by = entry[1]
+                if max(ax, bx) >= x0 and min(ax, bx) <= x1 and max(ay, by) >= y0 and min(ay, by) <= y1:
+                    found[id(conv)] = (entry[0], conv)
+        return [conv for _, conv in sorted(found.values(), key=lambda item: item[0])]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,221 @@
+"""Incremental belt connection graph.
+
+``GameManager._reconnect_structures`` used to clear every structure, match
+every conveyor against every structure cell and every other conveyor
+(O(C²)) after each build. :class:`ConnectionGraph` keeps an endpoint index
+instead::
+
+    outgoing[(gx, gy)] -> conveyors that start in that cell
+    incoming[(gx, gy)] -> conveyors that end in that cell
+
+Adding or removing a belt only rewires the two cells it touches; placing or
+removing a structure rewires its own cell. Each list keeps insertion order,
+which matches the order of ``gm.conveyors``, so the first/second input of
+a module is the same one the full rebuild would pick.
+
+All mutations run on the simulation thread (they are posted there by the
+build/destroy states), like the rest of the world updates.
+"""
+
+from typing import Dict, List, Tuple
+
+from settings import CELL_SIZE_PX
+
+# atributos de conexión que se limpian antes de recablear una estructura
+_CONNECTION_ATTRS = (
+    'input1', 'input2', 'inputConveyor1', 'inputConveyor2', 'inputConveyor',
+    'inConveyor1', 'inConveyor2',
+    'output', 'outputConveyor', 'outputConveyor1', 'outputConveyor2', 'outConveyor',
+)
+
+
+def conveyor_cells(conv) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Grid cells of the start and end of ``conv``."""
+    start = getattr(conv, 'start_cell', None)
+    end = getattr(conv, 'end_cell', None)
+    if start is None or end is None:
+        start = (int(conv.start_pos.x) // CELL_SIZE_PX, int(conv.start_pos.y) // CELL_SIZE_PX)
+        end = (int(conv.end_pos.x) // CELL_SIZE_PX, int(conv.end_pos.y) // CELL_SIZE_PX)
+    return start, end
+
+
+def clear_connections(struct) -> None:
+    for attr in _CONNECTION_ATTRS:
+        if hasattr(struct, attr):
+            try:
+                setattr(struct, attr, None)
+            except Exception:
+                pass
+    # puertos adicionales de splitters/mergers de N vías
+    for attr in ('extra_inputs', 'extra_outputs'):
+        if hasattr(struct, attr):
+            setattr(struct, attr, [])
+
+
+def connect_structure(struct, inputs, outputs) -> None:
+    """Wire ``struct`` to its incoming/outgoing belts according to its type."""
+    struct_type = struct.__class__.__name__.lower()
+
+    # MINAS: solo output
+    if 'mine' in struct_type:
+        if outputs and hasattr(struct, 'connectOutput'):
+            struct.connectOutput(outputs[0])
+
+    # POZOS (WELLS): solo input
+    elif 'well' in struct_type:
+        if inputs and hasattr(struct, 'connectInput'):
+            struct.connectInput(inputs[0])
+
+    # OPERADORES y MERGER: 2 inputs (el merger acepta más), 1 output
+    elif any(x in struct_type for x in ['sum', 'mul', 'div', 'operation', 'merger']):
+        if len(inputs) >= 1 and hasattr(struct, 'connectInput1'):
+            struct.connectInput1(inputs[0])
+        if len(inputs) >= 2 and hasattr(struct, 'connectInput2'):
+            struct.connectInput2(inputs[1])
+        if hasattr(struct, 'connectExtraInput'):
+            for conv in inputs[2:]:
+                struct.connectExtraInput(conv)
+        if outputs and hasattr(struct, 'connectOutput'):
+            struct.connectOutput(outputs[0])
+
+    # SPLITTER: 1 input, 2 outputs
+    elif 'splitter' in struct_type:
+        if inputs and hasattr(struct, 'connectInput'):
+            struct.connectInput(inputs[0])
+        if len(outputs) >= 1 and hasattr(struct, 'connectOutput1'):
+            struct.connectOutput1(outputs[0])
+        if len(outputs) >= 2 and hasattr(struct, 'connectOutput2'):
+            struct.connectOutput2(outputs[1])
+        if hasattr(struct, 'connectExtraOutput'):
+            for conv in outputs[2:]:
+                struct.connectExtraOutput(conv)
+
+
+class ConnectionGraph:
+    """Endpoint index of the belts plus incremental rewiring helpers.
+
+    Args:
+        gm: GameManager-like object exposing ``map`` and ``conveyors``.
+    """
+
+    def __init__(self, gm):
+        self.gm = gm
+        self.outgoing: Dict[Tuple[int, int], List] = {}
+        self.incoming: Dict[Tuple[int, int], List] = {}
+        self._cells: Dict[int, Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+
+    # --- índice ---
+    def _index(self, conv) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        start, end = conveyor_cells(conv)
+        self._cells[id(conv)] = (start, end)
+        self.outgoing.setdefault(start, []).append(conv)
+        self.incoming.setdefault(end, []).append(conv)
+        return start, end
+
+    def _unindex(self, conv):
+        cells = self._cells.pop(id(conv), None)
+        if cells is None:
+            return None
+        start, end = cells
+        for index, cell in ((self.outgoing, start), (self.incoming, end)):
+            bucket = index.get(cell)
+            if bucket and conv in bucket:
+                bucket.remove(conv)
+                if not bucket:
+                    del index[cell]
+        return cells
+
+    def _structure_at(self, cell):
+        map_obj = getattr(self.gm, 'map', None)
+        if map_obj is None:
+            return None
+        registry = getattr(map_obj, 'registry', None)
+        if registry is not None:
+            return registry.at(*cell)
+        c = map_obj.getCell(*cell)
+        return c.getStructure() if c else None
+
+    # --- recableado ---
+    def rewire_cell(self, cell) -> None:
+        """Recompute the connections of whatever sits in ``cell``.
+
+        With a structure, the structure is cleared and connected to the belts
+        indexed at that cell. Without one, every belt ending there feeds the
+        last belt that starts there (same winner as the old O(C²) loop).
+        """
+        inputs = self.incoming.get(cell, [])
+        outputs = self.outgoing.get(cell, [])
+        struct = self._structure_at(cell)
+        if struct is not None:
+            clear_connections(struct)
+            connect_structure(struct, inputs, outputs)
+            return
+
+        for conv in inputs:
+            target = None
+            for other in outputs:
+                if other is not conv:
+                    target = other
+            if target is not None:
+                conv.connectOutput(target)
+            elif getattr(conv, 'outputConveyor', None) is not None:
+                # la cinta de destino ya no existe (o había un pozo aquí)
+                conv.outputConveyor = None
+
+    def add_conveyor(self, conv) -> None:
+        """Index a new belt and rewire only its two endpoint cells."""
+        start, end = self._index(conv)
+        self.rewire_cell(start)
+        if end != start:
+            self.rewire_cell(end)
+
+    def remove_conveyor(self, conv) -> None:
+        """Drop a belt from the index and rewire the cells it touched."""
+        cells = self._unindex(conv)
+        if cells is None:
+            return
+        start, end = cells
+        self.rewire_cell(start)
+        if end != start:
+            self.rewire_cell(end)
+
+    def apply_batch(self, added=(), removed=(), cells=()) -> int:
+        """Index and drop many belts, then rewire every touched cell once.
+
+        ``cells`` are extra cells whose structure changed. Returns the number
+        of cells rewired.
+        """
+        dirty = {(int(x), int(y)) for x, y in cells}
+        for conv in removed:
+            touched = self._unindex(conv)
+            if touched is not None:
+                dirty.update(touched)
+        for conv in added:
+            dirty.update(self._index(conv))
+        for cell in sorted(dirty):
+            self.rewire_cell(cell)
+        return len(dirty)
+
+    def rebuild(self, conveyors=None) -> None:
+        """Full rebuild in O(C + S): re-index every belt and rewire every cell."""
+        if conveyors is None:
+            conveyors = getattr(self.gm, 'conveyors', [])
+        self.outgoing.clear()
+        self.incoming.clear()
+        self._cells.clear()
+
+        map_obj = getattr(self.gm, 'map', None)
+        if map_obj is not None and hasattr(map_obj, 'iter_structures'):
+            for _, struct in map_obj.iter_structures():
+                clear_connections(struct)
+
+        for conv in conveyors:
+            self._index(conv)
+        for cell in set(self.outgoing) | set(self.incoming):
+            self.rewire_cell(cell)
+
+    def incoming_at(self, cell) -> Tuple:
+        return tuple(self.incoming.get(cell, ()))
+
+    def outgoing_at(self, cell) -> Tuple:
+        return tuple(self.outgoing.get(cell, ()))
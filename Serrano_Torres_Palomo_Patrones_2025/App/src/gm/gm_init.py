@@ -1,9 +1,12 @@
 import pygame as pg
 import pathlib
 import os
+import random
 from collections import deque
 from settings import *
 from utils.app_paths import APP_DIR
+from .render_governor import RenderGovernor
+from .timer_wheel import TimerWheel
 
 
 def init_pygame(gm):
@@ -50,6 +53,11 @@ def init_ui(gm):
     gm.eff_button_rect = pg.Rect(WIDTH - btn_width - right_margin, top_margin + v_spacing * 2, btn_width, 40)
     gm.new_mine_button_rect = pg.Rect(WIDTH - btn_width - right_margin, top_margin + v_spacing * 3, btn_width, 40)
 
+    # Governor de presupuesto de frame y overlay de depuración (F3)
+    gm.render_governor = RenderGovernor()
+    gm.render_tier = gm.render_governor.tier
+    gm.show_render_debug = False
+
 def init_counters(gm):
     """Initialize counters, cost tables and the action buffer on the GameManager.
 
@@ -78,7 +86,19 @@ def init_counters(gm):
         'conveyor': 2,
     }
 
+    # RNG de la simulación (colocación de minas); semilla fija con RNG_SEED
+    gm.rng = random.Random(RNG_SEED)
+
     gm.action_buffer = deque()
+    # acciones encoladas en el hilo de simulación que aún no llegaron al buffer
+    gm._posted_actions = []
+    # acciones fallidas a la espera de su reintento en gm.timers
+    gm.deferred_actions = []
+
+    # Ruedas de temporizadores: mundo (paso de simulación) e interfaz (frame)
+    gm.timers = TimerWheel(SIMULATION_TICK_MS)
+    gm.ui_timers = TimerWheel(1000 / FPS)
+    gm._mine_timers = {}
     # Optional explicit ordering of GIFs to show on a new game. Each entry is
     # (filename, title). If empty, HUD enumerates Assets/gifs alphabetically.
     gm.gifs_order = (
@@ -1,10 +1,16 @@
-import json
 import os
+import time
 from pathlib import Path
 from typing import Dict, Optional
 
-from settings import CELL_SIZE_PX
+from settings import (AUTOSAVE_BACKUPS, SAVE_COMPRESS, SAVE_SIM_STATE, STREAM_SYNC_RADIUS,
+                      CELL_SIZE_PX, WIDTH, HEIGHT)
 from map.map import Map
+from map.save_format import ChunkedSave, is_chunked, read_save, write_save
+from map.registry import unwrap
+from gm.connection_graph import conveyor_cells
+from gm.sim_state import capture_state, cell_states, restore_state
+from gm.stream_loader import StreamLoader
 
 
 """Persistence helpers to load and save game state.
@@ -14,17 +20,203 @@ This module provides two convenience functions, :func:`load_game` and
 functions expect ``gm.save_file`` and ``gm.save_dir`` to be set (see
 ``gm_init.init_paths``).
 
-The saved JSON format is conservative: the map grid stores structure class
-names and a few base attributes (``number``, ``consumingNumber``). Conveyors
-are stored separately with grid start/end coordinates and an optional
-``travel_time`` value. The functions attempt to restore upgrade counters and
-apply their effects where possible.
+The save format is described in :mod:`map.save_format`: a sparse list of
+structures (class name and a few base attributes such as ``number`` and
+``consumingNumber``) and conveyors whose endpoints refer to those structures,
+with an optional ``travel_time`` value. The functions attempt to restore
+upgrade counters and apply their effects where possible.
 """
 
 
+def _apply_efficiency(s, eff_used: int) -> None:
+    """Apply ``eff_used`` efficiency upgrades to one freshly loaded structure."""
+    base_s = unwrap(s)
+    if hasattr(base_s, 'number'):
+        if not hasattr(base_s, '_base_number'):
+            try:
+                base_s._base_number = int(base_s.number)
+            except Exception:
+                base_s._base_number = getattr(base_s, 'number', 1)
+        try:
+            base_s._eff_number_increase = int(eff_used)
+        except Exception:
+            base_s._eff_number_increase = getattr(base_s, '_eff_number_increase', 0)
+        base_s._effective_number = max(1, int(base_s._base_number + getattr(base_s, '_eff_number_increase', 0)))
+    if hasattr(base_s, 'consumingNumber'):
+        if not hasattr(base_s, '_base_consumingNumber'):
+            try:
+                base_s._base_consumingNumber = int(base_s.consumingNumber)
+            except Exception:
+                base_s._base_consumingNumber = getattr(base_s, 'consumingNumber', 1)
+        try:
+            base_s._eff_consuming_increase = int(eff_used)
+        except Exception:
+            base_s._eff_consuming_increase = getattr(base_s, '_eff_consuming_increase', 0)
+        base_val = max(1, int(base_s._base_consumingNumber + getattr(base_s, '_eff_consuming_increase', 0)))
+        base_s.consumingNumber = base_val
+        try:
+            if s is not base_s and hasattr(s, 'consumingNumber'):
+                s.consumingNumber = base_val
+        except Exception:
+            pass
+
+
+def _apply_speed(gm, conveyors) -> None:
+    """Apply the saved speed upgrades to the loaded belts and production interval."""
+    multiplier = 0.9 ** gm.speed_uses_used
+    for conv in conveyors:
+        base_conv = conv
+        while hasattr(base_conv, 'target'):
+            base_conv = base_conv.target
+        if not hasattr(base_conv, '_base_travel_time'):
+            base_conv._base_travel_time = getattr(base_conv, 'travel_time', 2000)
+        base_conv.travel_time = max(50, int(base_conv._base_travel_time * multiplier))
+    try:
+        if not hasattr(gm, '_base_production_interval'):
+            gm._base_production_interval = 2000
+        gm.production_interval = max(100, int(gm._base_production_interval * multiplier))
+    except Exception:
+        pass
+
+
+def _restore_upgrades(gm, saved: Dict) -> None:
+    """Restore ``score`` and upgrade counters from a parsed save."""
+    try:
+        gm.points = int(saved.get('score', getattr(gm, 'points', 0)))
+    except Exception:
+        gm.points = int(getattr(gm, 'points', 0) or 0)
+
+    upgrades = saved.get('upgrades', {})
+    gm.speed_uses_used = int(upgrades.get('speed_uses_used', 0))
+    gm.eff_uses_used = int(upgrades.get('eff_uses_used', 0))
+    try:
+        gm.mine_uses_used = int(upgrades.get('mine_uses_used', 0))
+        gm.mine_uses_left = None
+    except Exception:
+        pass
+    gm.speed_uses_left = max(0, 10 - gm.speed_uses_used)
+    gm.eff_uses_left = max(0, 10 - gm.eff_uses_used)
+
+
+def _efficiency_hook(gm):
+    """``on_place`` callback applying the restored efficiency upgrades, or None."""
+    eff_used = int(getattr(gm, 'eff_uses_used', 0) or 0)
+    if eff_used <= 0:
+        return None
+
+    def on_place(s):
+        try:
+            _apply_efficiency(s, eff_used)
+        except Exception:
+            pass
+    return on_place
+
+
+def _build_world(gm, saved: Dict, creators: Dict[str, object], phase=None) -> None:
+    """Create structures, belts and connections from a parsed save.
+
+    Upgrade counters must already be restored on ``gm``: efficiency upgrades
+    are applied to each structure as it is placed and speed upgrades to the
+    belts. ``phase(name)`` is called after each step (load timings).
+    """
+    phase = phase or (lambda name: None)
+    gm.map = Map.from_dict(saved, creators=creators, gameManager=gm, on_place=_efficiency_hook(gm))
+    phase('structures')
+
+    gm.conveyors = Map.build_conveyors(saved, gm)
+    if getattr(gm, 'speed_uses_used', 0) > 0:
+        try:
+            _apply_speed(gm, gm.conveyors)
+        except Exception:
+            pass
+    phase('belts')
+
+    if hasattr(gm, '_reconnect_structures'):
+        gm._reconnect_structures()
+    if hasattr(gm, '_collect_structures'):
+        gm._collect_structures()
+    phase('connect')
+
+
+def rebuild_world(gm, saved: Dict, creators: Dict[str, object]) -> None:
+    """Replace the current map contents and belts with those of ``saved``.
+
+    Used to roll back to a checkpoint whose layout differs from the live
+    one. Every placed structure is removed from the (singleton) map and the
+    production timers of the old mines are cancelled before rebuilding.
+    """
+    for (x, y), _ in tuple(gm.map.iter_structures()):
+        gm.map.removeStructure(x, y)
+    for timer in tuple(getattr(gm, '_mine_timers', {}).values()):
+        try:
+            timer.cancel()
+        except Exception:
+            pass
+    gm._mine_timers = {}
+    _build_world(gm, saved, creators)
+
+
+def _restore_sim_state(gm, saved: Dict, phase) -> None:
+    # estado dinámico (ítems en cintas, fases, RNG) si el guardado lo trae
+    if saved.get('state'):
+        try:
+            restore_state(gm, saved['state'])
+        except Exception as e:
+            print("Could not restore simulation state:", e)
+        phase('state')
+
+
+def _camera_chunk(gm, chunk_size: int):
+    """Chunk under the centre of the screen (the map origin without a camera)."""
+    camera = getattr(gm, 'camera', None)
+    x = (camera.x if camera is not None else 0) + WIDTH / 2
+    y = (camera.y if camera is not None else 0) + HEIGHT / 2
+    return int(x // CELL_SIZE_PX) // chunk_size, int(y // CELL_SIZE_PX) // chunk_size
+
+
+def _load_streamed(gm, creators: Dict[str, object], phase) -> None:
+    """Load a chunk-streamed save: near chunks now, the rest via :class:`StreamLoader`."""
+    save = ChunkedSave.open(gm.save_file)
+    try:
+        saved = save.meta
+        try:
+            _restore_upgrades(gm, saved)
+        except Exception:
+            pass
+        center = _camera_chunk(gm, save.chunk_size)
+        keys = save.keys_by_distance(center)
+        near = [k for k in keys
+                if max(abs(k[0] - center[0]), abs(k[1] - center[1])) <= STREAM_SYNC_RADIUS]
+        saved['cells'] = [entry for key in near for entry in save.read_chunk(key)]
+        saved['conveyors'] = save.read_conveyors()
+        phase('parse')
+
+        _build_world(gm, saved, creators, phase)
+        _restore_sim_state(gm, saved, phase)
+    except Exception:
+        save.close()
+        raise
+
+    far = keys[len(near):]
+    if not far:
+        save.close()
+        return
+    # las celdas de los chunks pendientes no están libres hasta que lleguen
+    gm.map.free_cells.reserve(far, save.chunk_size)
+    gm.stream_loader = StreamLoader(gm, save, far, creators, on_place=_efficiency_hook(gm),
+                                    cells=cell_states(saved.get('state')))
+    gm.stream_loader.start()
+
+
 def load_game(gm, creators: Dict[str, object]) -> bool:
     """Load map and upgrades into the provided GameManager-like object.
 
+    The file is read and parsed once. Structures are created with their
+    efficiency upgrades applied as they are placed, belts with their speed
+    upgrades, and then the connection graph and belt index are built once
+    (``gm._reconnect_structures``). The time spent in each phase, in
+    milliseconds, is stored in ``gm.load_timings``.
+
     Args:
         gm: GameManager-like instance where the loaded data will be applied.
         creators: Mapping from structure class name (str) to a creator object
@@ -35,208 +227,146 @@ def load_game(gm, creators: Dict[str, object]) -> bool:
         True on success, False on failure. On success the following side
         effects occur on ``gm``:
         - ``gm.map`` is set to a restored :class:`map.map.Map` instance.
-        - ``gm.conveyors`` is set when conveyors are present and a
-          ``gameManager``/``gm`` is supplied to the Map loader.
+        - ``gm.conveyors`` is set to the restored conveyors.
         - Upgrade counters (``speed_uses_used``, ``eff_uses_used``,
           ``mine_uses_used``) and ``gm.points`` are restored when present
           in the save file.
+        - Connections, ``gm.structures`` and ``gm.wells`` are ready, so the
+          caller does not need to reconnect again.
+        - When the save holds a simulation-state snapshot (see
+          :mod:`gm.sim_state`) the belt items, buffers, router and timer
+          phases, RNG and tick are restored too.
+        - For a chunk-streamed save (see :mod:`map.save_format`) only the
+          chunks around the camera are placed before returning;
+          ``gm.stream_loader`` places the rest over the next ticks.
     """
     try:
         if not getattr(gm, 'save_file', None) or not gm.save_file.exists():
             return False
-        # load map using existing Map loader
-        gm.map = Map.load_from_file(str(gm.save_file), creators=creators, gameManager=gm)
+        timings = {}
+        clock = time.perf_counter()
 
-        # restore upgrades & points
-        try:
-            with open(gm.save_file, 'r', encoding='utf-8') as fh:
-                saved = json.load(fh)
-                try:
-                    gm.points = int(saved.get('score', getattr(gm, 'points', 0)))
-                except Exception:
-                    gm.points = int(getattr(gm, 'points', 0) or 0)
-
-                upgrades = saved.get('upgrades', {})
-                speed_used = int(upgrades.get('speed_uses_used', 0))
-                eff_used = int(upgrades.get('eff_uses_used', 0))
-                mine_used = int(upgrades.get('mine_uses_used', 0))
-
-                gm.speed_uses_used = speed_used
-                gm.eff_uses_used = eff_used
-                try:
-                    gm.mine_uses_used = mine_used
-                    gm.mine_uses_left = None
-                except Exception:
-                    pass
-                gm.speed_uses_left = max(0, 10 - gm.speed_uses_used)
-                gm.eff_uses_left = max(0, 10 - gm.eff_uses_used)
-        except Exception:
-            pass
+        def phase(name):
+            nonlocal clock
+            now = time.perf_counter()
+            timings[name] = (now - clock) * 1000.0
+            clock = now
 
-        # Apply speed/effect upgrades to conveyors and structures if needed
-        try:
-            if getattr(gm, 'speed_uses_used', 0) > 0:
-                multiplier = 0.9 ** gm.speed_uses_used
-                for conv in getattr(gm, 'conveyors', []):
-                    base_conv = conv
-                    while hasattr(base_conv, 'target'):
-                        base_conv = base_conv.target
-                    if not hasattr(base_conv, '_base_travel_time'):
-                        base_conv._base_travel_time = getattr(base_conv, 'travel_time', 2000)
-                    base_conv.travel_time = max(50, int(base_conv._base_travel_time * multiplier))
-                try:
-                    if not hasattr(gm, '_base_production_interval'):
-                        gm._base_production_interval = 2000
-                    gm.production_interval = max(100, int(gm._base_production_interval * multiplier))
-                except Exception:
-                    pass
-        except Exception:
-            pass
+        streamed = False
+        if is_chunked(gm.save_file):
+            try:
+                _load_streamed(gm, creators, phase)
+                streamed = True
+            except Exception as e:
+                print("Could not stream chunked save, reading it whole:", e)
+        if not streamed:
+            saved = read_save(gm.save_file, backups=AUTOSAVE_BACKUPS)
+            try:
+                _restore_upgrades(gm, saved)
+            except Exception:
+                pass
+            phase('parse')
 
+            _build_world(gm, saved, creators, phase)
+            _restore_sim_state(gm, saved, phase)
+
+        timings['total'] = sum(timings.values())
+        gm.load_timings = timings
         try:
-            if getattr(gm, 'eff_uses_used', 0) > 0:
-                eff_used = gm.eff_uses_used
-                for row in gm.map.cells:
-                    for cell in row:
-                        if cell and not cell.isEmpty():
-                            s = cell.structure
-                            base_s = s
-                            try:
-                                while hasattr(base_s, 'target'):
-                                    base_s = base_s.target
-                            except Exception:
-                                pass
-                            if hasattr(base_s, 'number'):
-                                if not hasattr(base_s, '_base_number'):
-                                    try:
-                                        base_s._base_number = int(base_s.number)
-                                    except Exception:
-                                        base_s._base_number = getattr(base_s, 'number', 1)
-                                try:
-                                    base_s._eff_number_increase = int(eff_used)
-                                except Exception:
-                                    base_s._eff_number_increase = getattr(base_s, '_eff_number_increase', 0)
-                                base_s._effective_number = max(1, int(base_s._base_number + getattr(base_s, '_eff_number_increase', 0)))
-                            if hasattr(base_s, 'consumingNumber'):
-                                if not hasattr(base_s, '_base_consumingNumber'):
-                                    try:
-                                        base_s._base_consumingNumber = int(base_s.consumingNumber)
-                                    except Exception:
-                                        base_s._base_consumingNumber = getattr(base_s, 'consumingNumber', 1)
-                                try:
-                                    base_s._eff_consuming_increase = int(eff_used)
-                                except Exception:
-                                    base_s._eff_consuming_increase = getattr(base_s, '_eff_consuming_increase', 0)
-                                base_val = max(1, int(base_s._base_consumingNumber + getattr(base_s, '_eff_consuming_increase', 0)))
-                                base_s.consumingNumber = base_val
-                                try:
-                                    if s is not base_s and hasattr(s, 'consumingNumber'):
-                                        s.consumingNumber = base_val
-                                except Exception:
-                                    pass
+            print("Load timings (ms): " + ", ".join(f"{k}={v:.1f}" for k, v in timings.items()))
         except Exception:
             pass
-
         return True
     except Exception:
         return False
 
 
-def save_game(gm):
-    """Save the map, conveyors and upgrade info to gm.save_file (like original GameManager.save_map)."""
-    try:
-        base = gm.map.to_dict()
-        # adjust grid entries with canonical/base attributes
+def _canonical_entry(s, entry: Dict) -> Dict:
+    """Replace upgraded numbers in a saved ``entry`` of ``s`` by their base values."""
+    if 'number' in entry and hasattr(s, '_base_number'):
         try:
-            grid = base.get('grid', [])
-            eff_used = int(getattr(gm, 'eff_uses_used', 0))
-            for y, row in enumerate(grid):
-                for x, entry in enumerate(row):
-                    if not entry:
-                        continue
-                    try:
-                        cell = gm.map.getCell(x, y)
-                        if cell and not cell.isEmpty():
-                            s = cell.structure
-                            if 'number' in entry and hasattr(s, '_base_number'):
-                                try:
-                                    entry['number'] = int(getattr(s, '_base_number'))
-                                except Exception:
-                                    entry['number'] = int(entry.get('number', 1))
-                            if 'consumingNumber' in entry and hasattr(s, '_base_consumingNumber'):
-                                try:
-                                    entry['consumingNumber'] = int(getattr(s, '_base_consumingNumber'))
-                                except Exception:
-                                    entry['consumingNumber'] = int(entry.get('consumingNumber', 1))
-                    except Exception:
-                        pass
+            entry['number'] = int(getattr(s, '_base_number'))
         except Exception:
-            pass
+            entry['number'] = int(entry.get('number', 1))
+    if 'consumingNumber' in entry and hasattr(s, '_base_consumingNumber'):
+        try:
+            entry['consumingNumber'] = int(getattr(s, '_base_consumingNumber'))
+        except Exception:
+            entry['consumingNumber'] = int(entry.get('consumingNumber', 1))
+    return entry
 
-        convs = []
-        for conv in getattr(gm, 'conveyors', []):
-            sx = sy = ex = ey = None
-            found = False
-            for y, row in enumerate(gm.map.cells):
-                for x, cell in enumerate(row):
-                    if not cell.isEmpty() and hasattr(cell.structure, 'position'):
-                        pos = cell.structure.position
-                        try:
-                            px, py = float(pos.x), float(pos.y)
-                        except Exception:
-                            px, py = float(pos[0]), float(pos[1])
-                        if int(px) == int(conv.start_pos.x) and int(py) == int(conv.start_pos.y):
-                            sx, sy = x, y
-                            found = True
-                            break
-                if found:
-                    break
-            if sx is None:
-                sx = int(conv.start_pos.x) // CELL_SIZE_PX
-            # Compute end coordinates similarly
-            found = False
-            for y, row in enumerate(gm.map.cells):
-                for x, cell in enumerate(row):
-                    if not cell.isEmpty() and hasattr(cell.structure, 'position'):
-                        pos = cell.structure.position
-                        try:
-                            px, py = float(pos.x), float(pos.y)
-                        except Exception:
-                            px, py = float(pos[0]), float(pos[1])
-                        if int(px) == int(conv.end_pos.x) and int(py) == int(conv.end_pos.y):
-                            ex, ey = x, y
-                            found = True
-                            break
-                if found:
-                    break
-            if ex is None:
-                ex = int(conv.end_pos.x) // CELL_SIZE_PX
-            if ey is None:
-                ey = int(conv.end_pos.y) // CELL_SIZE_PX
 
-            travel = getattr(conv, 'travel_time', None)
-            if hasattr(conv, '_base_travel_time'):
-                try:
-                    travel = int(getattr(conv, '_base_travel_time'))
-                except Exception:
-                    travel = getattr(conv, 'travel_time', None)
-            entry = {"start": [sx, sy], "end": [ex, ey], "travel_time": travel}
-            convs.append(entry)
-
-        base['conveyors'] = convs
-        base['upgrades'] = {
-            'speed_uses_used': getattr(gm, 'speed_uses_used', 0),
-            'eff_uses_used': getattr(gm, 'eff_uses_used', 0),
-            'mine_uses_used': getattr(gm, 'mine_uses_used', 0)
-        }
+def structure_entry(s) -> Dict:
+    """Saved entry of one placed structure, as :func:`capture_save` writes it."""
+    return _canonical_entry(s, Map._structure_entry(s))
+
+
+def conveyor_entry(conv) -> Dict:
+    """Saved entry of one belt, as :func:`capture_save` writes it."""
+    # celdas fijadas al crear la cinta: O(1) por cinta
+    (sx, sy), (ex, ey) = conveyor_cells(conv)
+
+    travel = getattr(conv, 'travel_time', None)
+    if hasattr(conv, '_base_travel_time'):
         try:
-            base['score'] = int(getattr(gm, 'points', 0))
+            travel = int(getattr(conv, '_base_travel_time'))
         except Exception:
-            base['score'] = getattr(gm, 'points', 0)
+            travel = getattr(conv, 'travel_time', None)
+    return {"start": [sx, sy], "end": [ex, ey], "travel_time": travel}
+
+
+def capture_save(gm, with_state: bool = SAVE_SIM_STATE) -> Dict:
+    """Build the save dict for ``gm`` without touching the disk.
+
+    Must run on the thread that owns the world; the result is plain data
+    that :func:`map.save_format.write_save` can encode on any thread. With
+    ``with_state`` the simulation-state snapshot is included under
+    ``"state"``. A chunk stream still in progress is completed first.
+    """
+    loader = getattr(gm, 'stream_loader', None)
+    if loader is not None and not loader.done:
+        loader.finish()
+    base = gm.map.to_dict()
+    # adjust grid entries with canonical/base attributes
+    try:
+        for x, y, entry in Map.iter_saved_entries(base):
+            try:
+                s = gm.map.registry.at(x, y)
+                if s is not None:
+                    _canonical_entry(s, entry)
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+    base['conveyors'] = [conveyor_entry(conv) for conv in getattr(gm, 'conveyors', [])]
+    base['upgrades'] = {
+        'speed_uses_used': getattr(gm, 'speed_uses_used', 0),
+        'eff_uses_used': getattr(gm, 'eff_uses_used', 0),
+        'mine_uses_used': getattr(gm, 'mine_uses_used', 0)
+    }
+    try:
+        base['score'] = int(getattr(gm, 'points', 0))
+    except Exception:
+        base['score'] = getattr(gm, 'points', 0)
+    if with_state:
+        try:
+            base['state'] = capture_state(gm)
+        except Exception as e:
+            print("Could not capture simulation state:", e)
+    return base
 
+
+def save_game(gm):
+    """Save the map, conveyors and upgrade info to gm.save_file (like original GameManager.save_map).
+
+    The file is replaced atomically and the previous save is kept among
+    ``AUTOSAVE_BACKUPS`` rotating backups.
+    """
+    try:
+        base = capture_save(gm)
         os.makedirs(gm.save_dir, exist_ok=True)
-        with open(gm.save_file, 'w', encoding='utf-8') as fh:
-            json.dump(base, fh, indent=2)
+        write_save(gm.save_file, base, compress=SAVE_COMPRESS, backups=AUTOSAVE_BACKUPS)
         try:
             print(f"Map (with conveyors) saved to {gm.save_file}")
         except Exception:
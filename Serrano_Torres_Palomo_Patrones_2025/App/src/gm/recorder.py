@@ -0,0 +1,133 @@
+"""Deterministic input recording.
+
+The simulation is deterministic given its starting state, the fixed tick
+(``SIMULATION_TICK_MS``), the seeded ``gm.rng`` and the player's input. An
+:class:`InputRecorder` stores exactly that:
+
+- the starting world (:func:`gm.persistence.capture_save` with the
+  simulation state, which includes ``gm.rng``), after reseeding ``gm.rng``
+  with the recording seed, plus the tutorial pause flag;
+- every input-derived command with the simulation tick it ran at. Builds,
+  destroys and upgrade actions all reach the world as commands posted to
+  the simulation thread, so the tick is the one whose step they precede::
+
+      [tick, "build", {"cls": "SumModule", "cell": [x, y]}]
+      [tick, "destroy", {"cell": [x, y]}]
+      [tick, "conveyor", {"start": [x, y], "end": [x, y]}]
+      [tick, "conveyor_destroy", {"index": i}]
+      [tick, "action", {"type": "speed" | "eff" | "mine"}]
+      [tick, "pause", {"paused": true | false}]   # tutorial modal opened/closed
+      [tick, "rewind", {"target": t}]
+      [tick, "restore", {"world": {...}}]   # checkpoint restored from the UI
+
+- a digest of the final world, so a replay (:mod:`gm.replay`) can check it
+  reproduced the session before its timings are compared.
+
+A recording is a JSON document written with a temporary file and an atomic
+rename, like the saves.
+"""
+
+import hashlib
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+from settings import SIMULATION_TICK_MS
+
+RECORDING_VERSION = 1
+
+
+def current_tick(gm) -> int:
+    """Simulation tick of ``gm`` (the worker's counter while it runs)."""
+    sim = getattr(gm, 'simulation', None)
+    if sim is not None:
+        return int(sim.tick)
+    return int(getattr(gm, 'resume_tick', 0))
+
+
+def world_digest(gm) -> str:
+    """SHA-1 of the full save of ``gm`` (layout and simulation state)."""
+    from .persistence import capture_save  # local import to avoid cycles
+
+    raw = json.dumps(capture_save(gm, with_state=True), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class InputRecorder:
+    """Log of the input commands applied to ``gm`` since :meth:`begin`.
+
+    Args:
+        gm: GameManager-like object holding the world state.
+        seed: Seed for ``gm.rng``; a random one when None.
+    """
+
+    def __init__(self, gm, seed: Optional[int] = None):
+        self.gm = gm
+        self.seed = int(seed) if seed is not None else random.SystemRandom().randrange(2 ** 32)
+        self.events: List[List[Any]] = []
+        self.initial: Optional[Dict] = None
+        self.start_tick = 0
+        self.active = False
+
+    def begin(self) -> None:
+        """Reseed ``gm.rng`` and capture the starting world (on the world thread).
+
+        Queued upgrade actions are stored with the world; actions waiting for
+        a retry are replayed as queued from the first tick.
+        """
+        from .persistence import capture_save  # local import to avoid cycles
+
+        gm = self.gm
+        rng = getattr(gm, 'rng', None)
+        if rng is not None:
+            rng.seed(self.seed)
+        self.initial = capture_save(gm, with_state=True)
+        pending = getattr(gm, 'pending_actions', None)
+        actions = pending() if pending is not None else tuple(getattr(gm, 'action_buffer', ()))
+        self.initial['actions'] = [dict(a) for a in actions]
+        self.initial['paused'] = bool(getattr(gm, '_tutorial_paused', False))
+        self.start_tick = current_tick(gm)
+        self.events = []
+        self.active = True
+
+    def record(self, kind: str, payload: Dict, tick: Optional[int] = None) -> None:
+        """Append one command; ``tick`` defaults to the current simulation tick."""
+        if not self.active:
+            return
+        self.events.append([current_tick(self.gm) if tick is None else int(tick), kind, payload])
+
+    def finish(self) -> Dict:
+        """Stop recording and return the recording (on the world thread)."""
+        self.active = False
+        return {
+            'v': RECORDING_VERSION,
+            'seed': self.seed,
+            'tick_ms': SIMULATION_TICK_MS,
+            'start_tick': self.start_tick,
+            'end_tick': current_tick(self.gm),
+            'start': self.initial or {},
+            'events': self.events,
+            'digest': world_digest(self.gm),
+        }
+
+
+def write_recording(filepath, recording: Dict) -> None:
+    """Write ``recording`` to ``filepath`` atomically."""
+    filepath = str(filepath)
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    tmp = f"{filepath}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(recording, fh, separators=(",", ":"))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, filepath)
+
+
+def read_recording(filepath) -> Dict:
+    with open(filepath, "r", encoding="utf-8") as fh:
+        recording = json.load(fh)
+    version = int(recording.get('v', 0))
+    if version != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version {version}")
+    return recording
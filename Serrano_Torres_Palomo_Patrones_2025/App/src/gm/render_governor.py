@@ -0,0 +1,98 @@
+"""Frame-budget governor for the renderer.
+
+:class:`RenderGovernor` times every :class:`gm.renderer.GMRenderer` pass
+and picks the render quality tier for the next frame. When a frame takes
+longer than the ``1000 / FPS`` budget the tier is raised one step, shedding
+work in a fixed order (see the ``RENDER_TIER_*`` constants in
+:mod:`settings`): first the per-item belt labels, then the coin/points
+overlay of wells, then hover effects. The tier is lowered again after a run
+of frames comfortably under budget. Only drawing is affected; the
+simulation always runs at full fidelity.
+"""
+
+import time
+
+from settings import FPS, RENDER_TIER_FULL, RENDER_TIER_NO_HOVER
+
+
+TIER_NAMES = {
+    0: "completo",
+    1: "sin etiquetas en cintas",
+    2: "sin puntos en pozos",
+    3: "sin hover",
+}
+
+
+class RenderGovernor:
+    """Measure render passes and choose a quality tier per frame.
+
+    Args:
+        budget_ms: Frame budget in milliseconds (defaults to ``1000 / FPS``).
+        max_tier: Highest tier the governor may select.
+        headroom: Fraction of the budget under which a frame counts as
+            "comfortable" for recovering quality.
+        recover_frames: Consecutive comfortable frames required before the
+            tier is lowered one step.
+    """
+
+    def __init__(self, budget_ms: float = 1000.0 / FPS, max_tier: int = RENDER_TIER_NO_HOVER,
+                 headroom: float = 0.6, recover_frames: int = 30):
+        self.budget_ms = float(budget_ms)
+        self.max_tier = int(max_tier)
+        self.headroom = float(headroom)
+        self.recover_frames = int(recover_frames)
+
+        self.tier = RENDER_TIER_FULL
+        self.pass_ms = {}
+        self.frame_ms = 0.0
+        self.last_decision = ""
+        self._under_budget = 0
+        self._frame_start = None
+
+    def begin_frame(self) -> int:
+        """Start timing a frame and return the tier to render it with."""
+        self.pass_ms = {}
+        self._frame_start = time.perf_counter()
+        return self.tier
+
+    def run_pass(self, name: str, fn, *args):
+        """Call ``fn(*args)`` and record its duration under ``name``."""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.pass_ms[name] = (time.perf_counter() - start) * 1000.0
+
+    def end_frame(self) -> int:
+        """Finish the frame, update the tier for the next one and return it."""
+        if self._frame_start is None:
+            return self.tier
+        self.frame_ms = (time.perf_counter() - self._frame_start) * 1000.0
+        self._frame_start = None
+
+        if self.frame_ms > self.budget_ms:
+            self._under_budget = 0
+            if self.tier < self.max_tier:
+                self.tier += 1
+                self.last_decision = f"{self.frame_ms:.1f} ms > {self.budget_ms:.1f} ms: sube a {self.tier}"
+        elif self.frame_ms < self.budget_ms * self.headroom:
+            self._under_budget += 1
+            if self.tier > RENDER_TIER_FULL and self._under_budget >= self.recover_frames:
+                self.tier -= 1
+                self._under_budget = 0
+                self.last_decision = f"{self.recover_frames} frames holgados: baja a {self.tier}"
+        else:
+            self._under_budget = 0
+        return self.tier
+
+    def debug_lines(self):
+        """Return the text lines shown by the debug overlay."""
+        lines = [
+            f"Calidad: {self.tier} ({TIER_NAMES.get(self.tier, '?')})",
+            f"Frame: {self.frame_ms:.1f} / {self.budget_ms:.1f} ms",
+        ]
+        for name, ms in self.pass_ms.items():
+            lines.append(f"  {name}: {ms:.2f} ms")
+        if self.last_decision:
+            lines.append(f"Decisión: {self.last_decision}")
+        return lines
@@ -1,5 +1,5 @@
 import pygame as pg
-from settings import CELL_SIZE_PX, HEIGHT
+from settings import CELL_SIZE_PX, HEIGHT, RENDER_TIER_NO_HOVER
 from ui.hud import Colors
 
 
@@ -12,6 +12,38 @@ class GMRenderer:
     def __init__(self, gm):
         self.gm = gm
         self.screen = gm.screen
+        # Cuando la simulación corre en su propio hilo se dibuja el último
+        # snapshot publicado en lugar del estado vivo.
+        self.snapshot = None
+        try:
+            sim = getattr(gm, 'simulation', None)
+            if sim is not None and sim.is_alive():
+                self.snapshot = sim.latest()
+        except Exception:
+            self.snapshot = None
+        self.governor = getattr(gm, 'render_governor', None)
+
+    def _structures(self):
+        return getattr(self.gm, 'structures', [])
+
+    def _belt_visible(self, conveyor, cam):
+        """True if the segment's bounding box (plus the item label margin) is on screen."""
+        sw, sh = self.screen.get_size()
+        m = CELL_SIZE_PX
+        a, b = conveyor.start_pos, conveyor.end_pos
+        return (min(a.x, b.x) - cam.x <= sw + m and max(a.x, b.x) - cam.x >= -m
+                and min(a.y, b.y) - cam.y <= sh + m and max(a.y, b.y) - cam.y >= -m)
+
+    @staticmethod
+    def _draw_view(view):
+        """Draw a structure from its snapshot state (:class:`gm.simulation.StructureView`)."""
+        try:
+            if view.number is not None:
+                view.structure.draw(view)
+            else:
+                view.structure.draw()
+        except Exception:
+            pass
 
     def _world_mouse_grid(self):
         cam = getattr(self.gm, 'camera', pg.Vector2(0, 0))
@@ -22,10 +54,22 @@ class GMRenderer:
         gy = world_my // CELL_SIZE_PX
         return screen_mouse, gx, gy, cam
 
+    def _visible_cells(self, cam, margin=0):
+        """Inclusive ``(x0, y0, x1, y1)`` range of map cells on screen, clamped to the map."""
+        sw, sh = self.screen.get_size()
+        m = self.gm.map
+        x0 = max(0, int(cam.x // CELL_SIZE_PX) - margin)
+        y0 = max(0, int(cam.y // CELL_SIZE_PX) - margin)
+        x1 = min(m.width - 1, int((cam.x + sw) // CELL_SIZE_PX) + margin)
+        y1 = min(m.height - 1, int((cam.y + sh) // CELL_SIZE_PX) + margin)
+        return x0, y0, x1, y1
+
     def draw_grid_background(self, cam):
         grid_color = Colors.GRID_LINE
-        for y in range(self.gm.map.height):
-            for x in range(self.gm.map.width):
+        # solo las celdas visibles: el coste no depende del tamaño del mapa
+        x0, y0, x1, y1 = self._visible_cells(cam)
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
                 rect_x = x * CELL_SIZE_PX - cam.x
                 rect_y = y * CELL_SIZE_PX - cam.y
                 rect = pg.Rect(rect_x, rect_y, CELL_SIZE_PX, CELL_SIZE_PX)
@@ -33,12 +77,22 @@ class GMRenderer:
 
     def draw_conveyors_first_pass(self):
         try:
-            for conveyor in getattr(self.gm, 'conveyors', []):
-                conveyor.draw()
+            if self.snapshot is not None:
+                # solo las cintas visibles expanden sus tramos en ítems
+                cam = getattr(self.gm, 'camera', pg.Vector2(0, 0))
+                for conveyor, runs in self.snapshot.belts:
+                    if self._belt_visible(conveyor, cam):
+                        conveyor.draw(runs)
+            else:
+                for conveyor in getattr(self.gm, 'conveyors', []):
+                    conveyor.draw()
         except Exception:
             pass
 
-        for structure in getattr(self.gm, 'structures', []):
+        if self.snapshot is not None:
+            # las cintas ya se dibujaron desde el snapshot
+            return
+        for structure in self._structures():
             if hasattr(structure, 'grid_position'):
                 continue
             if structure.__class__.__name__ == 'Conveyor':
@@ -50,32 +104,41 @@ class GMRenderer:
     def draw_structures_in_grid_with_hover(self, cam):
         screen_mouse, gx, gy, _ = self._world_mouse_grid()
         hover_fill = Colors.GRID_HOVER
+        show_hover = getattr(self.gm, 'render_tier', 0) < RENDER_TIER_NO_HOVER
 
-        for y in range(self.gm.map.height):
-            for x in range(self.gm.map.width):
-                rect_x = x * CELL_SIZE_PX - cam.x
-                rect_y = y * CELL_SIZE_PX - cam.y
-                rect = pg.Rect(rect_x, rect_y, CELL_SIZE_PX, CELL_SIZE_PX)
-
-                over_ui = False
-                try:
-                    if hasattr(self.gm, 'hud') and self.gm.hud:
-                        over_ui = self.gm.hud.is_over_button(screen_mouse)
-                except Exception:
-                    over_ui = False
-
-                if not over_ui and x == gx and y == gy and 0 <= x < self.gm.map.width and 0 <= y < self.gm.map.height:
-                    pg.draw.rect(self.screen, hover_fill, rect)
-
-                cell = self.gm.map.getCell(x, y)
-                if cell and not cell.isEmpty():
-                    try:
-                        cell.structure.draw()
-                    except Exception:
-                        pass
+        over_ui = False
+        try:
+            if hasattr(self.gm, 'hud') and self.gm.hud:
+                over_ui = self.gm.hud.is_over_button(screen_mouse)
+        except Exception:
+            over_ui = False
+
+        if show_hover and not over_ui and 0 <= gx < self.gm.map.width and 0 <= gy < self.gm.map.height:
+            rect = pg.Rect(gx * CELL_SIZE_PX - cam.x, gy * CELL_SIZE_PX - cam.y, CELL_SIZE_PX, CELL_SIZE_PX)
+            pg.draw.rect(self.screen, hover_fill, rect)
+
+        # estructuras de los chunks visibles (margen de 1 celda para sprites y etiquetas)
+        x0, y0, x1, y1 = self._visible_cells(cam, margin=1)
+        if self.snapshot is not None:
+            for view in sorted(self.snapshot.views_in_rect(x0, y0, x1, y1),
+                               key=lambda v: (v.cell[1], v.cell[0])):
+                self._draw_view(view)
+            return
+        for _, structure in sorted(self.gm.map.structures_in_rect(x0, y0, x1, y1),
+                                   key=lambda item: (item[0][1], item[0][0])):
+            try:
+                structure.draw()
+            except Exception:
+                pass
 
     def draw_structures_off_grid_third_pass(self):
-        for structure in getattr(self.gm, 'structures', []):
+        if self.snapshot is not None:
+            for views in self.snapshot.cells.values():
+                for view in views:
+                    if not hasattr(view.structure, 'grid_position') and view.kind != 'Conveyor':
+                        self._draw_view(view)
+            return
+        for structure in self._structures():
             if hasattr(structure, 'grid_position'):
                 continue
             if structure.__class__.__name__ != 'Conveyor':
@@ -105,15 +168,44 @@ class GMRenderer:
         except Exception:
             pass
 
+    def draw_debug_overlay(self):
+        """Draw the render governor's timings and decisions (toggle: F3)."""
+        if self.governor is None:
+            return
+        try:
+            font = pg.font.Font(None, 20)
+            y = 10
+            for line in self.governor.debug_lines():
+                text = font.render(line, True, Colors.TEXT_LIGHT)
+                bg = pg.Surface((text.get_width() + 8, text.get_height() + 2), pg.SRCALPHA)
+                bg.fill((0, 0, 0, 160))
+                self.screen.blit(bg, (6, y - 1))
+                self.screen.blit(text, (10, y))
+                y += text.get_height() + 2
+        except Exception:
+            pass
+
+    def _pass(self, name, fn, *args):
+        if self.governor is not None:
+            return self.governor.run_pass(name, fn, *args)
+        return fn(*args)
+
     def draw(self):
+        if self.governor is not None:
+            self.gm.render_tier = self.governor.begin_frame()
+
         # fill background
         self.screen.fill(Colors.BG_DARK)
         cam = getattr(self.gm, 'camera', pg.Vector2(0, 0))
 
-        self.draw_grid_background(cam)
-        self.draw_conveyors_first_pass()
-        self.draw_structures_in_grid_with_hover(cam)
-        self.draw_structures_off_grid_third_pass()
-        self.draw_hud_and_cursor()
-
-        pg.display.flip()
+        self._pass('grid', self.draw_grid_background, cam)
+        self._pass('belts', self.draw_conveyors_first_pass)
+        self._pass('structures', self.draw_structures_in_grid_with_hover, cam)
+        self._pass('off_grid', self.draw_structures_off_grid_third_pass)
+        self._pass('hud', self.draw_hud_and_cursor)
+        if getattr(self.gm, 'show_render_debug', False):
+            self.draw_debug_overlay()
+
+        self._pass('flip', pg.display.flip)
+        if self.governor is not None:
+            self.governor.end_frame()
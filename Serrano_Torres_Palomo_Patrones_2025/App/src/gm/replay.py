@@ -0,0 +1,198 @@
+"""Headless replay of input recordings.
+
+:func:`replay` puts a GameManager back in the starting world of a recording
+(:mod:`gm.recorder`) and re-runs it: the simulation step is called with the
+recorded fixed tick, and every recorded command is applied right before the
+step of its tick through the same code the input handlers use
+(:meth:`placement.placementController.PlacementController.build_at`,
+:func:`states.conveyor_helpers.build_conveyor`, ...). No frame is drawn and
+no time is waited, so the elapsed time measures the simulation alone; the
+final world digest tells whether the run reproduced the recorded session.
+
+Run it from ``src`` to compare versions on the same workload::
+
+    python -m gm.replay ../saves/recording.json --repeat 5
+
+The GameManager is created with SDL's dummy video/audio drivers; its
+autosave is disabled and its save paths point to a temporary directory, so
+the player's saves are never touched.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from settings import SIMULATION_TICK_MS
+from .persistence import _restore_upgrades, rebuild_world
+from .recorder import read_recording, world_digest
+from .sim_state import restore_state
+from .timer_wheel import TimerWheel
+from .update_helpers import simulate
+
+
+class ReplayResult(NamedTuple):
+    """Outcome of one :func:`replay` run.
+
+    Attributes:
+        ticks: Simulation steps run.
+        events: Recorded commands applied.
+        elapsed_ms: Wall time spent replaying, in milliseconds.
+        digest: Digest of the world at the end of the replay.
+        expected: Digest stored in the recording.
+    """
+    ticks: int
+    events: int
+    elapsed_ms: float
+    digest: str
+    expected: Optional[str]
+
+    @property
+    def ms_per_tick(self) -> float:
+        return self.elapsed_ms / self.ticks if self.ticks else 0.0
+
+    @property
+    def matches(self) -> bool:
+        return self.expected is None or self.digest == self.expected
+
+
+def load_world(gm, world: Dict, tick_ms: float = SIMULATION_TICK_MS) -> int:
+    """Replace the world of ``gm`` with a recorded one; returns its tick.
+
+    The timer wheel is replaced, so only the timers the saved simulation
+    state re-arms (mine production phases) remain. Belt travel times and
+    the production interval come from the saved simulation state as they
+    were, not from a new speed-upgrade pass, which would round them.
+    """
+    loader = getattr(gm, 'stream_loader', None)
+    if loader is not None:
+        loader.finish()
+        gm.stream_loader = None
+    gm.timers = TimerWheel(tick_ms)
+    gm._mine_timers = {}
+    gm.action_buffer.clear()
+    gm.deferred_actions = []
+    gm._posted_actions = []
+    _restore_upgrades(gm, world)
+    rebuild_world(gm, world, gm.creators)
+    restore_state(gm, world.get('state') or {})
+    for action in world.get('actions', ()):
+        gm.action_buffer.append(dict(action))
+    if 'paused' in world:
+        gm._tutorial_paused = bool(world['paused'])
+    return int(gm.resume_tick)
+
+
+def _apply(gm, kind: str, payload: Dict, tick: int) -> int:
+    """Apply one recorded command; returns the tick the simulation is at afterwards."""
+    from placement.placementController import PlacementController
+    from core.conveyorCreator import ConveyorCreator
+    from states.conveyor_helpers import build_conveyor
+    from states.destroyState import destroy_conveyor
+
+    if kind == 'build':
+        creator = gm.creators.get(payload['cls'])
+        if creator is not None:
+            PlacementController(gm, creator).build_at(*payload['cell'])
+    elif kind == 'destroy':
+        PlacementController(gm, None).destroy_at(*payload['cell'])
+    elif kind == 'conveyor':
+        build_conveyor(gm, ConveyorCreator(), payload['start'], payload['end'])
+    elif kind == 'conveyor_destroy':
+        index = int(payload['index'])
+        if 0 <= index < len(gm.conveyors):
+            destroy_conveyor(gm, gm.conveyors[index])
+    elif kind == 'action':
+        gm.action_buffer.append({'type': payload['type'], 'tries': 0, 'max_tries': 30})
+    elif kind == 'pause':
+        gm._tutorial_paused = bool(payload['paused'])
+    elif kind == 'rewind':
+        if gm.rewind is not None:
+            gm.rewind.seek(int(payload['target']))
+            return int(payload['target'])
+    elif kind == 'restore':
+        return load_world(gm, payload['world'], gm.timers.tick_ms)
+    else:
+        raise ValueError(f"Unknown recorded command {kind!r}")
+    return tick
+
+
+def replay(gm, recording: Dict) -> ReplayResult:
+    """Re-run ``recording`` on ``gm`` as fast as possible."""
+    from .rewind import RewindBuffer
+
+    tick_ms = float(recording.get('tick_ms', SIMULATION_TICK_MS))
+    gm.recorder = None
+    gm.simulation = None
+    tick = load_world(gm, recording['start'], tick_ms)
+    if getattr(gm, 'rewind', None) is not None:
+        gm.rewind = RewindBuffer(gm, tick_ms=tick_ms)
+
+    steps = 0
+    started = time.perf_counter()
+
+    def advance_to(target):
+        nonlocal tick, steps
+        while tick < target:
+            simulate(gm, tick_ms)
+            tick += 1
+            steps += 1
+            gm.resume_tick = tick
+
+    events = recording.get('events', [])
+    for event_tick, kind, payload in events:
+        advance_to(int(event_tick))
+        tick = _apply(gm, kind, payload, tick)
+        gm.resume_tick = tick
+    advance_to(int(recording.get('end_tick', tick)))
+    elapsed = (time.perf_counter() - started) * 1000.0
+    return ReplayResult(steps, len(events), elapsed, world_digest(gm), recording.get('digest'))
+
+
+def headless_game_manager():
+    """Create a GameManager without a window, audio, autosave or tutorial.
+
+    A new game opens the tutorial modal, which pauses the world, so it is
+    closed here. Recordings carry their own pause state and events.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from gameManager import GameManager  # local import: needs the SDL drivers set first
+
+    gm = GameManager()
+    hud = getattr(gm, 'hud', None)
+    if hud is not None and getattr(hud, 'gif_modal', None) is not None:
+        hud.gif_modal.close()
+    gm._tutorial_paused = False
+    timer = getattr(gm, '_autosave_timer', None)
+    if timer is not None:
+        timer.cancel()
+    gm.save_dir = Path(tempfile.mkdtemp(prefix="replay-"))
+    gm.save_file = gm.save_dir / "map.json"
+    return gm
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay an input recording headless and time it.")
+    parser.add_argument("recording", help="recording written with INPUT_RECORDING (saves/recording.json)")
+    parser.add_argument("--repeat", type=int, default=1, help="number of timed runs")
+    args = parser.parse_args(argv)
+
+    recording = read_recording(args.recording)
+    gm = headless_game_manager()
+    results = [replay(gm, recording) for _ in range(max(1, args.repeat))]
+    for i, result in enumerate(results, 1):
+        status = "ok" if result.matches else "DIVERGED"
+        print(f"run {i}: {result.ticks} ticks, {result.events} events, {result.elapsed_ms:.1f} ms "
+              f"({result.ms_per_tick:.3f} ms/tick) {status}")
+    times = sorted(r.ms_per_tick for r in results)
+    print(f"best {times[0]:.3f} ms/tick, median {times[len(times) // 2]:.3f} ms/tick")
+    return 0 if all(r.matches for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
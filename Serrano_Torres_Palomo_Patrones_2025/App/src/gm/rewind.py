@@ -0,0 +1,208 @@
+"""Rewind / time-travel buffer for debugging the simulation.
+
+:class:`RewindBuffer` keeps the last ``REWIND_SECONDS`` of simulation in two
+bounded structures:
+
+- a ring log with one :class:`TickRecord` per simulation tick, holding the
+  items pushed onto and popped off each belt, the change in points and the
+  builds/demolitions of that tick. This is what you read to see why a chain
+  stalled (for example, a belt that keeps getting pushes but no pops);
+- keyframes: :class:`patterns.memento.GameMemento` checkpoints taken every
+  ``REWIND_KEYFRAME_TICKS`` ticks and on the first tick without builds after
+  a burst of builds (dragging out belts builds on many ticks in a row, but
+  takes a single keyframe). They are delta mementos against the latest full
+  keyframe, captured incrementally by :class:`patterns.memento.GameOriginator`,
+  so a keyframe only re-reads the chunks and belts that changed.
+
+:meth:`RewindBuffer.seek` restores the newest keyframe at or before the
+target tick and re-runs the deterministic simulation step up to it (the
+simulation state includes the RNG), so at most ``REWIND_KEYFRAME_TICKS``
+steps are replayed. Builds cannot be replayed, so the ticks of a burst of
+builds after its last keyframe are not reachable. Memory is capped by the
+ring length and by dropping keyframes older than the oldest logged tick.
+
+All methods run on the thread that owns the world; the game posts
+:meth:`seek` to the simulation thread (``GameManager.rewind_to``).
+"""
+
+import time
+from collections import deque
+from typing import Any, List, Optional, Tuple
+
+from settings import REWIND_SECONDS, REWIND_KEYFRAME_TICKS, REWIND_FULL_KEYFRAME_EVERY, SIMULATION_TICK_MS
+from patterns.memento import GameOriginator
+from .update_helpers import simulate
+
+
+class TickRecord:
+    """Everything that happened during one simulation tick.
+
+    Attributes:
+        tick: Tick number.
+        pushes: ``(conveyor, value)`` for every item pushed onto a belt.
+        pops: ``(conveyor, value)`` for every item taken off a belt.
+        points: Change in points during the tick.
+        builds: ``(kind, detail)`` for structure/belt builds and removals.
+    """
+
+    __slots__ = ('tick', 'pushes', 'pops', 'points', 'builds')
+
+    def __init__(self, tick: int):
+        self.tick = tick
+        self.pushes: List[Tuple[Any, Any]] = []
+        self.pops: List[Tuple[Any, Any]] = []
+        self.points = 0
+        self.builds: List[Tuple[str, Any]] = []
+
+    def __repr__(self):
+        return (f"TickRecord({self.tick}, pushes={len(self.pushes)}, pops={len(self.pops)}, "
+                f"points={self.points:+}, builds={self.builds})")
+
+
+class RewindBuffer:
+    """Bounded per-tick event log plus keyframes for seeking.
+
+    Args:
+        gm: GameManager-like object holding the world state.
+        seconds: Length of the kept history in seconds of simulation.
+        keyframe_ticks: Ticks between regular keyframes.
+        full_every: Every how many keyframes a full (non-delta) one is taken.
+        tick_ms: Length of a simulation step in milliseconds.
+    """
+
+    def __init__(self, gm, seconds: float = REWIND_SECONDS, keyframe_ticks: int = REWIND_KEYFRAME_TICKS,
+                 full_every: int = REWIND_FULL_KEYFRAME_EVERY, tick_ms: float = SIMULATION_TICK_MS):
+        self.gm = gm
+        self.tick_ms = float(tick_ms)
+        self.capacity = max(1, int(seconds * 1000.0 / self.tick_ms))
+        self.keyframe_ticks = max(1, int(keyframe_ticks))
+        self.full_every = max(1, int(full_every))
+        self.log: deque = deque(maxlen=self.capacity)
+        self.keyframes: deque = deque()
+        self.originator = GameOriginator(gm)
+        self.tick = int(getattr(gm, 'resume_tick', 0))
+        self.paused = False
+        self._current = TickRecord(self.tick + 1)
+        self._points = getattr(gm, 'points', 0)
+        self._full = None
+        self._since_full = 0
+        self._build_pending = True  # primer keyframe en el primer tick
+
+    # --- registro ---
+    def on_push(self, conveyor, value) -> None:
+        if not self.paused:
+            self._current.pushes.append((conveyor, value))
+
+    def on_pop(self, conveyor, value) -> None:
+        if not self.paused:
+            self._current.pops.append((conveyor, value))
+
+    def on_build(self, kind: str, detail=None) -> None:
+        if not self.paused:
+            self._current.builds.append((kind, detail))
+            # keyframe en cuanto pase un tick sin construir
+            self._build_pending = True
+
+    def end_tick(self) -> None:
+        """Close the record of the current tick (called after each simulation step)."""
+        if self.paused:
+            return
+        record = self._current
+        self.tick = record.tick
+        points = getattr(self.gm, 'points', 0)
+        try:
+            record.points = points - self._points
+        except Exception:
+            record.points = 0
+        self._points = points
+        self.log.append(record)
+        self._current = TickRecord(self.tick + 1)
+
+        loader = getattr(self.gm, 'stream_loader', None)
+        if loader is not None and not loader.done:
+            # un keyframe ahora forzaría a terminar la carga por chunks
+            self._build_pending = True
+            return
+        last = self.keyframes[-1][0] if self.keyframes else None
+        settled = self._build_pending and not record.builds
+        if settled or last is None or self.tick - last >= self.keyframe_ticks:
+            self._keyframe()
+        self._trim()
+
+    def _keyframe(self) -> None:
+        self._build_pending = False
+        base = self._full if self._since_full < self.full_every - 1 else None
+        memento = self.originator.create_memento(f"rewind@{self.tick}", base=base)
+        if base is None or not memento.is_delta:
+            self._full = memento
+            self._since_full = 0
+        else:
+            self._since_full += 1
+        self.keyframes.append((self.tick, memento))
+
+    def _trim(self) -> None:
+        if not self.log:
+            return
+        oldest = self.log[0].tick
+        # conservar el último keyframe anterior al tick más antiguo del log
+        while len(self.keyframes) > 1 and self.keyframes[1][0] <= oldest:
+            self.keyframes.popleft()
+
+    # --- consulta ---
+    @property
+    def oldest_tick(self) -> Optional[int]:
+        return self.keyframes[0][0] if self.keyframes else None
+
+    def records(self, start: int, end: Optional[int] = None) -> List[TickRecord]:
+        """Logged records with ``start <= tick <= end``."""
+        end = self.tick if end is None else end
+        if not self.log:
+            return []
+        first = self.log[0].tick
+        lo = max(0, start - first)
+        hi = min(len(self.log), end - first + 1)
+        return [self.log[i] for i in range(lo, hi)]
+
+    # --- viaje en el tiempo ---
+    def seek(self, tick: int) -> float:
+        """Put the world back at ``tick``; returns the time taken in milliseconds.
+
+        History after ``tick`` is discarded, and the simulation continues
+        from there. Raises ``ValueError`` when ``tick`` is outside the buffer
+        or a build happened between its keyframe and ``tick``.
+        """
+        if not self.keyframes or tick < self.keyframes[0][0] or tick > self.tick:
+            raise ValueError(f"tick {tick} is outside the rewind buffer")
+        started = time.perf_counter()
+        key_tick, memento = self.keyframes[0]
+        for t, m in self.keyframes:
+            if t > tick:
+                break
+            key_tick, memento = t, m
+        if any(record.builds for record in self.records(key_tick + 1, tick)):
+            raise ValueError(f"tick {tick} is inside a burst of builds; "
+                             f"the nearest reachable tick is {key_tick}")
+
+        self.paused = True
+        try:
+            self.originator._restore_state(memento.get_state())
+            for _ in range(tick - key_tick):
+                simulate(self.gm, self.tick_ms)
+        finally:
+            self.paused = False
+
+        while self.keyframes and self.keyframes[-1][0] > tick:
+            self.keyframes.pop()
+        while self.log and self.log[-1].tick > tick:
+            self.log.pop()
+        if self._full is not None and all(m is not self._full for _, m in self.keyframes):
+            self._full = None
+            self._since_full = 0
+        self.tick = tick
+        self._current = TickRecord(tick + 1)
+        self._points = getattr(self.gm, 'points', 0)
+        self.gm.resume_tick = tick
+        sim = getattr(self.gm, 'simulation', None)
+        if sim is not None:
+            sim.tick = tick
+        return (time.perf_counter() - started) * 1000.0
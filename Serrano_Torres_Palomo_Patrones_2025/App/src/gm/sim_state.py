@@ -0,0 +1,234 @@
+"""Full simulation-state snapshots.
+
+A plain save (:func:`gm.persistence.capture_save`) only records the layout:
+structures, belts and upgrades. :func:`capture_state` adds what is needed to
+resume from exactly the saved tick, stored under the ``"state"`` key of the
+save::
+
+    {"v": 1, "tick": 1234,
+     "timers": {"pending_ms": 4.2},
+     "mines": [[x, y, ticks_to_next_item], ...],
+     "belts": [[value, count, head, gap, value, count, ...], ...],
+     "travel": [[travel_time, base_travel_time], ...],
+     "production_interval": 1800,
+     "ports": [[x, y, {"buffers": [[...], [...]], "router": [cursor, [credit...]]}], ...],
+     "rng": [version, [state...], gauss_next]}
+
+``belts`` follows the order of ``gm.conveyors`` (which is also the order of
+the saved conveyors) and holds each belt's run-length encoded runs
+flattened; ``travel`` holds the exact travel times of the same belts
+(``base_travel_time`` is null for belts never sped up), so a restored
+world does not depend on re-applying the speed upgrades. ``ports`` holds the operation-module input buffers and the
+splitter/merger router state, keyed by cell. Floats round-trip exactly
+through JSON, so a resumed world matches the saved one.
+
+When a large save is streamed in (:mod:`gm.stream_loader`), the structures
+of later chunks do not exist yet when :func:`restore_state` runs; their
+entries are taken from :func:`cell_states` and applied with
+:func:`restore_cell` as each chunk is placed.
+"""
+
+import random
+from typing import Dict, Optional, Tuple
+
+from map.registry import KIND_MINE, KIND_MODULE, KIND_ROUTER, unwrap
+from .update_helpers import _schedule_mine
+
+STATE_VERSION = 1
+
+
+def _rng(gm):
+    """The simulation RNG: ``gm.rng`` (seeded, see ``RNG_SEED``) or the global one."""
+    return getattr(gm, 'rng', None) or random
+
+
+def _belt_runs(conv):
+    base = unwrap(conv)
+    flat = []
+    for run in getattr(base, 'queue', ()):
+        flat.extend((run.value, run.count, run.head, run.gap))
+    return flat
+
+
+def _belt_travel(conv):
+    base = unwrap(conv)
+    return [getattr(base, 'travel_time', None), getattr(base, '_base_travel_time', None)]
+
+
+def _port_state(struct):
+    base = unwrap(struct)
+    state = {}
+    buffers = [getattr(base, name, None) for name in ('buffer1', 'buffer2')]
+    if any(buf is not None and len(buf) for buf in buffers):
+        state['buffers'] = [list(buf.items) if buf is not None else [] for buf in buffers]
+    router = getattr(base, 'router', None)
+    if router is not None:
+        state['router'] = [router.cursor, list(router.credit)]
+    return state
+
+
+def capture_state(gm, belts: bool = True) -> Dict:
+    """Snapshot the dynamic simulation state of ``gm`` as plain data.
+
+    Like :func:`gm.persistence.capture_save`, this must run on the thread
+    that owns the world. Only mines, operation modules and routers are
+    visited (through the map registry). With ``belts=False`` the per-belt
+    ``belts`` and ``travel`` lists are left out; checkpoints
+    (:mod:`patterns.memento`) capture those belt by belt.
+    """
+    sim = getattr(gm, 'simulation', None)
+    tick = sim.tick if sim is not None else int(getattr(gm, 'resume_tick', 0))
+
+    registry = gm.map.registry
+    timers = getattr(gm, 'timers', None)
+    mine_timers = getattr(gm, '_mine_timers', {})
+    mines = []
+    if timers is not None:
+        for struct in gm.map.structures_of(KIND_MINE):
+            timer = mine_timers.get(struct)
+            if timer is not None and timer.active:
+                x, y = registry.position_of(struct)
+                mines.append([x, y, timers.remaining_ticks(timer)])
+    ports = []
+    for kind in (KIND_MODULE, KIND_ROUTER):
+        for struct in gm.map.structures_of(kind):
+            port = _port_state(struct)
+            if port:
+                x, y = registry.position_of(struct)
+                ports.append([x, y, port])
+
+    version, internal, gauss = _rng(gm).getstate()
+    state = {
+        'v': STATE_VERSION,
+        'tick': tick,
+        'timers': {'pending_ms': timers.pending_ms if timers is not None else 0.0},
+        'mines': mines,
+        'production_interval': getattr(gm, 'production_interval', None),
+        'ports': ports,
+        'rng': [version, list(internal), gauss],
+    }
+    if belts:
+        state['belts'] = [_belt_runs(conv) for conv in getattr(gm, 'conveyors', [])]
+        state['travel'] = [_belt_travel(conv) for conv in getattr(gm, 'conveyors', [])]
+    return state
+
+
+def _restore_belt(conv, flat) -> None:
+    from core.conveyor import BeltRun  # local import to avoid cycles
+
+    base = unwrap(conv)
+    base.queue.clear()
+    items = 0
+    for i in range(0, len(flat) - 3, 4):
+        value, count, head, gap = flat[i:i + 4]
+        base.queue.append(BeltRun(value, int(count), float(head), float(gap)))
+        items += int(count)
+    base._items = items
+
+
+def _restore_travel(conv, travel) -> None:
+    base = unwrap(conv)
+    travel_time, base_time = travel
+    if travel_time is not None:
+        base.travel_time = travel_time
+    if base_time is not None:
+        base._base_travel_time = base_time
+    elif hasattr(base, '_base_travel_time'):
+        del base._base_travel_time
+
+
+def _restore_port(struct, state) -> None:
+    base = unwrap(struct)
+    buffers = state.get('buffers')
+    if buffers and hasattr(base, 'input_buffers'):
+        base.input_buffers()
+    for name, values in zip(('buffer1', 'buffer2'), buffers or ()):
+        buf = getattr(base, name, None)
+        if buf is not None:
+            buf.clear()
+            buf.items.extend(values)
+    router = getattr(base, 'router', None)
+    if router is not None and 'router' in state:
+        router.cursor, credit = state['router']
+        router.credit = list(credit)
+
+
+def _restore_mine(gm, mine, ticks) -> None:
+    timers = gm.timers
+    if not hasattr(gm, '_mine_timers'):
+        gm._mine_timers = {}
+    old = gm._mine_timers.pop(mine, None)
+    if old is not None:
+        old.cancel()
+    _schedule_mine(gm, mine, first_delay=max(1, int(ticks)) * timers.tick_ms)
+
+
+def cell_states(state: Dict) -> Dict[Tuple[int, int], Tuple[Optional[Dict], Optional[int]]]:
+    """Map each cell of a snapshot to its ``(port_state, mine_ticks)``."""
+    cells = {}
+    if not state or int(state.get('v', 0)) != STATE_VERSION:
+        return cells
+    for x, y, port in state.get('ports', ()):
+        cells[(int(x), int(y))] = (port, None)
+    for x, y, ticks in state.get('mines', ()):
+        port, _ = cells.get((int(x), int(y)), (None, None))
+        cells[(int(x), int(y))] = (port, int(ticks))
+    return cells
+
+
+def restore_cell(gm, struct, cell_state) -> None:
+    """Apply one :func:`cell_states` entry to a structure placed after :func:`restore_state`."""
+    port, ticks = cell_state
+    if port:
+        _restore_port(struct, port)
+    if ticks is not None and getattr(gm, 'timers', None) is not None:
+        _restore_mine(gm, struct, ticks)
+
+
+def restore_state(gm, state: Dict) -> bool:
+    """Apply a :func:`capture_state` snapshot to ``gm``.
+
+    Call it after the map, belts and connections are built, either right
+    after loading or to roll back a world with the same layout (running mine
+    timers are replaced by the saved phases). Returns False
+    (leaving the world as loaded) for unknown snapshot versions.
+    """
+    if not state or int(state.get('v', 0)) != STATE_VERSION:
+        return False
+
+    conveyors = getattr(gm, 'conveyors', [])
+    for conv, flat in zip(conveyors, state.get('belts', ())):
+        _restore_belt(conv, flat)
+    # tiempos exactos: sin volver a aplicar (y truncar) las mejoras de velocidad
+    for conv, travel in zip(conveyors, state.get('travel', ())):
+        _restore_travel(conv, travel)
+    if state.get('production_interval') is not None:
+        gm.production_interval = state['production_interval']
+
+    registry = gm.map.registry
+    # buffers vacíos no se guardan: vaciar los actuales antes de aplicar
+    for _, struct in gm.map.iter_structures():
+        for name in ('buffer1', 'buffer2'):
+            buf = getattr(unwrap(struct), name, None)
+            if buf is not None:
+                buf.clear()
+    for x, y, port in state.get('ports', ()):
+        struct = registry.at(int(x), int(y))
+        if struct is not None:
+            _restore_port(struct, port)
+
+    timers = getattr(gm, 'timers', None)
+    if timers is not None:
+        timers.pending_ms = state.get('timers', {}).get('pending_ms', 0.0)
+        for x, y, ticks in state.get('mines', ()):
+            mine = registry.at(int(x), int(y))
+            if mine is not None:
+                _restore_mine(gm, mine, ticks)
+
+    rng = state.get('rng')
+    if rng:
+        version, internal, gauss = rng
+        _rng(gm).setstate((version, tuple(internal), gauss))
+
+    gm.resume_tick = int(state.get('tick', 0))
+    return True
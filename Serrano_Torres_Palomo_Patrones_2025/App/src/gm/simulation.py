@@ -0,0 +1,267 @@
+"""Simulation worker thread and render snapshots.
+
+The world step (queued upgrades, belts, production and operation modules)
+runs on a :class:`SimulationThread` with a fixed time step, independent of
+how long the pygame main thread takes to draw a frame. After every tick the
+thread publishes an immutable :class:`WorldSnapshot` into a
+:class:`SnapshotBuffer`; the renderer draws the latest published snapshot:
+the runs on every belt and the draw state of every placed structure
+(:class:`StructureView`), so it never reads the live map. Publishing costs
+O(belts + runs) per tick: runs are expanded into items only for the belts
+that are drawn, and structure views are only rebuilt when marked dirty.
+
+Input that mutates the world (build/destroy clicks) is not applied from the
+main thread directly: it is posted as a callable with :meth:`SimulationThread.post`
+and executed by the simulation thread at the start of its next tick. The
+command queue is a :class:`collections.deque`, whose ``append``/``popleft``
+are atomic in CPython, so neither side takes a lock.
+"""
+
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from settings import SIMULATION_TICK_MS
+from map.registry import unwrap
+from .update_helpers import simulate
+
+# Estructuras cuya etiqueta depende de otras (puntos del pozo según las
+# minas): sus vistas se rehacen cuando algo se marca como cambiado; las
+# demás se reutilizan mientras su chunk no cambie.
+_LABELLED = ('Mine', 'Well')
+
+
+class StructureView(NamedTuple):
+    """Draw state of one placed structure, captured on the simulation thread.
+
+    Attributes:
+        cell: Grid cell ``(x, y)`` the structure occupies.
+        structure: The placed object (decorators included), drawn with its
+            own sprite and position.
+        kind: Class name of the concrete structure.
+        number: Label drawn on the structure (mine output, well target), or None.
+        locked: Whether the structure is a locked well.
+        points: Points shown above a well, or None.
+    """
+    cell: Tuple[int, int]
+    structure: Any
+    kind: str
+    number: Any = None
+    locked: bool = False
+    points: Optional[int] = None
+
+
+class WorldSnapshot(NamedTuple):
+    """Immutable view of the world published after a simulation tick.
+
+    Attributes:
+        tick: Simulation tick number that produced the snapshot.
+        points: Player points at the end of the tick.
+        belts: ``((conveyor, ((value, count, head, gap), ...)), ...)`` for
+            every belt (see :meth:`core.conveyor.Conveyor.snapshot_runs`).
+        cells: Read-only ``chunk key -> (StructureView, ...)`` for every
+            placed structure, grouped like ``gm.map.grid``.
+        chunk_size: Size of those chunks, in cells.
+    """
+    tick: int
+    points: int
+    belts: Tuple[Tuple[Any, Tuple[Tuple[Any, int, float, float], ...]], ...]
+    cells: Mapping[Tuple[int, int], Tuple[StructureView, ...]] = MappingProxyType({})
+    chunk_size: int = 1
+
+    def views_in_rect(self, x0: int, y0: int, x1: int, y1: int):
+        """Yield the :class:`StructureView` of every structure inside the inclusive cell rectangle."""
+        size = self.chunk_size
+        for cy in range(y0 // size, y1 // size + 1):
+            for cx in range(x0 // size, x1 // size + 1):
+                for view in self.cells.get((cx, cy), ()):
+                    x, y = view.cell
+                    if x0 <= x <= x1 and y0 <= y <= y1:
+                        yield view
+
+
+def structure_view(x: int, y: int, structure) -> StructureView:
+    """Capture the draw state of the structure placed at ``(x, y)``."""
+    base = unwrap(structure)
+    kind = base.__class__.__name__
+    if kind == 'Mine':
+        number = getattr(base, '_effective_number', getattr(base, '_base_number', getattr(base, 'number', None)))
+        return StructureView((x, y), structure, kind, number)
+    if kind == 'Well':
+        try:
+            points = base._calculate_points_by_difficulty(base._get_current_mine_number())
+        except Exception:
+            points = None
+        return StructureView((x, y), structure, kind, getattr(base, 'consumingNumber', None),
+                             bool(getattr(base, 'locked', False)), points)
+    return StructureView((x, y), structure, kind)
+
+
+def _capture_cells(gm, cache: Optional[Dict]) -> Mapping[Tuple[int, int], Tuple[StructureView, ...]]:
+    """Views of every placed structure per chunk, rebuilt only when dirty.
+
+    The mapping of the previous tick is reused as is while neither
+    ``gm.map.grid.version`` (a placement or removal) nor ``gm.view_version``
+    (a label changed, see ``GameManager.mark_views_dirty``) moved. When one
+    did, unlabelled views are rebuilt only for chunks whose
+    :attr:`map.chunked_grid.Chunk.version` changed, and mine and well views
+    are rebuilt everywhere.
+    """
+    grid = getattr(getattr(gm, 'map', None), 'grid', None)
+    if grid is None:
+        return MappingProxyType({})
+    if cache is None:
+        cache = {}
+    stamp = (getattr(grid, 'version', None), getattr(gm, 'view_version', 0))
+    if stamp[0] is not None and cache.get('grid') is grid and cache.get('stamp') == stamp:
+        return cache['cells']
+
+    chunks = cache.get('chunks', {})
+    seen = {}
+    cells = {}
+    for key, chunk in tuple(grid.chunks.items()):
+        entry = chunks.get(key)
+        if entry is None or entry[0] is not chunk or entry[1] != chunk.version:
+            static, labelled = [], []
+            for (x, y), structure in chunk.occupied.items():
+                if unwrap(structure).__class__.__name__ in _LABELLED:
+                    labelled.append((x, y, structure))
+                else:
+                    static.append(structure_view(x, y, structure))
+            entry = (chunk, chunk.version, tuple(static), tuple(labelled))
+        seen[key] = entry
+        _, _, static, labelled = entry
+        if labelled:
+            cells[key] = static + tuple(structure_view(x, y, s) for x, y, s in labelled)
+        else:
+            cells[key] = static
+    view = MappingProxyType(cells)
+    cache['grid'] = grid
+    cache['stamp'] = stamp
+    cache['chunks'] = seen
+    cache['cells'] = view
+    return view
+
+
+def capture_snapshot(gm, tick: int = 0, cache: Optional[Dict] = None) -> WorldSnapshot:
+    """Build a :class:`WorldSnapshot` from the current state of ``gm``.
+
+    ``cache`` is a dict owned by the caller and reused between calls to
+    avoid rebuilding structure views that did not change.
+    """
+    belts = []
+    for conv in tuple(getattr(gm, 'conveyors', [])):
+        try:
+            belts.append((conv, conv.snapshot_runs()))
+        except Exception:
+            belts.append((conv, ()))
+    return WorldSnapshot(
+        tick=tick,
+        points=getattr(gm, 'points', 0),
+        belts=tuple(belts),
+        cells=_capture_cells(gm, cache),
+        chunk_size=int(getattr(getattr(getattr(gm, 'map', None), 'grid', None), 'chunk_size', 1)),
+    )
+
+
+class SnapshotBuffer:
+    """Double buffer of :class:`WorldSnapshot` instances.
+
+    The writer fills the back slot and then flips the front index; readers
+    only ever see a fully built snapshot. Both operations are single
+    reference assignments, so no lock is needed.
+    """
+
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+
+    def publish(self, snapshot: WorldSnapshot) -> None:
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        self._front = back
+
+    def latest(self) -> Optional[WorldSnapshot]:
+        return self._slots[self._front]
+
+
+class SimulationThread(threading.Thread):
+    """Worker thread that advances the world with a fixed time step.
+
+    Args:
+        gm: GameManager-like object holding the world state.
+        tick_ms: Length of a simulation step in milliseconds.
+        max_catchup: Maximum number of steps run back to back when the
+            thread falls behind; any remaining backlog is dropped.
+    """
+
+    def __init__(self, gm, tick_ms: float = SIMULATION_TICK_MS, max_catchup: int = 5):
+        super().__init__(name="simulation", daemon=True)
+        self.gm = gm
+        self.tick_ms = float(tick_ms)
+        self.max_catchup = int(max_catchup)
+        # continuar desde el tick guardado (gm.sim_state)
+        self.tick = int(getattr(gm, 'resume_tick', 0))
+        self.commands = deque()
+        self.snapshots = SnapshotBuffer()
+        self._stop_event = threading.Event()
+        self._view_cache = {}
+        self.snapshots.publish(capture_snapshot(gm, self.tick, self._view_cache))
+
+    def post(self, command: Callable[[], Any]) -> None:
+        """Queue ``command`` to run on the simulation thread before the next tick."""
+        self.commands.append(command)
+
+    def latest(self) -> Optional[WorldSnapshot]:
+        """Return the most recently published snapshot."""
+        return self.snapshots.latest()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Ask the thread to finish and wait up to ``timeout`` seconds."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def _drain_commands(self) -> None:
+        while self.commands:
+            try:
+                command = self.commands.popleft()
+            except IndexError:
+                break
+            try:
+                command()
+            except Exception as e:
+                print(f"Simulation command failed: {e}")
+
+    def step(self) -> None:
+        """Run a single tick and publish its snapshot."""
+        self._drain_commands()
+        try:
+            simulate(self.gm, self.tick_ms)
+        except Exception as e:
+            print(f"Simulation step {self.tick} failed: {e}")
+        self.tick += 1
+        self.snapshots.publish(capture_snapshot(self.gm, self.tick, self._view_cache))
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        pending = 0.0
+        while not self._stop_event.is_set():
+            now = time.perf_counter()
+            pending += (now - last) * 1000.0
+            last = now
+
+            steps = 0
+            while pending >= self.tick_ms and steps < self.max_catchup:
+                self.step()
+                pending -= self.tick_ms
+                steps += 1
+            if steps >= self.max_catchup:
+                # demasiado retraso: descartar en lugar de entrar en espiral
+                pending = 0.0
+
+            self._stop_event.wait(max(0.0, (self.tick_ms - pending) / 1000.0))
+        # aplicar la entrada pendiente antes de terminar
+        self._drain_commands()
@@ -0,0 +1,168 @@
+"""Background streaming of chunk-streamed saves.
+
+Large maps are saved in the version 3 layout of :mod:`map.save_format`: an
+index header plus one record per chunk. :func:`gm.persistence.load_game`
+places the chunks around the camera, every belt and the connections right
+away, and hands the remaining chunk keys (nearest first) to a
+:class:`StreamLoader`:
+
+- its thread reads and decodes the records from the memory-mapped file and
+  queues the entries;
+- :meth:`StreamLoader.drain` runs on the thread that owns the world (once per
+  simulation step, see ``update_helpers._drain_stream``) and places at most
+  ``STREAM_CHUNKS_PER_TICK`` queued chunks: it creates the structures,
+  rewires the belt cells of the chunk and applies the saved buffers, router
+  and mine phases of those cells (:func:`gm.sim_state.restore_cell`).
+
+The cells of the pending chunks are reserved in ``gm.map.free_cells``
+until each one is placed: neither the player nor a mine purchase can take
+a cell the save still has to fill. Belts that end in a chunk that is not
+placed yet are left without an output until it arrives, so no item is handed over to a belt junction that is
+really a missing structure. Anything that needs the whole world
+(:func:`gm.persistence.capture_save`) calls :meth:`StreamLoader.finish`
+first; checkpoints and rewind keyframes wait until streaming is done.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+from settings import STREAM_CHUNKS_PER_TICK
+from .sim_state import restore_cell
+
+
+class StreamLoader(threading.Thread):
+    """Decode chunk records in the background and place them on demand.
+
+    Args:
+        gm: GameManager-like object whose map, connections and belts are
+            already built from the near chunks.
+        save: Open :class:`map.save_format.ChunkedSave`; closed when done.
+        keys: Chunk keys still to load, in loading order.
+        creators: Structure creators, as for :func:`gm.persistence.load_game`.
+        on_place: Optional ``on_place(structure)`` callback (efficiency
+            upgrades).
+        cells: Saved per-cell simulation state (:func:`gm.sim_state.cell_states`).
+    """
+
+    def __init__(self, gm, save, keys: List[Tuple[int, int]], creators: Dict[str, object],
+                 on_place=None, cells: Dict = None):
+        super().__init__(name="stream-loader", daemon=True)
+        self.gm = gm
+        self.save = save
+        self.creators = creators
+        self.on_place = on_place
+        self.cells = cells or {}
+        self.total = len(keys)
+        self.placed = 0
+        self.elapsed_ms = None
+        self._keys = deque(keys)
+        self._ready = deque()
+        self._stopping = threading.Event()
+        self._start_time = time.perf_counter()
+        self._belt_cells = self._detach_pending(keys)
+
+    def _detach_pending(self, keys) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+        """Group the belt endpoint cells by pending chunk and unhook belts ending there."""
+        size = self.save.chunk_size
+        pending = set(keys)
+        by_chunk = {}
+        connections = getattr(self.gm, 'connections', None)
+        if connections is None:
+            return by_chunk
+        for cell in set(connections.incoming) | set(connections.outgoing):
+            key = (cell[0] // size, cell[1] // size)
+            if key in pending:
+                by_chunk.setdefault(key, []).append(cell)
+        for key, cells in by_chunk.items():
+            for cell in cells:
+                for conv in connections.incoming.get(cell, ()):
+                    conv.outputConveyor = None
+        return by_chunk
+
+    @property
+    def done(self) -> bool:
+        return self.placed >= self.total
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                key = self._keys.popleft()
+            except IndexError:
+                return
+            try:
+                entries = self.save.read_chunk(key)
+            except Exception as e:
+                print(f"Could not read chunk {key}: {e}")
+                entries = []
+            self._ready.append((key, entries))
+
+    def drain(self, limit: int = STREAM_CHUNKS_PER_TICK) -> int:
+        """Place up to ``limit`` decoded chunks; returns how many were placed."""
+        count = 0
+        while count < limit and self._ready:
+            key, entries = self._ready.popleft()
+            self._place(key, entries)
+            count += 1
+        if count and self.done:
+            self._complete()
+        return count
+
+    def finish(self) -> None:
+        """Place every remaining chunk now (reading them on this thread if needed)."""
+        if self.done:
+            return
+        self._stopping.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+        while self._ready:
+            self._place(*self._ready.popleft())
+        while self._keys:
+            key = self._keys.popleft()
+            self._place(key, self.save.read_chunk(key))
+        self._complete()
+
+    def _place(self, key, entries) -> None:
+        gm = self.gm
+        self.placed += 1
+        triples = [(int(e['x']), int(e['y']), e) for e in entries]
+        gm.map.free_cells.release(key)
+        placed = {id(s) for s in gm.map.place_entries(triples, self.creators, gm, self.on_place)}
+
+        registry = gm.map.registry
+        structures = getattr(gm, 'structures', None)
+        # solo las estructuras de este chunk, nunca otra que ocupe su celda
+        ours = [(x, y, registry.at(x, y)) for x, y, _ in triples]
+        ours = [(x, y, struct) for x, y, struct in ours if struct is not None and id(struct) in placed]
+        for x, y, struct in ours:
+            if structures is not None:
+                structures.append(struct)
+            name = struct.__class__.__name__
+            if name == 'Well':
+                gm.wells.append(struct)
+            elif name == 'Mine' and getattr(gm, 'mine', None) is None:
+                gm.mine = struct
+
+        connections = getattr(gm, 'connections', None)
+        if connections is not None:
+            for cell in self._belt_cells.pop(key, ()):
+                connections.rewire_cell(cell)
+
+        for x, y, struct in ours:
+            saved = self.cells.get((x, y))
+            if saved is not None:
+                restore_cell(gm, struct, saved)
+
+    def _complete(self) -> None:
+        if self.elapsed_ms is not None:
+            return
+        self.elapsed_ms = (time.perf_counter() - self._start_time) * 1000.0
+        try:
+            self.save.close()
+        except Exception:
+            pass
+        timings = getattr(self.gm, 'load_timings', None)
+        if timings is not None:
+            timings['stream'] = self.elapsed_ms
+        print(f"Streamed {self.total} chunks in {self.elapsed_ms:.1f} ms")
@@ -0,0 +1,201 @@
+"""Hierarchical timer wheel for timed game events.
+
+Mine production, popup expiry, GIF frames, autosave and upgrade retries
+used to keep their own countdowns that were decremented (or scanned) every
+frame. They now register a :class:`Timer` with a :class:`TimerWheel` and
+each tick only pops the timers that are due.
+
+The wheel has ``levels`` rings of ``slots`` buckets. Level 0 buckets are one
+tick wide, level 1 buckets ``slots`` ticks wide and so on. A timer is stored
+in the lowest level whose ring still contains its deadline and is moved
+down one level (cascaded) when the lower ring wraps around, so scheduling,
+cancelling and firing are O(1) per timer. Deadlines beyond the top ring wait
+in an overflow list that is re-examined every time the top ring wraps.
+
+Two wheels are used: ``gm.timers`` advances with the simulation step (on the
+simulation thread when it runs) and ``gm.ui_timers`` advances with the frame
+in the HUD update. Scheduling and cancelling take a small lock so either
+thread may arm a timer on either wheel; callbacks run outside the lock.
+"""
+
+import threading
+from typing import Callable, List, Optional, Union
+
+from settings import SIMULATION_TICK_MS
+
+Interval = Union[None, float, Callable[[], Optional[float]]]
+
+
+class Timer:
+    """Handle returned by :meth:`TimerWheel.schedule`.
+
+    Attributes:
+        deadline: Absolute wheel tick at which the timer fires.
+        callback: Called without arguments when due. Returning ``False``
+            stops a repeating timer.
+        repeat: ``None`` for one-shot timers, a delay in milliseconds or a
+            callable returning the next delay (``None``/``0`` stops it).
+    """
+
+    __slots__ = ('deadline', 'callback', 'repeat', 'cancelled', 'wheel')
+
+    def __init__(self, wheel, deadline: int, callback: Callable[[], object], repeat: Interval = None):
+        self.wheel = wheel
+        self.deadline = deadline
+        self.callback = callback
+        self.repeat = repeat
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.wheel.cancel(self)
+
+    @property
+    def active(self) -> bool:
+        return not self.cancelled
+
+    def remaining_ms(self) -> float:
+        """Milliseconds until the timer fires (0 when cancelled or due)."""
+        if self.cancelled:
+            return 0.0
+        return self.wheel.remaining_ms(self)
+
+
+class TimerWheel:
+    """Hashed hierarchical timing wheel.
+
+    Args:
+        tick_ms: Length of one wheel tick in milliseconds.
+        slots: Buckets per level (a power of two).
+        levels: Number of levels; with the defaults the wheel covers
+            ``64**4`` ticks (about 77 hours at 60 ticks per second).
+    """
+
+    def __init__(self, tick_ms: float = SIMULATION_TICK_MS, slots: int = 64, levels: int = 4):
+        self.tick_ms = float(tick_ms)
+        self.bits = max(1, int(slots).bit_length() - 1)
+        self.slots = 1 << self.bits
+        self.mask = self.slots - 1
+        self.levels = int(levels)
+        self.now = 0
+        self._pending_ms = 0.0
+        self._wheel: List[List[List[Timer]]] = [[[] for _ in range(self.slots)] for _ in range(self.levels)]
+        self._overflow: List[Timer] = []
+        self._count = 0
+        self._lock = threading.Lock()
+
+    # --- programación ---
+    def ticks_for(self, delay_ms: float) -> int:
+        """Whole ticks covering ``delay_ms`` (at least one)."""
+        return max(1, int(round(float(delay_ms) / self.tick_ms)))
+
+    def schedule(self, delay_ms: float, callback: Callable[[], object], repeat: Interval = None) -> Timer:
+        """Run ``callback`` after ``delay_ms`` (and every ``repeat`` ms after that)."""
+        timer = Timer(self, 0, callback, repeat)
+        with self._lock:
+            timer.deadline = self.now + self.ticks_for(delay_ms)
+            self._insert(timer)
+            self._count += 1
+        return timer
+
+    def cancel(self, timer: Optional[Timer]) -> None:
+        """Cancel ``timer``; it is dropped lazily when its bucket is reached."""
+        if timer is None:
+            return
+        with self._lock:
+            if not timer.cancelled:
+                timer.cancelled = True
+                self._count -= 1
+
+    def remaining_ms(self, timer: Timer) -> float:
+        return max(0.0, (timer.deadline - self.now) * self.tick_ms - self._pending_ms)
+
+    def remaining_ticks(self, timer: Timer) -> int:
+        """Whole ticks until ``timer`` fires (used by state snapshots)."""
+        return max(0, timer.deadline - self.now)
+
+    @property
+    def pending_ms(self) -> float:
+        """Milliseconds accumulated towards the next tick."""
+        return self._pending_ms
+
+    @pending_ms.setter
+    def pending_ms(self, value: float) -> None:
+        self._pending_ms = max(0.0, float(value))
+
+    def _insert(self, timer: Timer) -> None:
+        deadline = timer.deadline
+        for level in range(self.levels):
+            shift = self.bits * (level + 1)
+            # mismo bloque del nivel superior: cabe en este anillo
+            if (deadline >> shift) == (self.now >> shift):
+                self._wheel[level][(deadline >> (self.bits * level)) & self.mask].append(timer)
+                return
+        self._overflow.append(timer)
+
+    # --- avance ---
+    def advance(self, dt_ms: float) -> int:
+        """Advance the wheel by ``dt_ms`` milliseconds; return the timers fired."""
+        self._pending_ms += float(dt_ms or 0)
+        fired = 0
+        while self._pending_ms >= self.tick_ms:
+            self._pending_ms -= self.tick_ms
+            fired += self._tick()
+        return fired
+
+    def _tick(self) -> int:
+        with self._lock:
+            self.now += 1
+            now = self.now
+            # bajar de nivel los cubos cuyo anillo inferior acaba de dar la vuelta
+            if now & ((1 << (self.bits * self.levels)) - 1) == 0 and self._overflow:
+                overflow, self._overflow = self._overflow, []
+                for timer in overflow:
+                    if not timer.cancelled:
+                        self._insert(timer)
+            for level in range(self.levels - 1, 0, -1):
+                if now & ((1 << (self.bits * level)) - 1) == 0:
+                    slot = (now >> (self.bits * level)) & self.mask
+                    bucket, self._wheel[level][slot] = self._wheel[level][slot], []
+                    for timer in bucket:
+                        if not timer.cancelled:
+                            self._insert(timer)
+            slot = now & self.mask
+            due, self._wheel[0][slot] = self._wheel[0][slot], []
+
+        fired = 0
+        for timer in due:
+            if timer.cancelled:
+                continue
+            if timer.deadline > now:
+                with self._lock:
+                    self._insert(timer)
+                continue
+            try:
+                keep = timer.callback()
+            except Exception as e:
+                print(f"Timer callback failed: {e}")
+                keep = None
+            fired += 1
+            self._rearm(timer, keep)
+        return fired
+
+    def _rearm(self, timer: Timer, keep) -> None:
+        delay = None
+        if timer.repeat is not None and keep is not False and not timer.cancelled:
+            try:
+                delay = timer.repeat() if callable(timer.repeat) else timer.repeat
+            except Exception:
+                delay = None
+        with self._lock:
+            if timer.cancelled:
+                return
+            if delay:
+                timer.deadline = self.now + self.ticks_for(delay)
+                self._insert(timer)
+            else:
+                timer.cancelled = True
+                self._count -= 1
+
+    def __len__(self) -> int:
+        """Number of active (scheduled, not cancelled) timers."""
+        return self._count
@@ -8,6 +8,7 @@ orchestrates input, camera, world updates, production and HUD updates.
 import pygame as pg
 from settings import *
 from .gm_upgrades import process_action_buffer
+from map.registry import KIND_MINE, unwrap
 
 
 def _handle_input_and_state(gm):
@@ -66,7 +67,7 @@ def _handle_camera(gm):
         pass
 
 
-def _update_world(gm):
+def _update_world(gm, dt=None):
     """Update map and conveyors when the tutorial is not paused."""
     if not getattr(gm, '_tutorial_paused', False):
         try:
@@ -76,37 +77,95 @@ def _update_world(gm):
 
         for conv in getattr(gm, 'conveyors', []):
             try:
-                conv.update()
+                conv.update(dt)
             except Exception:
                 pass
 
 
-def _handle_production(gm):
-    """Advance production timers and trigger Mine production when due."""
+def _production_interval(gm):
+    return int(getattr(gm, 'production_interval', getattr(gm, '_base_production_interval', 2000)))
+
+
+def _schedule_mine(gm, mine, first_delay=None):
+    """Register a repeating production timer for ``mine`` on ``gm.timers``.
+
+    Each mine keeps its own phase: the first item is produced one interval
+    (or ``first_delay`` ms, when restoring a saved phase) after the mine is
+    registered. The timer reads ``gm.production_interval``
+    on every repeat (speed upgrades apply from the next cycle) and removes
+    itself once the mine is no longer on the map.
+    """
+    def fire():
+        try:
+            if mine not in gm.map.registry:
+                if gm._mine_timers.get(mine) is timer:
+                    del gm._mine_timers[mine]
+                return False
+        except Exception:
+            pass
+        base = unwrap(mine)
+        if getattr(base, 'outputConveyor', None):
+            try:
+                base.produce(base.outputConveyor)
+            except Exception:
+                pass
+        return True
+
+    delay = _production_interval(gm) if first_delay is None else first_delay
+    timer = gm.timers.schedule(delay, fire, repeat=lambda: _production_interval(gm))
+    gm._mine_timers[mine] = timer
+
+
+def _handle_production(gm, dt=None):
+    """Keep one production timer per Mine on the simulation timer wheel.
+
+    Only checks whether the set of mines changed (O(mines) per tick, no map
+    scan); the production itself is fired by
+    :meth:`gm.timer_wheel.TimerWheel.advance`. ``gm._mine_timers`` is keyed
+    by the mine itself, so a removed mine's timer is cancelled here and a
+    mine bought in its place always gets its own timer.
+    """
     if not hasattr(gm, '_base_production_interval'):
         gm._base_production_interval = 2000
     if not hasattr(gm, 'production_interval'):
         gm.production_interval = int(gm._base_production_interval)
+    if not hasattr(gm, '_mine_timers'):
+        gm._mine_timers = {}
 
-    gm.production_timer += gm.delta_time
-    prod_int = int(getattr(gm, 'production_interval', getattr(gm, '_base_production_interval', 2000)))
-    if gm.production_timer > prod_int:
-        structures = getattr(gm, 'structures', [])
-        for struct in structures:
-            if struct.__class__.__name__ == 'Mine':
-                if hasattr(struct, 'outputConveyor') and struct.outputConveyor:
-                    try:
-                        struct.produce(struct.outputConveyor)
-                    except Exception:
-                        pass
-        gm.production_timer = 0
+    try:
+        mines = gm.map.structures_of(KIND_MINE)
+    except Exception:
+        return
+    timers = gm._mine_timers
+    if len(mines) == len(timers) and all(mine in timers for mine in mines):
+        return
+    # cambió el conjunto de minas: cancelar las quitadas y registrar las nuevas
+    alive = set(mines)
+    for mine in tuple(timers):
+        if mine not in alive:
+            timers.pop(mine).cancel()
+    for mine in mines:
+        if mine not in timers:
+            _schedule_mine(gm, mine)
+
+
+def _advance_timers(gm, dt=None):
+    """Fire the simulation timers that are due after ``dt`` milliseconds."""
+    timers = getattr(gm, 'timers', None)
+    if timers is None or getattr(gm, '_tutorial_paused', False):
+        return
+    try:
+        timers.advance(gm.delta_time if dt is None else dt)
+    except Exception:
+        pass
 
 
 def _process_operation_modules(gm):
-    """Process operation modules (Sum/Mul) when their inputs are ready.
+    """Process operation modules (Sum/Mul) that are fully connected.
 
-    When both input conveyors are ready and an output conveyor exists the
-    module's ``calcular()`` method is invoked.
+    When both input conveyors and an output conveyor exist the module's
+    ``calcular()`` method is invoked; it buffers whichever inputs have
+    arrived and combines every complete pair the output accepts.
     """
     structures = getattr(gm, 'structures', [])
     for struct in structures:
@@ -115,9 +174,7 @@ def _process_operation_modules(gm):
             if hasattr(struct, 'inConveyor1') and hasattr(struct, 'inConveyor2'):
                 conv1 = struct.inConveyor1
                 conv2 = struct.inConveyor2
-                if (conv1 and conv2 and 
-                    hasattr(conv1, 'isReady') and hasattr(conv2, 'isReady') and
-                    conv1.isReady() and conv2.isReady() and
+                if (conv1 and conv2 and
                     hasattr(struct, 'outConveyor') and struct.outConveyor):
                     try:
                         struct.calcular()
@@ -136,6 +193,12 @@ def _tick_and_caption(gm):
 
 def _update_hud(gm):
     """Update the HUD if present, swallowing errors to keep the loop robust."""
+    try:
+        # temporizadores de interfaz (popups, frames de GIF)
+        if getattr(gm, 'ui_timers', None) is not None:
+            gm.ui_timers.advance(gm.delta_time)
+    except Exception:
+        pass
     try:
         if hasattr(gm, 'hud') and gm.hud:
             try:
@@ -146,12 +209,59 @@ def _update_hud(gm):
         pass
 
 
-def update(gm):
-    _handle_input_and_state(gm)
+def simulate(gm, dt=None):
+    """Run one simulation step: queued upgrades, belts, production, modules.
+
+    This is the part of the frame that mutates the world. It is called
+    inline from :func:`update` or from the worker thread in
+    :mod:`gm.simulation` with a fixed ``dt`` (milliseconds).
+    """
     _process_action_buffer(gm)
-    _handle_camera(gm)
-    _update_world(gm)
-    _handle_production(gm)
+    _drain_stream(gm)
+    _update_world(gm, dt)
+    _handle_production(gm, dt)
+    _advance_timers(gm, dt)
     _process_operation_modules(gm)
+    _record_rewind(gm)
+
+
+def _drain_stream(gm):
+    """Place the next chunks of a streamed save (:mod:`gm.stream_loader`), if any."""
+    loader = getattr(gm, 'stream_loader', None)
+    if loader is not None and not loader.done:
+        try:
+            loader.drain()
+        except Exception as e:
+            print(f"Chunk streaming failed: {e}")
+
+
+def _record_rewind(gm):
+    """Close the tick in the rewind buffer (:mod:`gm.rewind`), if enabled."""
+    rewind = getattr(gm, 'rewind', None)
+    if rewind is not None:
+        try:
+            rewind.end_tick()
+        except Exception as e:
+            print(f"Rewind record failed: {e}")
+
+
+def _simulation_running(gm):
+    sim = getattr(gm, 'simulation', None)
+    return sim is not None and sim.is_alive()
+
+
+def update(gm):
+    _handle_input_and_state(gm)
+    if _simulation_running(gm):
+        # El mundo avanza en el hilo de simulación; aquí solo UI y cámara
+        _handle_camera(gm)
+    else:
+        _process_action_buffer(gm)
+        _handle_camera(gm)
+        _drain_stream(gm)
+        _update_world(gm)
+        _handle_production(gm)
+        _advance_timers(gm)
+        _process_operation_modules(gm)
     _tick_and_caption(gm)
     _update_hud(gm)
@@ -5,4 +5,4 @@ project. An explicit __init__ makes the package importable by Sphinx autodoc
 and other tooling.
 """
 
-__all__ = ["map", "cell"]
+__all__ = ["map", "cell", "registry", "free_cells", "chunked_grid"]
@@ -12,6 +12,8 @@ class Cell:
 		structure: Optional reference to a structure object placed in this cell.
 	"""
 
+	__slots__ = ("position", "structure")
+
 	def __init__(self, position: Tuple[int, int]):
 		self.position: Tuple[int, int] = (int(position[0]), int(position[1]))
 		self.structure = None
@@ -0,0 +1,113 @@
+from typing import Dict, Iterator, Optional, Tuple
+
+from .cell import Cell
+from .registry import KIND_MODULE, KIND_ROUTER, kind_of
+
+
+CHUNK_SIZE = 32
+
+# Tipos cuyo update() hace trabajo por tick; minas y pozos no (la producción
+# va por temporizador y el pozo consume en push), así que un chunk con solo
+# minas/pozos duerme y Map.update lo salta.
+TICKING_KINDS = (KIND_MODULE, KIND_ROUTER)
+
+
+class Chunk:
+	"""Square block of ``size``×``size`` cells allocated on first placement.
+
+	Attributes:
+		origin (Tuple[int, int]): Grid coordinates of the top-left cell.
+		cells (list[Cell]): Flat row-major list of the chunk's cells.
+		occupied (dict): ``(x, y) -> structure`` for the non-empty cells.
+		ticking (int): Number of structures that need ``update()`` each tick.
+		version (int): Bumped on every placement or removal in the chunk.
+	"""
+
+	def __init__(self, cx: int, cy: int, size: int = CHUNK_SIZE):
+		self.size = size
+		self.origin = (cx * size, cy * size)
+		ox, oy = self.origin
+		self.cells = [Cell((ox + i % size, oy + i // size)) for i in range(size * size)]
+		self.occupied: Dict[Tuple[int, int], object] = {}
+		self.ticking = 0
+		self.version = 0
+
+	def cell(self, x: int, y: int) -> Cell:
+		return self.cells[(y - self.origin[1]) * self.size + (x - self.origin[0])]
+
+	@property
+	def sleeping(self) -> bool:
+		return self.ticking == 0
+
+
+class ChunkedGrid:
+	"""Sparse grid of :class:`Chunk` objects keyed by chunk coordinates.
+
+	Memory, iteration and serialization scale with the number of chunks
+	that hold structures, not with the map area. Empty chunks are released.
+	``version`` is bumped on every placement or removal in any chunk.
+	"""
+
+	def __init__(self, chunk_size: int = CHUNK_SIZE):
+		self.chunk_size = int(chunk_size)
+		self.chunks: Dict[Tuple[int, int], Chunk] = {}
+		self.version = 0
+
+	def chunk_key(self, x: int, y: int) -> Tuple[int, int]:
+		return (x // self.chunk_size, y // self.chunk_size)
+
+	def get(self, x: int, y: int) -> Optional[Cell]:
+		"""Return the allocated Cell at (x, y) or None if its chunk is not allocated."""
+		chunk = self.chunks.get((x // self.chunk_size, y // self.chunk_size))
+		if chunk is None:
+			return None
+		return chunk.cell(x, y)
+
+	def ensure(self, x: int, y: int) -> Cell:
+		key = self.chunk_key(x, y)
+		chunk = self.chunks.get(key)
+		if chunk is None:
+			chunk = Chunk(key[0], key[1], self.chunk_size)
+			self.chunks[key] = chunk
+		return chunk.cell(x, y)
+
+	def mark_placed(self, x: int, y: int, structure) -> None:
+		chunk = self.chunks.get(self.chunk_key(x, y))
+		if chunk is None:
+			return
+		chunk.occupied[(x, y)] = structure
+		chunk.version += 1
+		self.version += 1
+		if kind_of(structure) in TICKING_KINDS:
+			chunk.ticking += 1
+
+	def mark_removed(self, x: int, y: int, structure) -> None:
+		key = self.chunk_key(x, y)
+		chunk = self.chunks.get(key)
+		if chunk is None:
+			return
+		chunk.occupied.pop((x, y), None)
+		chunk.version += 1
+		self.version += 1
+		if structure is not None and kind_of(structure) in TICKING_KINDS:
+			chunk.ticking = max(0, chunk.ticking - 1)
+		if not chunk.occupied:
+			del self.chunks[key]
+
+	def awake_chunks(self) -> Tuple[Chunk, ...]:
+		return tuple(c for c in tuple(self.chunks.values()) if not c.sleeping)
+
+	def occupied_in_rect(self, x0: int, y0: int, x1: int, y1: int) -> Iterator[Tuple[Tuple[int, int], object]]:
+		"""Yield ``((x, y), structure)`` for occupied cells with x0<=x<=x1, y0<=y<=y1."""
+		size = self.chunk_size
+		for cy in range(y0 // size, y1 // size + 1):
+			for cx in range(x0 // size, x1 // size + 1):
+				chunk = self.chunks.get((cx, cy))
+				if chunk is None:
+					continue
+				for (x, y), structure in tuple(chunk.occupied.items()):
+					if x0 <= x <= x1 and y0 <= y <= y1:
+						yield (x, y), structure
+
+	def __len__(self) -> int:
+		return len(self.chunks)
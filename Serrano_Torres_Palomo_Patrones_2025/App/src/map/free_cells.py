@@ -0,0 +1,163 @@
+import random
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Up to this many cells the free cells are kept in a dense list (exact O(1)
+# uniform choice). Larger maps only track the occupied cells and sample by
+# rejection, so memory scales with structures instead of map area.
+DENSE_FREE_MAX_CELLS = 1 << 16
+_REJECTION_TRIES = 64
+
+
+class FreeCellIndex:
+	"""Set of empty grid cells with O(1) add, remove and random choice.
+
+	Small maps store the free cells in a dense list plus a ``cell -> slot``
+	dict; removal swaps the last cell into the freed slot. Large maps store
+	the occupied cells instead and draw random cells until one is free
+	(expected O(1) while the map is not almost full). :class:`map.map.Map`
+	keeps it in sync from ``placeStructure`` / ``removeStructure``.
+
+	Whole chunks can be reserved (:meth:`reserve`): their cells are not
+	free until :meth:`release`, so nothing is placed where a streamed save
+	(:mod:`gm.stream_loader`) has not put its structures yet.
+	"""
+
+	def __init__(self, width: int, height: int):
+		self.width = int(width)
+		self.height = int(height)
+		self.dense = self.width * self.height <= DENSE_FREE_MAX_CELLS
+		self._cells: List[Tuple[int, int]] = []
+		self._slot: Dict[Tuple[int, int], int] = {}
+		self._occupied: Set[Tuple[int, int]] = set()
+		self._chunk_size = 1
+		self._reserved: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+		self._reserved_free = 0
+		if self.dense:
+			self._cells = [(x, y) for y in range(self.height) for x in range(self.width)]
+			self._slot = {cell: i for i, cell in enumerate(self._cells)}
+
+	def add(self, x: int, y: int) -> None:
+		cell = (int(x), int(y))
+		if not self.dense:
+			self._occupied.discard(cell)
+			return
+		if cell in self._slot or self.is_reserved(*cell):
+			return
+		self._slot[cell] = len(self._cells)
+		self._cells.append(cell)
+
+	def discard(self, x: int, y: int) -> None:
+		cell = (int(x), int(y))
+		if not self.dense:
+			self._occupied.add(cell)
+			return
+		i = self._slot.pop(cell, None)
+		if i is None:
+			return
+		last = self._cells.pop()
+		if last != cell:
+			self._cells[i] = last
+			self._slot[last] = i
+
+	def _chunk_cells(self, key: Tuple[int, int]) -> List[Tuple[int, int]]:
+		size = self._chunk_size
+		x0, y0 = key[0] * size, key[1] * size
+		return [(x, y) for y in range(max(0, y0), min(self.height, y0 + size))
+				for x in range(max(0, x0), min(self.width, x0 + size))]
+
+	def reserve(self, keys: Iterable[Tuple[int, int]], chunk_size: int) -> None:
+		"""Take the cells of the ``chunk_size`` chunks ``keys`` out of the free set."""
+		if not self._reserved:
+			self._chunk_size = int(chunk_size)
+		for key in keys:
+			key = (int(key[0]), int(key[1]))
+			if key in self._reserved:
+				continue
+			if self.dense:
+				held = [cell for cell in self._chunk_cells(key) if cell in self._slot]
+				for cell in held:
+					self.discard(*cell)
+			else:
+				held = [cell for cell in self._chunk_cells(key) if cell not in self._occupied]
+				self._reserved_free += len(held)
+			self._reserved[key] = held
+
+	def release(self, key: Tuple[int, int]) -> None:
+		"""Give back the cells of a reserved chunk."""
+		held = self._reserved.pop((int(key[0]), int(key[1])), None)
+		if held is None:
+			return
+		if self.dense:
+			for cell in held:
+				self.add(*cell)
+		else:
+			self._reserved_free -= len(held)
+
+	def is_reserved(self, x: int, y: int) -> bool:
+		if not self._reserved:
+			return False
+		size = self._chunk_size
+		return (int(x) // size, int(y) // size) in self._reserved
+
+	def __contains__(self, cell) -> bool:
+		cell = (int(cell[0]), int(cell[1]))
+		if self.dense:
+			return cell in self._slot
+		return (0 <= cell[0] < self.width and 0 <= cell[1] < self.height
+				and cell not in self._occupied and not self.is_reserved(*cell))
+
+	def __len__(self) -> int:
+		if self.dense:
+			return len(self._cells)
+		return self.width * self.height - len(self._occupied) - self._reserved_free
+
+	def random_cell(self, rng=None) -> Optional[Tuple[int, int]]:
+		"""Uniformly random free cell, or None when the map is full."""
+		rng = rng or random
+		if self.dense:
+			if not self._cells:
+				return None
+			return self._cells[rng.randrange(len(self._cells))]
+
+		if len(self) <= 0:
+			return None
+		for _ in range(_REJECTION_TRIES):
+			cell = (rng.randrange(self.width), rng.randrange(self.height))
+			if cell in self:
+				return cell
+		# mapa casi lleno: elegir entre las celdas libres explícitamente
+		free = [(x, y) for y in range(self.height) for x in range(self.width) if (x, y) in self]
+		return free[rng.randrange(len(free))] if free else None
+
+	def nearest_to(self, sources: Iterable[Tuple[int, int]], rng=None) -> Optional[Tuple[int, int]]:
+		"""Free cell closest (4-neighbour steps) to any of ``sources``.
+
+		Multi-source BFS that stops at the first ring containing a free cell;
+		ties within that ring are broken at random. Falls back to
+		:meth:`random_cell` when there are no sources.
+		"""
+		rng = rng or random
+		seen = set()
+		frontier = deque()
+		for cell in sources:
+			cell = (int(cell[0]), int(cell[1]))
+			if 0 <= cell[0] < self.width and 0 <= cell[1] < self.height and cell not in seen:
+				seen.add(cell)
+				frontier.append(cell)
+		if not frontier:
+			return self.random_cell(rng)
+
+		while frontier:
+			ring = [cell for cell in frontier if cell in self]
+			if ring:
+				return ring[rng.randrange(len(ring))]
+			nxt = deque()
+			for x, y in frontier:
+				for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+					if 0 <= nx < self.width and 0 <= ny < self.height and (nx, ny) not in seen:
+						seen.add((nx, ny))
+						nxt.append((nx, ny))
+			frontier = nxt
+		return None
@@ -1,15 +1,65 @@
-import json
 import os
 import logging
 from typing import Optional, Tuple, Dict, Any
 import pygame as pg
 
 from patterns.singleton import Singleton
-from settings import CELL_SIZE_PX
+from settings import CELL_SIZE_PX, SAVE_COMPRESS
 from .cell import Cell
+from .registry import StructureRegistry, KIND_MINE
+from .free_cells import FreeCellIndex
+from .chunked_grid import ChunkedGrid, CHUNK_SIZE
+from .save_format import read_save, write_save
 
 _logger = logging.getLogger(__name__)
 
+# Maps up to this many cells are saved with the legacy dense "grid" rows;
+# larger ones store only the occupied cells in a sparse "cells" list.
+DENSE_SAVE_MAX_CELLS = 64 * 64
+
+
+class _RowView:
+	"""Read-only row ``cells[y]`` of :class:`_CellsView`."""
+
+	def __init__(self, grid_map, y: int):
+		self._map = grid_map
+		self._y = y
+
+	def __len__(self) -> int:
+		return self._map.width
+
+	def __getitem__(self, x: int) -> Cell:
+		if not 0 <= x < self._map.width:
+			raise IndexError(x)
+		return self._map.getCell(x, self._y)
+
+	def __iter__(self):
+		for x in range(self._map.width):
+			yield self._map.getCell(x, self._y)
+
+
+class _CellsView:
+	"""Dense ``cells[y][x]`` view over the chunked storage, for compatibility.
+
+	Iterating it visits every cell of the map (O(width × height)); prefer
+	:meth:`Map.iter_structures` or :meth:`Map.structures_in_rect`.
+	"""
+
+	def __init__(self, grid_map):
+		self._map = grid_map
+
+	def __len__(self) -> int:
+		return self._map.height
+
+	def __getitem__(self, y: int) -> _RowView:
+		if not 0 <= y < self._map.height:
+			raise IndexError(y)
+		return _RowView(self._map, y)
+
+	def __iter__(self):
+		for y in range(self._map.height):
+			yield _RowView(self._map, y)
+
 
 
 class Map(Singleton):
@@ -18,7 +68,12 @@ class Map(Singleton):
 	Attributes:
 		width (int): Number of columns (x).
 		height (int): Number of rows (y).
-		cells (list[list[Cell]]): 2D list of Cell instances indexed as cells[y][x].
+		cells: Read-only ``cells[y][x]`` view kept for compatibility; storage
+			is a :class:`map.chunked_grid.ChunkedGrid` whose chunks are only
+			allocated where structures are placed.
+		registry (StructureRegistry): Per-type and per-position index of the
+			placed structures, kept in sync by place/removeStructure.
+		free_cells (FreeCellIndex): Empty cells, for O(1) random placement.
 	"""
 
 	def __init__(self, width: int = 10, height: int = 10):
@@ -28,7 +83,10 @@ class Map(Singleton):
 
 		self.width = int(width)
 		self.height = int(height)
-		self.cells = [[Cell((x, y)) for x in range(self.width)] for y in range(self.height)]
+		self.grid = ChunkedGrid(CHUNK_SIZE)
+		self.cells = _CellsView(self)
+		self.registry = StructureRegistry()
+		self.free_cells = FreeCellIndex(self.width, self.height)
 
 		self._initialized = True
 
@@ -39,11 +97,19 @@ class Map(Singleton):
 		"""Return the Cell at grid coordinates (x, y) or None if out of bounds."""
 		if not self.isInsideBounds(x, y):
 			return None
-		return self.cells[y][x]
+		cell = self.grid.get(x, y)
+		if cell is None:
+			# chunk sin reservar: celda vacía temporal (solo lectura)
+			return Cell((x, y))
+		return cell
 
 	def placeStructure(self, x: int, y: int, structure) -> bool:
 		"""Place ``structure`` into the cell at ``(x, y)`` if it is empty.
 
+		Cells of chunks reserved for a streamed save (see
+		:meth:`FreeCellIndex.reserve <map.free_cells.FreeCellIndex.reserve>`)
+		are rejected until the chunk is released.
+
 		If placement succeeds the method attempts to record grid coordinates on
 		the structure using a best-effort approach (``grid_position`` attribute
 		preferred, or ``position`` when the structure signals it expects grid
@@ -52,11 +118,19 @@ class Map(Singleton):
 		Returns:
 			bool: True if placement succeeded, False otherwise.
 		"""
-		cell = self.getCell(x, y)
-		if cell is None or not cell.isEmpty():
+		if not self.isInsideBounds(x, y):
+			return False
+		if self.free_cells.is_reserved(x, y):
+			# chunk de un guardado que aún se está cargando
+			return False
+		cell = self.grid.ensure(x, y)
+		if not cell.isEmpty():
 			return False
 
 		cell.setStructure(structure)
+		self.grid.mark_placed(x, y, structure)
+		self.registry.add(x, y, structure)
+		self.free_cells.discard(x, y)
 		try:
 			if hasattr(structure, "grid_position"):
 				structure.grid_position = (x, y)
@@ -70,67 +144,112 @@ class Map(Singleton):
 
 	def removeStructure(self, x: int, y: int):
 		"""Remove and return the structure at (x, y) or None if empty/out of bounds."""
-		cell = self.getCell(x, y)
+		if not self.isInsideBounds(x, y):
+			return None
+		cell = self.grid.get(x, y)
 		if cell is None:
 			return None
-		return cell.removeStructure()
+		structure = cell.removeStructure()
+		self.registry.remove(structure)
+		if structure is not None:
+			self.grid.mark_removed(x, y, structure)
+			self.free_cells.add(x, y)
+		return structure
+
+	def structures_of(self, kind: str) -> Tuple:
+		"""Return the placed structures of ``kind`` (see :mod:`map.registry`)."""
+		return self.registry.of_kind(kind)
+
+	def iter_structures(self) -> Tuple:
+		"""Return ``((x, y), structure)`` for every placed structure."""
+		return self.registry.items()
+
+	def structures_in_rect(self, x0: int, y0: int, x1: int, y1: int) -> Tuple:
+		"""Return ``((x, y), structure)`` for structures inside the inclusive cell rectangle."""
+		x0, y0 = max(0, int(x0)), max(0, int(y0))
+		x1, y1 = min(self.width - 1, int(x1)), min(self.height - 1, int(y1))
+		if x1 < x0 or y1 < y0:
+			return ()
+		return tuple(self.grid.occupied_in_rect(x0, y0, x1, y1))
 
 	def update(self) -> None:
-		"""Call update() on every structure placed in the map (if available)."""
-		for row in self.cells:
-			for cell in row:
-				if not cell.isEmpty():
-					s = cell.structure
-					if hasattr(s, "update"):
-						try:
-							s.update()
-						except Exception:
-							_logger.exception("Exception while updating structure %s", type(s))
+		"""Call update() on the structures of awake chunks.
+
+		Chunks holding only mines and wells (whose update is a no-op) are
+		sleeping and skipped; see :data:`map.chunked_grid.TICKING_KINDS`.
+		"""
+		for chunk in self.grid.awake_chunks():
+			for s in tuple(chunk.occupied.values()):
+				if hasattr(s, "update"):
+					try:
+						s.update()
+					except Exception:
+						_logger.exception("Exception while updating structure %s", type(s))
 
 	# --- simple persistence helpers ---
+	@staticmethod
+	def _structure_entry(s) -> Dict:
+		entry = {"class": s.__class__.__name__}
+		# common numeric attributes used by current structures
+		if hasattr(s, "number"):
+			entry["number"] = getattr(s, "number")
+		if hasattr(s, "consumingNumber"):
+			entry["consumingNumber"] = getattr(s, "consumingNumber")
+		# support serializing locked state for structures that expose it (e.g., Well)
+		if hasattr(s, "locked"):
+			try:
+				entry["locked"] = bool(getattr(s, "locked"))
+			except Exception:
+				entry["locked"] = False
+		return entry
+
 	def to_dict(self) -> Dict:
 		"""Serialize map layout to a JSON-friendly dictionary.
 
 		The representation is intentionally conservative and stores only simple
 		attributes needed to later reconstruct instances via creator objects.
+		Maps up to :data:`DENSE_SAVE_MAX_CELLS` cells keep the dense ``grid``
+		rows; larger maps store a sparse ``cells`` list of occupied cells
+		(``{"x", "y", "class", ...}``) so the file scales with structures.
 		"""
-		grid = []
-		for row in self.cells:
-			row_data = []
-			for cell in row:
-				if cell.isEmpty():
-					row_data.append(None)
-				else:
-					s = cell.structure
-					entry = {"class": s.__class__.__name__}
-					# common numeric attributes used by current structures
-					if hasattr(s, "number"):
-						entry["number"] = getattr(s, "number")
-					if hasattr(s, "consumingNumber"):
-						entry["consumingNumber"] = getattr(s, "consumingNumber")
-					# support serializing locked state for structures that expose it (e.g., Well)
-					if hasattr(s, "locked"):
-						try:
-							entry["locked"] = bool(getattr(s, "locked"))
-						except Exception:
-							entry["locked"] = False
-					row_data.append(entry)
-			grid.append(row_data)
-
-		return {"width": self.width, "height": self.height, "grid": grid}
+		if self.width * self.height <= DENSE_SAVE_MAX_CELLS:
+			grid = [[None] * self.width for _ in range(self.height)]
+			for (x, y), s in self.iter_structures():
+				grid[y][x] = self._structure_entry(s)
+			return {"width": self.width, "height": self.height, "grid": grid}
+
+		cells = []
+		for (x, y), s in sorted(self.iter_structures(), key=lambda item: (item[0][1], item[0][0])):
+			entry = {"x": x, "y": y}
+			entry.update(self._structure_entry(s))
+			cells.append(entry)
+		return {"width": self.width, "height": self.height, "cells": cells}
+
+	@staticmethod
+	def iter_saved_entries(data: Dict):
+		"""Yield ``(x, y, entry)`` for every structure in a :meth:`to_dict` payload (dense or sparse)."""
+		if "cells" in data:
+			for entry in data.get("cells", []):
+				if entry:
+					yield int(entry["x"]), int(entry["y"]), entry
+			return
+		for y, row in enumerate(data.get("grid", [])):
+			for x, entry in enumerate(row):
+				if entry:
+					yield x, y, entry
 
 	def save_to_file(self, filepath: str) -> None:
-		"""Save the current map layout to ``filepath`` as JSON."""
+		"""Save the current map layout to ``filepath`` (see :mod:`map.save_format`)."""
 		os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
-		with open(filepath, "w", encoding="utf-8") as fh:
-			json.dump(self.to_dict(), fh, indent=2)
+		write_save(filepath, self.to_dict(), compress=SAVE_COMPRESS)
 
 	@classmethod
 	def load_from_file(cls, filepath: str, creators: Dict[str, object] = None, gameManager=None) -> "Map":
 		"""Load a map from ``filepath`` and optionally recreate structures.
 
 		Args:
-			filepath: Path to the JSON file previously produced by :meth:`to_dict`.
+			filepath: Path to a save file of any format version; legacy dense
+				JSON files are detected by :func:`map.save_format.read_save`.
 			creators: Optional mapping from structure class name to a creator
 				object exposing a ``createStructure(...)`` method used to
 				reconstruct instances.
@@ -140,68 +259,92 @@ class Map(Singleton):
 		Returns:
 			Map: A Map instance populated according to the file contents.
 		"""
-		with open(filepath, "r", encoding="utf-8") as fh:
-			data = json.load(fh)
+		data = read_save(filepath)
+		m = cls.from_dict(data, creators=creators, gameManager=gameManager)
+		# Load conveyors if present and a gameManager is available
+		if data.get("conveyors") and gameManager:
+			gameManager.conveyors = cls.build_conveyors(data, gameManager)
+		return m
 
+	@classmethod
+	def from_dict(cls, data: Dict, creators: Dict[str, object] = None, gameManager=None, on_place=None) -> "Map":
+		"""Create a Map from a parsed save dict and place its structures.
+
+		Args:
+			data: In-memory save layout (see :func:`map.save_format.read_save`).
+			creators: Mapping from structure class name to creator, as in
+				:meth:`load_from_file`.
+			gameManager: Optional game manager passed through to creators.
+			on_place: Optional ``on_place(structure)`` callback invoked right
+				after each structure is placed.
+		"""
 		m = cls(int(data.get("width", 0)), int(data.get("height", 0)))
-		grid = data.get("grid", [])
-		for y, row in enumerate(grid):
-			for x, entry in enumerate(row):
-				if not entry:
-					continue
-				cls_name = entry.get("class")
-				if creators and cls_name in creators:
-					creator = creators[cls_name]
-					# Best-effort argument dispatch for known attributes
-					if cls_name == "Mine" and "number" in entry:
-						struct = creator.createStructure((x, y), entry["number"], gameManager)
-					elif cls_name == "Well" and "consumingNumber" in entry:
-						locked_flag = entry.get('locked', False)
-						struct = creator.createStructure((x, y), entry["consumingNumber"], gameManager, locked=locked_flag)
-					else:
-						# fallback: try a few common creator signatures
-						struct = None
-						try:
-							struct = creator.createStructure((x, y), gameManager)
-						except TypeError:
-							try:
-								struct = creator.createStructure((x, y))
-							except TypeError:
-								struct = None
+		m.place_entries(cls.iter_saved_entries(data), creators, gameManager, on_place)
+		return m
 
-					if struct is not None:
-						m.placeStructure(x, y, struct)
+	def place_entries(self, entries, creators: Dict[str, object] = None, gameManager=None, on_place=None) -> list:
+		"""Create and place saved structures given as ``(x, y, entry)`` triples.
 
-		# Load conveyors if present and a gameManager is available
+		Used by :meth:`from_dict` and by the chunk-streaming loader
+		(:mod:`gm.stream_loader`). Returns the structures that were placed.
+		"""
+		placed = []
+		for x, y, entry in entries:
+			cls_name = entry.get("class")
+			if creators and cls_name in creators:
+				creator = creators[cls_name]
+				# Best-effort argument dispatch for known attributes
+				if cls_name == "Mine" and "number" in entry:
+					struct = creator.createStructure((x, y), entry["number"], gameManager)
+				elif cls_name == "Well" and "consumingNumber" in entry:
+					locked_flag = entry.get('locked', False)
+					struct = creator.createStructure((x, y), entry["consumingNumber"], gameManager, locked=locked_flag)
+				else:
+					# fallback: try a few common creator signatures
+					struct = None
+					try:
+						struct = creator.createStructure((x, y), gameManager)
+					except TypeError:
+						try:
+							struct = creator.createStructure((x, y))
+						except TypeError:
+							struct = None
+
+				if struct is not None and self.placeStructure(x, y, struct):
+					placed.append(struct)
+					if on_place is not None:
+						on_place(struct)
+		return placed
+
+	@staticmethod
+	def build_conveyors(data: Dict, gameManager) -> list:
+		"""Create the conveyors listed in a parsed save dict."""
+		from core.conveyor import Conveyor  # local import to avoid cycles
 		conveyors_data = data.get("conveyors", [])
 		_logger.debug("Found %d conveyors in save file", len(conveyors_data))
-		if conveyors_data and gameManager:
-			from core.conveyor import Conveyor  # local import to avoid cycles
-			conveyors_list = []
-			for conv_data in conveyors_data:
-				start_grid = conv_data.get("start")
-				end_grid = conv_data.get("end")
-				travel_time = conv_data.get("travel_time", 2000)
-
-				if start_grid and end_grid:
-					start_pos = pg.Vector2(
-						start_grid[0] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
-						start_grid[1] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
-					)
-					end_pos = pg.Vector2(
-						end_grid[0] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
-						end_grid[1] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
-					)
-
-					conv = Conveyor(start_pos, end_pos, gameManager)
-					conv.travel_time = travel_time if travel_time else 2000
-					conveyors_list.append(conv)
-					_logger.debug("Created conveyor from %s to %s", start_grid, end_grid)
-
-			gameManager.conveyors = conveyors_list
-			_logger.debug("Stored %d conveyors in gameManager", len(conveyors_list))
-
-		return m
+		conveyors_list = []
+		for conv_data in conveyors_data:
+			start_grid = conv_data.get("start")
+			end_grid = conv_data.get("end")
+			travel_time = conv_data.get("travel_time", 2000)
+
+			if start_grid and end_grid:
+				start_pos = pg.Vector2(
+					start_grid[0] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
+					start_grid[1] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
+				)
+				end_pos = pg.Vector2(
+					end_grid[0] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
+					end_grid[1] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
+				)
+
+				conv = Conveyor(start_pos, end_pos, gameManager)
+				conv.travel_time = travel_time if travel_time else 2000
+				conveyors_list.append(conv)
+				_logger.debug("Created conveyor from %s to %s", start_grid, end_grid)
+
+		_logger.debug("Created %d conveyors", len(conveyors_list))
+		return conveyors_list
 
 	def reconnect_structures(self, conveyors, game_manager=None):
 		"""Re-establish connections between structures and conveyors.
@@ -219,29 +362,26 @@ class Map(Singleton):
 		"""
 
 		def find_structure_at(grid_x: int, grid_y: int):
-			if 0 <= grid_y < len(self.cells) and 0 <= grid_x < len(self.cells[grid_y]):
-				cell = self.cells[grid_y][grid_x]
-				if not cell.isEmpty():
-					return cell.structure
-			return None
+			return self.registry.at(grid_x, grid_y)
 
 		# Clear previous input/output references on structures
-		for row in self.cells:
-			for cell in row:
-				if not cell.isEmpty():
-					struct = cell.structure
-					if hasattr(struct, 'input1'):
-						struct.input1 = None
-					if hasattr(struct, 'input2'):
-						struct.input2 = None
-					if hasattr(struct, 'inputConveyor1'):
-						struct.inputConveyor1 = None
-					if hasattr(struct, 'inputConveyor2'):
-						struct.inputConveyor2 = None
-					if hasattr(struct, 'output'):
-						struct.output = None
-					if hasattr(struct, 'outputConveyor'):
-						struct.outputConveyor = None
+		for _, struct in self.iter_structures():
+			if hasattr(struct, 'input1'):
+				struct.input1 = None
+			if hasattr(struct, 'input2'):
+				struct.input2 = None
+			if hasattr(struct, 'inputConveyor1'):
+				struct.inputConveyor1 = None
+			if hasattr(struct, 'inputConveyor2'):
+				struct.inputConveyor2 = None
+			if hasattr(struct, 'output'):
+				struct.output = None
+			if hasattr(struct, 'outputConveyor'):
+				struct.outputConveyor = None
+			if hasattr(struct, 'extra_inputs'):
+				struct.extra_inputs = []
+			if hasattr(struct, 'extra_outputs'):
+				struct.extra_outputs = []
 
 		# Collect conveyors per structure
 		struct_connections: Dict[Any, Dict[str, list]] = {}
@@ -289,6 +429,9 @@ class Map(Singleton):
 					struct.connectInput1(inputs[0])
 				if len(inputs) >= 2 and hasattr(struct, 'connectInput2'):
 					struct.connectInput2(inputs[1])
+				if hasattr(struct, 'connectExtraInput'):
+					for conv in inputs[2:]:
+						struct.connectExtraInput(conv)
 				if outputs and hasattr(struct, 'connectOutput'):
 					struct.connectOutput(outputs[0])
 
@@ -299,6 +442,9 @@ class Map(Singleton):
 					struct.connectOutput1(outputs[0])
 				if len(outputs) >= 2 and hasattr(struct, 'connectOutput2'):
 					struct.connectOutput2(outputs[1])
+				if hasattr(struct, 'connectExtraOutput'):
+					for conv in outputs[2:]:
+						struct.connectExtraOutput(conv)
 
 		# Connect conveyors to each other when endpoints match and there is no structure
 		for conv in conveyors:
@@ -316,12 +462,9 @@ class Map(Singleton):
 		# When provided, set some convenient references on the game manager
 		if game_manager is not None:
 			# find a Mine structure if present
-			for row in self.cells:
-				for cell in row:
-					if not cell.isEmpty() and cell.structure.__class__.__name__ == 'Mine':
-						game_manager.mine = cell.structure
-						break
-				if hasattr(game_manager, 'mine') and game_manager.mine:
+			for struct in self.structures_of(KIND_MINE):
+				if struct.__class__.__name__ == 'Mine':
+					game_manager.mine = struct
 					break
 
 			game_manager.final_conveyor = None
@@ -329,10 +472,10 @@ class Map(Singleton):
 			for conv in conveyors:
 				end_grid_x = int(conv.end_pos.x) // CELL_SIZE_PX
 				end_grid_y = int(conv.end_pos.y) // CELL_SIZE_PX
-				if 0 <= end_grid_y < len(self.cells) and 0 <= end_grid_x < len(self.cells[end_grid_y]):
-					cell = self.cells[end_grid_y][end_grid_x]
-					if not cell.isEmpty() and cell.structure.__class__.__name__ == 'Well':
+				if self.isInsideBounds(end_grid_x, end_grid_y):
+					struct = self.registry.at(end_grid_x, end_grid_y)
+					if struct is not None and struct.__class__.__name__ == 'Well':
 						game_manager.final_conveyor = conv
-						game_manager.well = cell.structure
+						game_manager.well = struct
 						break
 
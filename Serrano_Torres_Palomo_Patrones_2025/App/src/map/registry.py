@@ -0,0 +1,98 @@
+from typing import Any, Dict, Optional, Tuple
+
+
+KIND_MINE = "mine"
+KIND_WELL = "well"
+KIND_MODULE = "module"
+KIND_ROUTER = "router"
+KIND_OTHER = "other"
+
+KINDS = (KIND_MINE, KIND_WELL, KIND_MODULE, KIND_ROUTER, KIND_OTHER)
+
+
+def unwrap(structure):
+	"""Follow decorator ``target`` links down to the concrete structure."""
+	base = structure
+	try:
+		while hasattr(base, "target"):
+			base = base.target
+	except Exception:
+		pass
+	return base
+
+
+def kind_of(structure) -> str:
+	"""Classify ``structure`` (after unwrapping decorators) by its class name."""
+	name = unwrap(structure).__class__.__name__.lower()
+	if "mine" in name:
+		return KIND_MINE
+	if "well" in name:
+		return KIND_WELL
+	if any(x in name for x in ("sum", "mul", "div", "operation")):
+		return KIND_MODULE
+	if "merger" in name or "splitter" in name:
+		return KIND_ROUTER
+	return KIND_OTHER
+
+
+class StructureRegistry:
+	"""Per-type and per-position index of the structures placed on a Map.
+
+	Kept in sync by :meth:`Map.placeStructure` / :meth:`Map.removeStructure`
+	so callers can enumerate mines, wells, modules or routers in O(k)
+	instead of scanning every cell.
+
+	Buckets are insertion-ordered dicts (structure -> position). Accessors
+	return tuples, so the render thread can iterate them while the
+	simulation thread places or removes structures.
+	"""
+
+	def __init__(self):
+		self._by_kind: Dict[str, Dict[Any, Tuple[int, int]]] = {k: {} for k in KINDS}
+		self._by_position: Dict[Tuple[int, int], Any] = {}
+		self._kind_of: Dict[int, str] = {}
+
+	def add(self, x: int, y: int, structure) -> None:
+		kind = kind_of(structure)
+		pos = (int(x), int(y))
+		self._by_kind[kind][structure] = pos
+		self._by_position[pos] = structure
+		self._kind_of[id(structure)] = kind
+
+	def remove(self, structure) -> None:
+		if structure is None:
+			return
+		kind = self._kind_of.pop(id(structure), None)
+		if kind is None:
+			return
+		pos = self._by_kind[kind].pop(structure, None)
+		if pos is not None and self._by_position.get(pos) is structure:
+			del self._by_position[pos]
+
+	def clear(self) -> None:
+		for bucket in self._by_kind.values():
+			bucket.clear()
+		self._by_position.clear()
+		self._kind_of.clear()
+
+	def of_kind(self, kind: str) -> Tuple[Any, ...]:
+		return tuple(self._by_kind.get(kind, ()))
+
+	def at(self, x: int, y: int):
+		return self._by_position.get((int(x), int(y)))
+
+	def position_of(self, structure) -> Optional[Tuple[int, int]]:
+		kind = self._kind_of.get(id(structure))
+		if kind is None:
+			return None
+		return self._by_kind[kind].get(structure)
+
+	def items(self) -> Tuple[Tuple[Tuple[int, int], Any], ...]:
+		"""``((x, y), structure)`` pairs for every placed structure."""
+		return tuple(self._by_position.items())
+
+	def __len__(self) -> int:
+		return len(self._by_position)
+
+	def __contains__(self, structure) -> bool:
+		return id(structure) in self._kind_of
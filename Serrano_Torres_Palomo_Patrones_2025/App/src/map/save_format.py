@@ -0,0 +1,386 @@
+"""Versioned on-disk save format.
+
+Version 1 (legacy, no ``"version"`` key) is the pretty-printed output of
+:meth:`map.map.Map.to_dict` plus ``conveyors``/``score``/``upgrades``. It is
+either a dense ``grid`` of ``height`` rows of ``width`` entries, mostly
+``null``, or a sparse ``cells`` list.
+
+Version 2 stores only what exists::
+
+    {"version": 2, "width": W, "height": H,
+     "structures": [{"class": "Mine", "x": 3, "y": 4, "number": 2}, ...],
+     "conveyors": [{"from": 0, "to": [7, 4], "travel_time": 2000}, ...],
+     "score": ..., "upgrades": {...}}
+
+A conveyor endpoint is the index of a structure in ``structures`` when one
+sits in that cell, or a bare ``[x, y]`` cell for belt-to-belt junctions. The
+JSON is written without indentation and, with ``SAVE_COMPRESS``, wrapped in
+zlib behind a ``PSLZ`` magic header. :func:`read_save` detects all of these
+and always returns the in-memory layout the loaders already use (sparse
+``cells`` plus conveyors with ``start``/``end`` cells).
+
+Version 3 is the chunk-streamed layout used for large maps (at least
+``SAVE_CHUNKED_MIN_STRUCTURES`` structures)::
+
+    b"PSLC" | header length (4 bytes, big endian) | header JSON | records
+
+The header holds ``width``/``height``, ``chunk_size``, every key other than
+structures and conveyors (score, upgrades, state), and an index of records
+whose offsets are relative to the end of the header::
+
+    {"version": 3, "chunk_size": 32, "compressed": false,
+     "chunks": [[cx, cy, offset, length, count], ...],
+     "conveyors": [offset, length], ...}
+
+Each chunk record is the JSON list of the structures in that
+:class:`map.chunked_grid.Chunk`; the conveyors record lists every belt with
+``[x, y]`` endpoints. :class:`ChunkedSave` memory-maps the file and decodes
+single records on demand, so a loader can place the chunks around the
+camera first and stream the rest (see :mod:`gm.stream_loader`).
+"""
+
+import json
+import mmap
+import os
+import shutil
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from settings import SAVE_CHUNKED_MIN_STRUCTURES
+from .chunked_grid import CHUNK_SIZE
+
+SAVE_FORMAT_VERSION = 2
+CHUNKED_FORMAT_VERSION = 3
+ZLIB_MAGIC = b"PSLZ"
+CHUNKED_MAGIC = b"PSLC"
+_HEADER_LEN = struct.Struct(">I")
+
+
+def _conveyor_cells(conv: Dict):
+    return tuple(conv.get("start") or ()), tuple(conv.get("end") or ())
+
+
+def to_payload(data: Dict) -> Dict:
+    """Convert an in-memory save dict (dense or sparse) into the version 2 schema."""
+    from .map import Map  # local import to avoid cycles
+
+    structures = []
+    ids = {}
+    for x, y, entry in sorted(Map.iter_saved_entries(data), key=lambda item: (item[1], item[0])):
+        item = {"class": entry.get("class"), "x": x, "y": y}
+        item.update((k, v) for k, v in entry.items() if k not in ("class", "x", "y"))
+        ids[(x, y)] = len(structures)
+        structures.append(item)
+
+    def endpoint(cell):
+        cell = (int(cell[0]), int(cell[1]))
+        return ids.get(cell, list(cell))
+
+    conveyors = []
+    for conv in data.get("conveyors", []):
+        start, end = _conveyor_cells(conv)
+        if len(start) != 2 or len(end) != 2:
+            continue
+        conveyors.append({"from": endpoint(start), "to": endpoint(end), "travel_time": conv.get("travel_time")})
+
+    payload = {
+        "version": SAVE_FORMAT_VERSION,
+        "width": int(data.get("width", 0)),
+        "height": int(data.get("height", 0)),
+        "structures": structures,
+        "conveyors": conveyors,
+    }
+    for key, value in data.items():
+        if key not in payload and key not in ("grid", "cells"):
+            payload[key] = value
+    return payload
+
+
+def from_payload(payload: Dict) -> Dict:
+    """Convert a parsed save of any version into the in-memory layout."""
+    version = int(payload.get("version", 1))
+    if version < 2:
+        return payload
+    if version > SAVE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported save format version {version}")
+
+    structures = payload.get("structures", [])
+
+    def cell(endpoint):
+        if isinstance(endpoint, int):
+            s = structures[endpoint]
+            return [int(s["x"]), int(s["y"])]
+        return [int(endpoint[0]), int(endpoint[1])]
+
+    data = {k: v for k, v in payload.items() if k not in ("version", "structures", "conveyors")}
+    data["cells"] = [dict(s) for s in structures]
+    data["conveyors"] = [
+        {"start": cell(c["from"]), "end": cell(c["to"]), "travel_time": c.get("travel_time")}
+        for c in payload.get("conveyors", [])
+    ]
+    return data
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def encode_chunked(data: Dict, compress: bool = False, chunk_size: int = CHUNK_SIZE) -> bytes:
+    """Serialize an in-memory save dict in the chunk-streamed version 3 layout."""
+    from .map import Map  # local import to avoid cycles
+
+    by_chunk: Dict[Tuple[int, int], List[Dict]] = {}
+    for x, y, entry in Map.iter_saved_entries(data):
+        item = {"class": entry.get("class"), "x": x, "y": y}
+        item.update((k, v) for k, v in entry.items() if k not in ("class", "x", "y"))
+        by_chunk.setdefault((x // chunk_size, y // chunk_size), []).append(item)
+
+    conveyors = []
+    for conv in data.get("conveyors", []):
+        start, end = _conveyor_cells(conv)
+        if len(start) == 2 and len(end) == 2:
+            conveyors.append([int(start[0]), int(start[1]), int(end[0]), int(end[1]), conv.get("travel_time")])
+
+    records = []
+    offset = 0
+
+    def record(value) -> Tuple[int, int]:
+        nonlocal offset
+        raw = _dumps(value)
+        if compress:
+            raw = zlib.compress(raw)
+        records.append(raw)
+        offset += len(raw)
+        return offset - len(raw), len(raw)
+
+    index = []
+    for (cx, cy), items in sorted(by_chunk.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        start, length = record(items)
+        index.append([cx, cy, start, length, len(items)])
+
+    header = {
+        "version": CHUNKED_FORMAT_VERSION,
+        "width": int(data.get("width", 0)),
+        "height": int(data.get("height", 0)),
+        "chunk_size": int(chunk_size),
+        "compressed": bool(compress),
+        "chunks": index,
+        "conveyors": list(record(conveyors)),
+    }
+    for key, value in data.items():
+        if key not in header and key not in ("grid", "cells"):
+            header[key] = value
+    raw_header = _dumps(header)
+    return b"".join([CHUNKED_MAGIC, _HEADER_LEN.pack(len(raw_header)), raw_header] + records)
+
+
+class ChunkedSave:
+    """Random access to the records of a version 3 (chunk-streamed) save.
+
+    ``buffer`` is anything supporting slicing (bytes or an ``mmap``); use
+    :meth:`open` to memory-map a file, so only the pages of the records
+    actually read are loaded. Reading records is safe from any thread.
+    """
+
+    def __init__(self, buffer, handle=None):
+        if bytes(buffer[:len(CHUNKED_MAGIC)]) != CHUNKED_MAGIC:
+            raise ValueError("Not a chunked save")
+        start = len(CHUNKED_MAGIC)
+        (size,) = _HEADER_LEN.unpack(bytes(buffer[start:start + _HEADER_LEN.size]))
+        start += _HEADER_LEN.size
+        self.header: Dict = json.loads(bytes(buffer[start:start + size]).decode("utf-8"))
+        version = int(self.header.get("version", 0))
+        if version != CHUNKED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported save format version {version}")
+        self._buffer = buffer
+        self._handle = handle
+        self._body = start + size
+        self.chunk_size = int(self.header.get("chunk_size", CHUNK_SIZE))
+        self.index: Dict[Tuple[int, int], Tuple[int, int, int]] = {
+            (int(cx), int(cy)): (int(off), int(length), int(count))
+            for cx, cy, off, length, count in self.header.get("chunks", [])
+        }
+
+    @classmethod
+    def open(cls, filepath) -> "ChunkedSave":
+        """Memory-map ``filepath``; call :meth:`close` when done with it."""
+        fh = open(filepath, "rb")
+        try:
+            buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            fh.close()
+            raise
+        try:
+            return cls(buffer, fh)
+        except Exception:
+            buffer.close()
+            fh.close()
+            raise
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._buffer.close()
+            self._handle.close()
+            self._handle = None
+
+    def _record(self, offset: int, length: int):
+        raw = bytes(self._buffer[self._body + offset:self._body + offset + length])
+        if self.header.get("compressed"):
+            raw = zlib.decompress(raw)
+        return json.loads(raw.decode("utf-8"))
+
+    @property
+    def meta(self) -> Dict:
+        """The save without structures and conveyors (size, score, upgrades, state)."""
+        return {k: v for k, v in self.header.items()
+                if k not in ("version", "chunk_size", "compressed", "chunks", "conveyors")}
+
+    def chunk_keys(self) -> List[Tuple[int, int]]:
+        return list(self.index)
+
+    def read_chunk(self, key: Tuple[int, int]) -> List[Dict]:
+        """Structure entries of chunk ``key`` (empty when it holds none)."""
+        found = self.index.get(key)
+        if found is None:
+            return []
+        offset, length, _ = found
+        return self._record(offset, length)
+
+    def read_conveyors(self) -> List[Dict]:
+        """Every conveyor, with ``start``/``end`` cells as in the in-memory layout."""
+        offset, length = self.header.get("conveyors", (0, 0))
+        if not length:
+            return []
+        return [{"start": [sx, sy], "end": [ex, ey], "travel_time": travel}
+                for sx, sy, ex, ey, travel in self._record(offset, length)]
+
+    def keys_by_distance(self, center: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Chunk keys ordered by Chebyshev distance to the chunk ``center``."""
+        cx, cy = center
+        return sorted(self.index, key=lambda k: (max(abs(k[0] - cx), abs(k[1] - cy)), k[1], k[0]))
+
+    def iter_entries(self) -> Iterator[Dict]:
+        for key in self.index:
+            yield from self.read_chunk(key)
+
+    def to_layout(self) -> Dict:
+        """Decode every record into the in-memory layout returned by :func:`decode`."""
+        data = self.meta
+        data["cells"] = list(self.iter_entries())
+        data["conveyors"] = self.read_conveyors()
+        return data
+
+
+def _structure_count(data: Dict) -> int:
+    if "cells" in data:
+        return len(data["cells"])
+    return sum(1 for row in data.get("grid", []) for entry in row if entry)
+
+
+def encode(data: Dict, compress: bool = False, chunked: Optional[bool] = None) -> bytes:
+    """Serialize an in-memory save dict (zlib when ``compress``).
+
+    Maps with at least ``SAVE_CHUNKED_MIN_STRUCTURES`` structures use the
+    chunk-streamed version 3 layout, smaller ones version 2; ``chunked``
+    forces either.
+    """
+    if chunked is None:
+        chunked = SAVE_CHUNKED_MIN_STRUCTURES > 0 and _structure_count(data) >= SAVE_CHUNKED_MIN_STRUCTURES
+    if chunked:
+        return encode_chunked(data, compress)
+    raw = _dumps(to_payload(data))
+    if compress:
+        return ZLIB_MAGIC + zlib.compress(raw)
+    return raw
+
+
+def decode(raw: bytes) -> Dict:
+    """Parse save bytes of any version/encoding into the in-memory layout."""
+    if raw.startswith(CHUNKED_MAGIC):
+        return ChunkedSave(raw).to_layout()
+    if raw.startswith(ZLIB_MAGIC):
+        raw = zlib.decompress(raw[len(ZLIB_MAGIC):])
+    return from_payload(json.loads(raw.decode("utf-8")))
+
+
+def is_chunked(filepath) -> bool:
+    """True when ``filepath`` is a chunk-streamed (version 3) save."""
+    try:
+        with open(filepath, "rb") as fh:
+            return fh.read(len(CHUNKED_MAGIC)) == CHUNKED_MAGIC
+    except OSError:
+        return False
+
+
+def backup_paths(filepath, count: int):
+    """Paths of the rotating backups of ``filepath``: ``map.json.1`` (newest) onwards."""
+    return [f"{filepath}.{i}" for i in range(1, int(count) + 1)]
+
+
+def write_save(filepath, data: Dict, compress: bool = False, backups: int = 0) -> None:
+    """Write ``data`` to ``filepath`` in the current format, atomically.
+
+    The bytes go to a temporary file next to ``filepath`` that is fsynced
+    and then renamed over it, so a crash mid-write leaves the previous save
+    intact; the directory is fsynced after the rename so the new name is
+    durable too. If encoding or writing fails the temporary file is removed
+    and the error re-raised. With ``backups`` the previous save is first
+    kept as ``<file>.1`` and older copies shift up to ``<file>.<backups>``.
+    """
+    filepath = str(filepath)
+    tmp = f"{filepath}.tmp"
+    try:
+        raw = encode(data, compress)
+        with open(tmp, "wb") as fh:
+            fh.write(raw)
+            fh.flush()
+            os.fsync(fh.fileno())
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if backups > 0 and os.path.exists(filepath):
+        paths = backup_paths(filepath, backups)
+        for older, newer in zip(reversed(paths[1:]), reversed(paths[:-1])):
+            if os.path.exists(newer):
+                os.replace(newer, older)
+        # copia (no rename): filepath sigue siendo válido en todo momento
+        shutil.copyfile(filepath, paths[0])
+    os.replace(tmp, filepath)
+    _fsync_dir(os.path.dirname(os.path.abspath(filepath)))
+
+
+def _fsync_dir(path: str) -> None:
+    """Flush a directory entry (the rename) to disk; a no-op where unsupported (Windows)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_save(filepath, backups: int = 0) -> Dict:
+    """Read a save file written by any version of the game.
+
+    When ``filepath`` cannot be read or parsed, the first readable of its
+    ``backups`` rotating copies is used instead.
+    """
+    try:
+        with open(filepath, "rb") as fh:
+            return decode(fh.read())
+    except Exception:
+        for path in backup_paths(filepath, backups):
+            try:
+                with open(path, "rb") as fh:
+                    return decode(fh.read())
+            except Exception:
+                continue
+        raise
@@ -21,7 +21,7 @@ from .singleton import SingletonMeta
 
 # New patterns
 from .observer import Observer, Subject, PointsObserver, StructureObserver, GameEventLogger
-from .command import Command, BuildStructureCommand, BuildConveyorCommand, CommandHistory
+from .command import Command, BuildStructureCommand, BuildConveyorCommand, MacroCommand, CommandHistory
 from .memento import GameMemento, GameCaretaker, GameOriginator
 from .prototype import Prototype, StructurePrototype, PrototypeRegistry, LayoutPrototype, LayoutRegistry
 from .mediator import Mediator, GameMediator, StructureMediator
@@ -41,6 +41,7 @@ __all__ = [
     "Command",
     "BuildStructureCommand",
     "BuildConveyorCommand",
+    "MacroCommand",
     "CommandHistory",
     # Memento
     "GameMemento",
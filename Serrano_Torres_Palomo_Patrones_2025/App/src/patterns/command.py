@@ -5,10 +5,19 @@ Includes concrete commands for building structures and conveyors and a
 command history manager that supports undo/redo. The implementation aims
 to be defensive and non-intrusive so it can be integrated with the game's
 existing managers.
+
+Commands can be grouped in a :class:`MacroCommand` (directly or with
+:meth:`CommandHistory.transaction`): the total cost is checked before
+anything is placed, the placements are applied in order (rolled back if one
+fails), the belts and cells they touched are rewired in a single pass
+(``gameManager._apply_batch``) and the whole group is undone as one entry.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Deque, List, Optional, Dict, Any, Tuple
 
 
 class Command(ABC):
@@ -39,6 +48,14 @@ class Command(ABC):
         return self.__class__.__name__
 
 
+def _wire(gameManager, added=(), removed=(), cells=()) -> None:
+    """Rewire a set of changes: one batch pass, or a full reconnection as fallback."""
+    if hasattr(gameManager, '_apply_batch'):
+        gameManager._apply_batch(added, removed, cells)
+    elif hasattr(gameManager, '_reconnect_structures'):
+        gameManager._reconnect_structures()
+
+
 class BuildStructureCommand(Command):
     """Command to build a structure using a provided creator.
 
@@ -80,7 +97,15 @@ class BuildStructureCommand(Command):
         """Construye la estructura si hay puntos suficientes"""
         if getattr(self.gameManager, 'points', 0) < self.cost:
             return False
-        
+        if not self.place():
+            return False
+        gx, gy = int(self.position[0]), int(self.position[1])
+        if hasattr(self.gameManager, '_rewire_cell'):
+            self.gameManager._rewire_cell(gx, gy)
+        return True
+
+    def place(self) -> bool:
+        """Create, place and pay for the structure without rewiring its cell."""
         try:
             # Crear estructura
             self.structure = self.creator.createStructure(self.position, self.gameManager)
@@ -88,6 +113,7 @@ class BuildStructureCommand(Command):
             # Agregar al mapa y lista
             gx, gy = int(self.position[0]), int(self.position[1])
             if not self.gameManager.map.placeStructure(gx, gy, self.structure):
+                self.structure = None
                 return False
             
             if not hasattr(self.gameManager, 'structures'):
@@ -112,6 +138,15 @@ class BuildStructureCommand(Command):
     
     def undo(self) -> bool:
         """Deshace la construcción, devolviendo puntos"""
+        if not self.unplace():
+            return False
+        gx, gy = int(self.position[0]), int(self.position[1])
+        if hasattr(self.gameManager, '_rewire_cell'):
+            self.gameManager._rewire_cell(gx, gy)
+        return True
+
+    def unplace(self) -> bool:
+        """Remove the structure and refund it without rewiring its cell."""
         if not self.structure:
             return False
         
@@ -139,6 +174,10 @@ class BuildStructureCommand(Command):
         except Exception as e:
             print(f"Error undoing BuildStructureCommand: {e}")
             return False
+
+    def changes(self) -> Tuple[list, list, list]:
+        """``(added belts, removed belts, changed cells)`` made by :meth:`place`."""
+        return [], [], [(int(self.position[0]), int(self.position[1]))]
     
     def get_description(self) -> str:
         struct_type = self.structure.__class__.__name__ if self.structure else "Structure"
@@ -169,7 +208,17 @@ class BuildConveyorCommand(Command):
     def execute(self) -> bool:
         if getattr(self.gameManager, 'points', 0) < self.cost:
             return False
-        
+        if not self.place():
+            return False
+        # Reconectar solo los extremos de la cinta
+        if hasattr(self.gameManager, '_connect_conveyor'):
+            self.gameManager._connect_conveyor(self.conveyor)
+        elif hasattr(self.gameManager, '_reconnect_structures'):
+            self.gameManager._reconnect_structures()
+        return True
+
+    def place(self) -> bool:
+        """Create and pay for the conveyor without wiring it."""
         try:
             # Crear cinta
             self.conveyor = self.creator.createStructure(
@@ -190,16 +239,23 @@ class BuildConveyorCommand(Command):
             # Deducir puntos
             self.gameManager.points -= self.cost
             
-            # Reconectar estructuras
-            if hasattr(self.gameManager, '_reconnect_structures'):
-                self.gameManager._reconnect_structures()
-            
             return True
         except Exception as e:
             print(f"Error executing BuildConveyorCommand: {e}")
             return False
     
     def undo(self) -> bool:
+        if not self.unplace():
+            return False
+        # Reconectar solo los extremos de la cinta
+        if hasattr(self.gameManager, '_disconnect_conveyor'):
+            self.gameManager._disconnect_conveyor(self.conveyor)
+        elif hasattr(self.gameManager, '_reconnect_structures'):
+            self.gameManager._reconnect_structures()
+        return True
+
+    def unplace(self) -> bool:
+        """Remove and refund the conveyor without unwiring it."""
         if not self.conveyor:
             return False
         
@@ -213,49 +269,177 @@ class BuildConveyorCommand(Command):
             # Devolver puntos
             self.gameManager.points += self.cost
             
-            # Reconectar estructuras
-            if hasattr(self.gameManager, '_reconnect_structures'):
-                self.gameManager._reconnect_structures()
-            
             return True
         except Exception as e:
             print(f"Error undoing BuildConveyorCommand: {e}")
             return False
+
+    def changes(self) -> Tuple[list, list, list]:
+        """``(added belts, removed belts, changed cells)`` made by :meth:`place`."""
+        return [self.conveyor], [], []
     
     def get_description(self) -> str:
         return f"Build Conveyor from {self.start_pos} to {self.end_pos}"
 
 
+class MacroCommand(Command):
+    """Group of commands executed, wired and undone as a unit.
+
+    Sub-commands must provide ``place``/``unplace``/``changes`` (like
+    :class:`BuildStructureCommand` and :class:`BuildConveyorCommand`) and
+    may expose a ``cost``. :meth:`execute` checks the summed cost first and
+    places nothing when it cannot be paid; if a placement fails, the ones
+    already made are undone. :meth:`undo` is all or nothing as well: if an
+    ``unplace`` fails, the commands already undone are placed back and the
+    macro stays executed, so the history entry can be undone again. All
+    touched belts and cells are rewired once at the end instead of once per
+    command.
+    """
+
+    def __init__(self, gameManager, commands=(), name: Optional[str] = None):
+        self.gameManager = gameManager
+        self.commands: List[Command] = list(commands)
+        self.name = name
+        self.executed = False
+
+    def add(self, command: Command) -> None:
+        self.commands.append(command)
+
+    @property
+    def cost(self) -> int:
+        return sum(int(getattr(cmd, 'cost', 0) or 0) for cmd in self.commands)
+
+    def _changes(self, commands) -> Tuple[list, list, list]:
+        added, removed, cells = [], [], []
+        for cmd in commands:
+            a, r, c = cmd.changes()
+            added.extend(a)
+            removed.extend(r)
+            cells.extend(c)
+        return added, removed, cells
+
+    def execute(self) -> bool:
+        """Aplica todos los comandos o ninguno"""
+        self.executed = False
+        if not self.commands or getattr(self.gameManager, 'points', 0) < self.cost:
+            return False
+        done = []
+        for cmd in self.commands:
+            if not cmd.place():
+                for placed in reversed(done):
+                    placed.unplace()
+                return False
+            done.append(cmd)
+        _wire(self.gameManager, *self._changes(done))
+        self.executed = True
+        return True
+
+    def _unplace_all(self) -> Optional[list]:
+        """Unplace every command in reverse order, or none of them.
+
+        Returns the unplaced commands, or None when one failed after the
+        ones before it were placed back.
+        """
+        undone = []
+        for cmd in reversed(self.commands):
+            if not cmd.unplace():
+                for placed in reversed(undone):
+                    placed.place()
+                return None
+            undone.append(cmd)
+        return undone
+
+    def undo(self) -> bool:
+        """Deshace todos los comandos en orden inverso, o ninguno"""
+        if not self.executed:
+            return False
+        undone = self._unplace_all()
+        if undone is None:
+            # el mundo sigue como estaba: sin recablear y aún ejecutado
+            return False
+        added, removed, cells = self._changes(undone)
+        # deshacer: las cintas añadidas se quitan y viceversa
+        _wire(self.gameManager, removed, added, cells)
+        self.executed = False
+        return True
+
+    def changes(self) -> Tuple[list, list, list]:
+        return self._changes(self.commands)
+
+    def place(self) -> bool:
+        # anidado en otro macro: el externo recablea
+        done = []
+        for cmd in self.commands:
+            if not cmd.place():
+                for placed in reversed(done):
+                    placed.unplace()
+                return False
+            done.append(cmd)
+        self.executed = True
+        return True
+
+    def unplace(self) -> bool:
+        if self._unplace_all() is None:
+            return False
+        self.executed = False
+        return True
+
+    def get_description(self) -> str:
+        return self.name or f"{len(self.commands)} commands"
+
+
 class CommandHistory:
     """Manages a history of executed commands supporting undo/redo.
 
-    Stores a bounded list of Command instances and exposes `execute`,
-    `undo`, and `redo` operations. `execute` will run the command and
-    add it to the history only on success.
+    Stores the last ``max_history`` Command instances in a bounded deque
+    (the oldest entry drops off) and exposes `execute`, `undo`, and `redo`
+    operations. `execute` will run the command and add it to the history
+    only on success. Inside :meth:`transaction` executed commands are
+    collected and run together as one :class:`MacroCommand`.
     """
     
     def __init__(self, max_history=50):
-        self.history: List[Command] = []
+        self.history: Deque[Command] = deque(maxlen=max_history)
         self.current_index = -1
         self.max_history = max_history
+        self._batch: Optional[MacroCommand] = None
     
     def execute(self, command: Command) -> bool:
         """Ejecuta un comando y lo agrega al historial"""
+        if self._batch is not None:
+            # dentro de una transacción: se ejecuta al confirmarla
+            self._batch.add(command)
+            return True
         if command.execute():
             # Eliminar comandos después del índice actual (si hicimos undo)
-            self.history = self.history[:self.current_index + 1]
+            while len(self.history) > self.current_index + 1:
+                self.history.pop()
             
-            # Agregar nuevo comando
+            # Agregar nuevo comando (el deque descarta el más antiguo)
             self.history.append(command)
-            self.current_index += 1
-            
-            # Limitar tamaño del historial
-            if len(self.history) > self.max_history:
-                self.history = self.history[-self.max_history:]
-                self.current_index = len(self.history) - 1
+            self.current_index = len(self.history) - 1
             
             return True
         return False
+
+    @contextmanager
+    def transaction(self, gameManager, name: Optional[str] = None):
+        """Collect the commands executed inside the block into one :class:`MacroCommand`.
+
+        On leaving the block the macro is executed (all or nothing, wired
+        once) and stored as a single history entry; ``macro.executed`` tells
+        whether it was applied. An exception inside the block discards the
+        collected commands. Nested transactions join the outer one.
+        """
+        outer = self._batch
+        macro = MacroCommand(gameManager, name=name)
+        self._batch = macro
+        try:
+            yield macro
+        finally:
+            self._batch = outer
+        if macro.commands:
+            self.execute(macro)
     
     def undo(self) -> bool:
         """Deshace el último comando"""
@@ -298,4 +482,4 @@ class CommandHistory:
         """Obtiene descripciones de los últimos comandos"""
         start = max(0, self.current_index - count + 1)
         end = self.current_index + 1
-        return [cmd.get_description() for cmd in self.history[start:end]]
+        return [cmd.get_description() for cmd in islice(self.history, start, end)]
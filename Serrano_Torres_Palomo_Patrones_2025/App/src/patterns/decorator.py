@@ -39,7 +39,7 @@ class UpgradeDecorator(Structure, ABC):
         pass
     
     @abstractmethod
-    def draw(self):
+    def draw(self, view=None):
         '''
         Draw logic - subclasses must implement.
         Should typically delegate to target.draw() and optionally add visual indicators.
@@ -106,10 +106,13 @@ class SpeedUpgrade(UpgradeDecorator):
         except Exception:
             pass
 
-    def draw(self):
+    def draw(self, view=None):
         # draw wrapped structure then an indicator ring for the upgrade
         try:
-            self.target.draw()
+            if view is not None:
+                self.target.draw(view)
+            else:
+                self.target.draw()
         except Exception:
             pass
 
@@ -163,7 +166,7 @@ class EfficiencyUpgrade(UpgradeDecorator):
                             try:
                                 for item in conv.queue:
                                     try:
-                                        item['value'] = int(item.get('value', 0)) + delta
+                                        item.value = int(item.value) + delta
                                     except Exception:
                                         pass
                             except Exception:
@@ -186,9 +189,12 @@ class EfficiencyUpgrade(UpgradeDecorator):
         except Exception:
             pass
 
-    def draw(self):
+    def draw(self, view=None):
         try:
-            self.target.draw()
+            if view is not None:
+                self.target.draw(view)
+            else:
+                self.target.draw()
         except Exception:
             pass
 
@@ -266,7 +266,7 @@ class StructureMediator(Mediator):
         # Verificar si hay cinta de salida
         if hasattr(producer, 'outputConveyor') and producer.outputConveyor:
             try:
-                producer.outputConveyor.queue.append(item)
+                producer.outputConveyor.push(item)
             except:
                 pass
     
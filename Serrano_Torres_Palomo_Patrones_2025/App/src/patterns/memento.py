@@ -3,27 +3,119 @@
 Implements a small memento system to capture and restore game state.
 Useful for save/load, checkpoints, and rollback scenarios. Includes
 `GameMemento`, `GameCaretaker`, and `GameOriginator` classes.
+
+Mementos are checkpoints of the whole world: points, camera, upgrades, the
+map layout (structures per chunk and belts), the items on every belt and the
+rest of the simulation state (:mod:`gm.sim_state`). A captured state is
+frozen (read-only mappings and tuples), so it can be shared instead of
+copied:
+
+- a *keyframe* memento holds the full frozen state;
+- a *delta* memento holds only the sections that differ from its base
+  keyframe; inside ``cells`` (one entry per map chunk), ``conveyors``,
+  ``belts`` and ``travel`` (one entry per belt) only the changed entries are
+  stored, and unchanged ones are the base's own objects.
+
+:class:`GameOriginator` captures incrementally: it keeps the frozen entries
+of its previous capture and only rebuilds those of chunks placed into or
+removed from since (:attr:`map.chunked_grid.Chunk.version`), of all
+chunks when a structure label changed (``GameManager.view_version``), and
+of belts that hold items or whose travel time changed. An unchanged entry
+is the same object as in the keyframe, so deltas are found by identity.
+:meth:`GameMemento.get_state` never deep-copies.
 """
 
+from types import MappingProxyType
 from typing import Dict, Any, Optional
 from datetime import datetime
-import copy
+
+
+def freeze(value):
+    """Return a read-only copy of ``value`` (dicts -> mappings, lists -> tuples)."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class _Patch:
+    """Changed entries of a tuple or mapping section.
+
+    ``changes`` maps indexes (tuples) or keys (mappings) to their new value;
+    a tuple patch also keeps the new ``length``, a mapping patch the
+    ``removed`` keys.
+    """
+
+    __slots__ = ('changes', 'length', 'removed')
+
+    def __init__(self, changes: Dict[Any, Any], length: Optional[int] = None, removed=frozenset()):
+        self.changes = changes
+        self.length = length
+        self.removed = removed
+
+    def apply(self, base):
+        if self.length is None:
+            merged = {k: v for k, v in base.items() if k not in self.removed}
+            merged.update(self.changes)
+            return MappingProxyType(merged)
+        return tuple(self.changes[i] if i in self.changes else base[i] for i in range(self.length))
+
+
+def _same(a: Any, b: Any) -> bool:
+    # entradas reutilizadas por el originator: idénticas, sin comparar a fondo
+    return a is b or a == b
+
+
+def _diff(base: Any, value: Any):
+    """What a delta must store to turn ``base`` into ``value`` (``None``: nothing)."""
+    if value is base:
+        return None
+    if isinstance(value, tuple) and isinstance(base, tuple):
+        changes = {i: v for i, v in enumerate(value) if i >= len(base) or not _same(v, base[i])}
+        if not changes and len(value) == len(base):
+            return None
+        # reutilizar las entradas iguales de la base (compartición estructural)
+        return _Patch(changes, len(value))
+    if isinstance(value, MappingProxyType) and isinstance(base, MappingProxyType):
+        changes = {k: v for k, v in value.items() if k not in base or not _same(v, base[k])}
+        removed = frozenset(k for k in base if k not in value)
+        if not changes and not removed:
+            return None
+        return _Patch(changes, removed=removed)
+    return None if value == base else value
 
 
 class GameMemento:
     """A memento that stores a snapshot of the game state.
 
-    Stores a deep copy of the provided state dictionary along with
-    optional metadata (name, timestamp, etc.).
+    Stores a frozen copy of the provided state dictionary along with
+    optional metadata (name, timestamp, etc.). With ``base`` only the
+    sections that differ from that keyframe are kept.
     """
     
-    def __init__(self, state: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
+    def __init__(self, state: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None,
+                 base: Optional["GameMemento"] = None):
         """
         Args:
             state: Diccionario con el estado del juego
             metadata: Información adicional (timestamp, nombre, etc.)
+            base: Keyframe contra el que guardar solo las diferencias
         """
-        self._state = copy.deepcopy(state)
+        frozen = state if isinstance(state, MappingProxyType) else freeze(state)
+        if base is not None and base._base is not None:
+            base = base._base  # las cadenas tienen siempre un solo nivel
+        self._base = base
+        if base is None:
+            self._state = frozen
+        else:
+            reference = base._state
+            self._state = {}
+            for key, value in frozen.items():
+                change = _diff(reference.get(key), value) if key in reference else value
+                if change is not None:
+                    self._state[key] = change
+            self._removed = tuple(k for k in reference if k not in frozen)
         self._metadata = metadata or {}
         self._timestamp = datetime.now()
         
@@ -31,9 +123,24 @@ class GameMemento:
         if 'timestamp' not in self._metadata:
             self._metadata['timestamp'] = self._timestamp.isoformat()
     
-    def get_state(self) -> Dict[str, Any]:
-        """Retorna una copia del estado guardado"""
-        return copy.deepcopy(self._state)
+    @property
+    def is_delta(self) -> bool:
+        return self._base is not None
+
+    def changed_sections(self) -> list:
+        """Secciones guardadas en este memento (todas si es keyframe)"""
+        return list(self._state.keys())
+
+    def get_state(self) -> MappingProxyType:
+        """Retorna el estado guardado (de solo lectura, sin copiarlo)"""
+        if self._base is None:
+            return self._state
+        merged = dict(self._base._state)
+        for key in self._removed:
+            merged.pop(key, None)
+        for key, change in self._state.items():
+            merged[key] = change.apply(merged[key]) if isinstance(change, _Patch) else change
+        return MappingProxyType(merged)
     
     def get_metadata(self) -> Dict[str, Any]:
         """Retorna metadata del memento"""
@@ -46,8 +153,8 @@ class GameMemento:
     def get_description(self) -> str:
         """Retorna descripción legible del memento"""
         name = self._metadata.get('name', 'Unnamed')
-        points = self._state.get('points', 0)
-        structures = len(self._state.get('structures', []))
+        points = self.get_state().get('points', 0)
+        structures = self._metadata.get('structures_count', 0)
         return f"{name} - {points} pts, {structures} structures - {self._timestamp.strftime('%H:%M:%S')}"
 
 
@@ -58,10 +165,14 @@ class GameCaretaker:
     list used for checkpointing.
     """
     
-    def __init__(self, max_snapshots=10):
+    def __init__(self, max_snapshots=10, keyframe_every=5):
         self._snapshots: Dict[str, GameMemento] = {}
         self._auto_snapshots: list[GameMemento] = []
         self.max_auto_snapshots = max_snapshots
+        # cada cuántos checkpoints se guarda un keyframe completo
+        self.keyframe_every = max(1, int(keyframe_every))
+        self._keyframe: Optional[GameMemento] = None
+        self._since_keyframe = 0
     
     def save_snapshot(self, name: str, memento: GameMemento) -> None:
         """Guarda un snapshot con nombre específico"""
@@ -87,6 +198,22 @@ class GameCaretaker:
         if len(self._auto_snapshots) > self.max_auto_snapshots:
             self._auto_snapshots = self._auto_snapshots[-self.max_auto_snapshots:]
     
+    def checkpoint(self, originator: "GameOriginator", name: str = "checkpoint") -> GameMemento:
+        """Crea y guarda un checkpoint automático (delta salvo cada ``keyframe_every``)"""
+        base = self._keyframe if self._since_keyframe < self.keyframe_every - 1 else None
+        memento = originator.create_memento(name, base=base)
+        if base is None or not memento.is_delta:
+            self._keyframe = memento
+            self._since_keyframe = 0
+        else:
+            self._since_keyframe += 1
+        self.save_auto_snapshot(memento)
+        return memento
+
+    def get_auto_snapshots(self) -> list[GameMemento]:
+        """Retorna los checkpoints automáticos, del más antiguo al más reciente"""
+        return list(self._auto_snapshots)
+
     def get_latest_auto_snapshot(self) -> Optional[GameMemento]:
         """Retorna el último snapshot automático"""
         return self._auto_snapshots[-1] if self._auto_snapshots else None
@@ -104,14 +231,20 @@ class GameOriginator:
     """Originator that creates and restores game mementos.
 
     Knows how to capture the current game manager state and to apply a
-    memento to restore that state back onto the game manager.
+    memento to restore that state back onto the game manager. The frozen
+    chunk and belt entries of the previous capture are kept and reused while
+    they are clean (see the module docstring).
     """
     
     def __init__(self, gameManager):
         self.gameManager = gameManager
+        # chunk key -> (chunk, chunk.version, view_version, frozen entries)
+        self._chunks: Dict[Any, tuple] = {}
+        # conveyor -> (travel pair, frozen travel, frozen layout entry, frozen runs)
+        self._belts: Dict[Any, tuple] = {}
     
-    def create_memento(self, name: str = "snapshot") -> GameMemento:
-        """Crea un memento del estado actual del juego"""
+    def create_memento(self, name: str = "snapshot", base: Optional[GameMemento] = None) -> GameMemento:
+        """Crea un memento del estado actual del juego (delta si se da ``base``)"""
         try:
             state = self._capture_state()
             metadata = {
@@ -120,22 +253,83 @@ class GameOriginator:
                 'structures_count': len(getattr(self.gameManager, 'structures', [])),
                 'conveyors_count': len(getattr(self.gameManager, 'conveyors', []))
             }
-            return GameMemento(state, metadata)
+            return GameMemento(state, metadata, base=base)
         except Exception as e:
             print(f"Error creating memento: {e}")
             return GameMemento({}, {'name': name, 'error': str(e)})
     
     def restore_memento(self, memento: GameMemento) -> bool:
-        """Restaura el estado del juego desde un memento"""
+        """Restaura el estado del juego desde un memento.
+
+        Con el hilo de simulación en marcha la restauración se encola en él,
+        que es el único que modifica el mundo.
+        """
         try:
             state = memento.get_state()
-            self._restore_state(state)
+            sim = getattr(self.gameManager, 'simulation', None)
+            if sim is not None and sim.is_alive():
+                sim.post(lambda: self._restore_recorded(state))
+            else:
+                self._restore_recorded(state)
             print(f"✅ Game state restored: {memento.get_description()}")
             return True
         except Exception as e:
             print(f"Error restoring memento: {e}")
             return False
     
+    def _restore_recorded(self, state: Dict[str, Any]) -> None:
+        """Restore ``state`` and log the resulting world for input replay (:mod:`gm.recorder`)."""
+        gm = self.gameManager
+        recording = getattr(gm, 'recorder', None) is not None
+        if recording:
+            from gm.recorder import current_tick
+            tick = current_tick(gm)
+        self._restore_state(state)
+        if recording:
+            from gm.persistence import capture_save
+            gm._record_input('restore', tick=tick, world=capture_save(gm, with_state=True))
+
+    def _capture_cells(self) -> MappingProxyType:
+        """Frozen saved entries of the placed structures, per map chunk."""
+        from gm.persistence import structure_entry
+
+        gm = self.gameManager
+        labels = getattr(gm, 'view_version', 0)
+        fresh = {}
+        for key, chunk in tuple(gm.map.grid.chunks.items()):
+            entry = self._chunks.get(key)
+            if entry is None or entry[0] is not chunk or entry[1] != chunk.version or entry[2] != labels:
+                cells = tuple(sorted((x, y, freeze(structure_entry(s))) for (x, y), s in chunk.occupied.items()))
+                entry = (chunk, chunk.version, labels, cells)
+            fresh[key] = entry
+        self._chunks = fresh
+        return MappingProxyType({key: entry[3] for key, entry in fresh.items()})
+
+    def _capture_belts(self):
+        """Frozen ``(conveyors, belts, travel)`` sections, one entry per belt.
+
+        A belt's items are only captured again when it holds items now or
+        did at the previous capture; its layout entry and travel times only
+        when the travel times changed.
+        """
+        from gm.persistence import conveyor_entry
+        from gm.sim_state import _belt_runs, _belt_travel
+        from map.registry import unwrap
+
+        fresh = {}
+        for conv in getattr(self.gameManager, 'conveyors', []):
+            travel = tuple(_belt_travel(conv))
+            entry = self._belts.get(conv)
+            if entry is None or entry[0] != travel:
+                entry = (travel, travel, freeze(conveyor_entry(conv)), None)
+            runs = entry[3]
+            if runs is None or runs or getattr(unwrap(conv), '_items', 1):
+                entry = entry[:3] + (freeze(_belt_runs(conv)),)
+            fresh[conv] = entry
+        self._belts = fresh
+        entries = tuple(fresh.values())
+        return (tuple(e[2] for e in entries), tuple(e[3] for e in entries), tuple(e[1] for e in entries))
+
     def _capture_state(self) -> Dict[str, Any]:
         """Captura el estado actual del juego"""
         state = {
@@ -149,24 +343,72 @@ class GameOriginator:
                 'eff_uses': getattr(self.gameManager, 'eff_uses_used', 0),
                 'mine_uses': getattr(self.gameManager, 'mine_uses_used', 0)
             },
-            # Agregar más datos según sea necesario
         }
-        return state
+        state = dict(freeze(state))
+        gm = self.gameManager
+        if getattr(gm, 'map', None) is not None:
+            from gm.sim_state import capture_state
+
+            loader = getattr(gm, 'stream_loader', None)
+            if loader is not None and not loader.done:
+                loader.finish()
+            # secciones por chunk y por cinta: solo se rehacen las que cambiaron
+            state['size'] = (gm.map.width, gm.map.height)
+            state['cells'] = self._capture_cells()
+            state['conveyors'], state['belts'], state['travel'] = self._capture_belts()
+            state['sim'] = freeze(capture_state(gm, belts=False))
+        return MappingProxyType(state)
+
+    @staticmethod
+    def _layout(state) -> Dict[str, Any]:
+        """Rebuild a save layout (:func:`gm.persistence.capture_save`) from a captured state."""
+        width, height = state['size']
+        cells = [dict(entry, x=x, y=y) for chunk in state['cells'].values() for x, y, entry in chunk]
+        # mismo orden que capture_save: por filas
+        cells.sort(key=lambda entry: (entry['y'], entry['x']))
+        return {
+            'width': width,
+            'height': height,
+            'cells': cells,
+            'conveyors': [dict(entry) for entry in state.get('conveyors', ())],
+        }
     
-    def _restore_state(self, state: Dict[str, Any]) -> None:
+    def _restore_state(self, state) -> None:
         """Restaura el estado del juego desde un diccionario"""
+        gm = self.gameManager
         # Restaurar puntos
         if 'points' in state:
-            self.gameManager.points = state['points']
+            gm.points = state['points']
         
         # Restaurar cámara
-        if 'camera' in state and hasattr(self.gameManager, 'camera'):
-            self.gameManager.camera.x = state['camera'].get('x', 0)
-            self.gameManager.camera.y = state['camera'].get('y', 0)
+        if 'camera' in state and hasattr(gm, 'camera'):
+            gm.camera.x = state['camera'].get('x', 0)
+            gm.camera.y = state['camera'].get('y', 0)
         
         # Restaurar upgrades
+        upgrades_changed = False
         if 'upgrades' in state:
             upgrades = state['upgrades']
-            self.gameManager.speed_uses_used = upgrades.get('speed_uses', 0)
-            self.gameManager.eff_uses_used = upgrades.get('eff_uses', 0)
-            self.gameManager.mine_uses_used = upgrades.get('mine_uses', 0)
+            before = (getattr(gm, 'speed_uses_used', 0), getattr(gm, 'eff_uses_used', 0))
+            gm.speed_uses_used = upgrades.get('speed_uses', 0)
+            gm.eff_uses_used = upgrades.get('eff_uses', 0)
+            gm.mine_uses_used = upgrades.get('mine_uses', 0)
+            upgrades_changed = before != (gm.speed_uses_used, gm.eff_uses_used)
+
+        # Restaurar mapa, cintas y simulación
+        if 'cells' in state and getattr(gm, 'map', None) is not None:
+            from gm.persistence import rebuild_world
+            from gm.sim_state import restore_state
+
+            size = (gm.map.width, gm.map.height)
+            if (upgrades_changed or size != state['size'] or self._capture_cells() != state['cells']
+                    or self._capture_belts()[0] != state['conveyors']):
+                # solo se reconstruye el mundo si cambió la disposición
+                rebuild_world(gm, self._layout(state), getattr(gm, 'creators', {}))
+            sim = dict(state.get('sim', {}))
+            sim['belts'] = state.get('belts', ())
+            sim['travel'] = state.get('travel', ())
+            restore_state(gm, sim)
+            running = getattr(gm, 'simulation', None)
+            if running is not None:
+                running.tick = gm.resume_tick
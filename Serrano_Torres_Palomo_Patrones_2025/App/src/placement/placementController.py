@@ -13,6 +13,7 @@ implementation is unchanged to preserve runtime behaviour.
 """
 
 from core.mineCreator import MineCreator
+from map.registry import unwrap
 from settings import *
 from utils.cursor_inspector import inspect_cell
 from .placement_mouse import mouse_cell_conversion
@@ -86,17 +87,31 @@ class PlacementController:
             print("Error validating map cell for placement - aborting")
             return False
 
+        return self.build_at(self.cellPosX, self.cellPosY)
+
+    def build_at(self, cell_x, cell_y):
+        """Build with the current factory at a grid cell (clicks and input replay)."""
+        self.cellPosX, self.cellPosY = int(cell_x), int(cell_y)
         if self.factory is not None and not self.checkStructureInCell() and self.checkCost():
             #construir mina
             structure=self.factory.createStructure((self.cellPosX, self.cellPosY), self.gameManager)
+            # la celda puede estar reservada (chunk de un guardado aún cargándose)
+            if not self.gameManager.map.placeStructure(self.cellPosX, self.cellPosY, structure):
+                print(f"Celda ({self.cellPosX}, {self.cellPosY}) no disponible todavía")
+                return False
             self.gameManager.structures.append(structure)
-            self.gameManager.map.placeStructure(self.cellPosX, self.cellPosY, structure)
+            # Conectar la nueva estructura a las cintas que ya llegan/salen de su celda
+            if hasattr(self.gameManager, '_rewire_cell'):
+                self.gameManager._rewire_cell(self.cellPosX, self.cellPosY)
             # compute and spend cost using helper (keeps behaviour intact)
             cost = compute_cost(self)
             try:
                 self.gameManager.spendPoints(cost)
             except Exception:
                 pass
+            if hasattr(self.gameManager, '_record_input'):
+                self.gameManager._record_input('build', cls=unwrap(structure).__class__.__name__,
+                                               cell=[self.cellPosX, self.cellPosY])
             print(f"------------------------Mina creada en ({self.cellPosX}, {self.cellPosY})")
             # Volver a modo normal tras construir
             try:
@@ -110,6 +125,11 @@ class PlacementController:
         if self.cellPosX is None or self.cellPosY is None :
                 print("Posicion del raton no valida para destruir.")
                 return
+        return self.destroy_at(self.cellPosX, self.cellPosY)
+
+    def destroy_at(self, cell_x, cell_y):
+        """Destroy the structure at a grid cell, refunding its cost (clicks and input replay)."""
+        self.cellPosX, self.cellPosY = int(cell_x), int(cell_y)
         if self.checkStructureInCell():
             structure= self.getStructureInCell()
             
@@ -122,6 +142,8 @@ class PlacementController:
                     return False
             
             structure= self.gameManager.map.removeStructure(self.cellPosX, self.cellPosY)
+            if hasattr(self.gameManager, '_rewire_cell'):
+                self.gameManager._rewire_cell(self.cellPosX, self.cellPosY)
             if structure in self.gameManager.structures:
                 self.gameManager.structures.remove(structure)
                 # Determine refund using gm.build_costs mapping when available
@@ -152,6 +174,8 @@ class PlacementController:
 
                 # Give the refund (matches displayed build cost)
                 self.gameManager.addPoints(refund)
+                if hasattr(self.gameManager, '_record_input'):
+                    self.gameManager._record_input('destroy', cell=[self.cellPosX, self.cellPosY])
                 print(f"Estructura en {structure.grid_position} destruida. Reembolso: {refund} pts")
                 return True
             else:
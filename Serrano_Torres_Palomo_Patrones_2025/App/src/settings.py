@@ -25,4 +25,95 @@ CELL_SIZE_PX = 55
 
 # Default map size (columns, rows)
 DEFAULT_MAP_WIDTH = 25
-DEFAULT_MAP_HEIGHT = 25
\ No newline at end of file
+DEFAULT_MAP_HEIGHT = 25
+
+# Simulation: run the world step (belts, production, modules) on a worker
+# thread so slow frames do not slow down production (see gm.simulation)
+SIMULATION_THREADED = True
+# Fixed simulation step in milliseconds
+SIMULATION_TICK_MS = 1000 / FPS
+
+# Timed events (gm.timer_wheel): autosave period (0 disables it) and the
+# delay before an upgrade/mine purchase that could not be applied is retried
+AUTOSAVE_INTERVAL_MS = 5 * 60 * 1000
+# Rotating copies of the previous save kept as map.json.1 .. map.json.N
+# (gm.autosave); a corrupt map.json falls back to the newest readable one
+AUTOSAVE_BACKUPS = 3
+ACTION_RETRY_MS = 250
+
+# In-memory checkpoints (patterns.memento): one every CHECKPOINT_INTERVAL_MS
+# (0 disables them), the last CHECKPOINT_HISTORY kept. Every
+# CHECKPOINT_KEYFRAME_EVERY-th one is a full keyframe, the rest only store
+# what changed since it.
+CHECKPOINT_INTERVAL_MS = 5 * 1000
+CHECKPOINT_HISTORY = 12
+CHECKPOINT_KEYFRAME_EVERY = 6
+
+# Rewind buffer (gm.rewind): per-tick event log of the last REWIND_SECONDS
+# of simulation (0 disables it) with a keyframe every REWIND_KEYFRAME_TICKS
+# ticks and when a burst of builds ends; every REWIND_FULL_KEYFRAME_EVERY-th keyframe
+# is full, the rest are deltas. Only the threaded simulation is recorded.
+REWIND_SECONDS = 120
+REWIND_KEYFRAME_TICKS = 60
+REWIND_FULL_KEYFRAME_EVERY = 10
+
+# Input recording (gm.recorder): with INPUT_RECORDING every build, destroy
+# and upgrade action is logged with its simulation tick and written to
+# saves/INPUT_RECORDING_FILE on exit; replay it headless with
+# ``python -m gm.replay``. RNG_SEED seeds gm.rng (mine placement); None
+# picks a random seed. Recording needs the threaded (fixed-step) simulation.
+INPUT_RECORDING = False
+INPUT_RECORDING_FILE = "recording.json"
+RNG_SEED = None
+
+# Render quality tiers chosen per frame by the frame-budget governor
+# (gm.render_governor). Each tier also drops everything of the tiers below.
+RENDER_TIER_FULL = 0
+RENDER_TIER_NO_ITEM_LABELS = 1   # Conveyor.draw skips per-item labels
+RENDER_TIER_NO_WELL_POINTS = 2   # Well.draw skips the coin/points overlay
+RENDER_TIER_NO_HOVER = 3         # grid hover highlight is not drawn
+
+# Value domain for operation module results (see utils.value_domain):
+# "exact" keeps unbounded integers, "modular" reduces into 1..VALUE_MODULUS
+# (divisibility by any divisor of the modulus is preserved, so wells still
+# accept the same numbers) and "capped" saturates at VALUE_CAP.
+VALUE_DOMAIN = "exact"
+VALUE_MODULUS = 720720  # lcm(1..16)
+VALUE_CAP = 10 ** 18
+
+# Belt capacity: at most CONVEYOR_CAPACITY items per belt, at least
+# CONVEYOR_ITEM_SPACING_PX apart. A full belt refuses pushes and producers
+# hold their output (backpressure).
+CONVEYOR_CAPACITY = 32
+CONVEYOR_ITEM_SPACING_PX = 20
+
+# Items each operation-module input port can hold while waiting for the
+# other input, so a belt that arrives first does not stall.
+OPERATION_BUFFER_DEPTH = 4
+
+# Splitter routing: "round_robin", "least_loaded", "weighted" (uses
+# SPLITTER_WEIGHTS, one weight per output) or "overflow" (first output,
+# the rest only when it is full). Merger input selection: "round_robin",
+# "longest_queue" or "priority". See core.routing.
+SPLITTER_POLICY = "round_robin"
+SPLITTER_WEIGHTS = (1, 1)
+MERGER_POLICY = "round_robin"
+
+# Saves are compact JSON (format version 2, see map.save_format); with
+# SAVE_COMPRESS they are also zlib-compressed. Old saves load either way.
+SAVE_COMPRESS = False
+# Also store the dynamic simulation state (items on belts, module buffers,
+# router and production phases, RNG, tick) so a load resumes exactly
+# where the save was taken (gm.sim_state)
+SAVE_SIM_STATE = True
+# Maps with at least this many structures are saved chunk-streamed (format
+# version 3): on load the chunks within STREAM_SYNC_RADIUS chunks of the
+# camera are placed at once and the rest is decoded on a background thread
+# and placed STREAM_CHUNKS_PER_TICK chunks per simulation tick. 0 disables it.
+SAVE_CHUNKED_MIN_STRUCTURES = 4096
+STREAM_SYNC_RADIUS = 1
+STREAM_CHUNKS_PER_TICK = 4
+
+# Where purchased mines are placed: "random" (any free cell) or
+# "near_network" (free cell closest to existing structures/belts)
+MINE_PLACEMENT = "random"
@@ -62,32 +62,7 @@ def handle_click_event(state, event):
                 state.start_pos = None
                 return
 
-            try:
-                costs_map = getattr(state.gameManager, 'build_costs', {}) or {}
-                cost = int(costs_map.get('conveyor', state.conveyorCreator.getCost()))
-            except Exception:
-                cost = state.conveyorCreator.getCost()
-
-            if getattr(state.gameManager, 'points', 0) >= cost:
-                conveyor = state.conveyorCreator.createStructure(state.start_pos, state.gameManager, end_pos)
-                if not hasattr(state.gameManager, 'conveyors'):
-                    state.gameManager.conveyors = []
-                state.gameManager.conveyors.append(conveyor)
-
-                if not hasattr(state.gameManager, 'structures'):
-                    state.gameManager.structures = []
-                state.gameManager.structures.append(conveyor)
-
-                try:
-                    state.gameManager.points -= cost
-                except Exception:
-                    pass
-
-                if hasattr(state.gameManager, '_reconnect_structures'):
-                    state.gameManager._reconnect_structures()
-
-                print(f"Conveyor built from grid ({grid_x}, {grid_y}) to previous point | Cost: {cost} pts")
-
+            if build_conveyor(state.gameManager, state.conveyorCreator, state.start_grid, (grid_x, grid_y)):
                 state.start_pos = None
                 try:
                     if hasattr(state.gameManager, 'hud') and getattr(state.gameManager, 'hud'):
@@ -101,7 +76,6 @@ def handle_click_event(state, event):
                 if hasattr(state.gameManager, 'normalState'):
                     state.gameManager.setState(state.gameManager.normalState)
             else:
-                print(f"Not enough points to build conveyor (need {cost}, have {getattr(state.gameManager, 'points', 0)})")
                 state.start_pos = None
 
     elif event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
@@ -120,6 +94,52 @@ def handle_click_event(state, event):
             state.gameManager.setState(state.gameManager.normalState)
 
 
+def build_conveyor(gameManager, conveyorCreator, start_grid, end_grid):
+    """Build and wire a conveyor between two grid cells if it can be paid for.
+
+    Used by the click handler and by input replay (:mod:`gm.replay`).
+    Returns True when the conveyor was built.
+    """
+    try:
+        costs_map = getattr(gameManager, 'build_costs', {}) or {}
+        cost = int(costs_map.get('conveyor', conveyorCreator.getCost()))
+    except Exception:
+        cost = conveyorCreator.getCost()
+
+    if getattr(gameManager, 'points', 0) < cost:
+        print(f"Not enough points to build conveyor (need {cost}, have {getattr(gameManager, 'points', 0)})")
+        return False
+
+    start_pos = pg.Vector2(start_grid[0] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
+                           start_grid[1] * CELL_SIZE_PX + CELL_SIZE_PX // 2)
+    end_pos = pg.Vector2(end_grid[0] * CELL_SIZE_PX + CELL_SIZE_PX // 2,
+                         end_grid[1] * CELL_SIZE_PX + CELL_SIZE_PX // 2)
+    conveyor = conveyorCreator.createStructure(start_pos, gameManager, end_pos)
+    if not hasattr(gameManager, 'conveyors'):
+        gameManager.conveyors = []
+    gameManager.conveyors.append(conveyor)
+
+    if not hasattr(gameManager, 'structures'):
+        gameManager.structures = []
+    gameManager.structures.append(conveyor)
+
+    try:
+        gameManager.points -= cost
+    except Exception:
+        pass
+
+    # Solo se recablean las dos celdas extremas de la nueva cinta
+    if hasattr(gameManager, '_connect_conveyor'):
+        gameManager._connect_conveyor(conveyor)
+    elif hasattr(gameManager, '_reconnect_structures'):
+        gameManager._reconnect_structures()
+    if hasattr(gameManager, '_record_input'):
+        gameManager._record_input('conveyor', start=list(start_grid), end=list(end_grid))
+
+    print(f"Conveyor built from grid {tuple(start_grid)} to {tuple(end_grid)} | Cost: {cost} pts")
+    return True
+
+
 def update(state):
     cam = getattr(state.gameManager, 'camera', pg.Vector2(0, 0))
     world_x = int(state.mouse.position.x + cam.x)
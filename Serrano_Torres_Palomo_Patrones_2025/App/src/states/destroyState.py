@@ -23,6 +23,9 @@ class DestroyState(GameState):
         self.placementController = placementController
         self.gameManager = placementController.gameManager
         self.mouse = placementController.mouse
+        # cinta bajo el ratón según el último pick hecho en el hilo de simulación
+        self._hover = None
+        self._hover_pending = False
 
     def handleClickEvent(self, event):
         if event.type == pg.MOUSEBUTTONDOWN:
@@ -73,15 +76,60 @@ class DestroyState(GameState):
     
     def draw(self):
         self.placementController.drawDestroy()
+        self._draw_conveyor_hover()
+
+    def _draw_conveyor_hover(self):
+        """Resalta la cinta que se destruiría con un click en la posición actual"""
+        try:
+            conv = self._hover_conveyor()
+            if conv is None:
+                return
+            cam = getattr(self.gameManager, 'camera', pg.Vector2(0, 0))
+            start = (int(conv.start_pos.x - cam.x), int(conv.start_pos.y - cam.y))
+            end = (int(conv.end_pos.x - cam.x), int(conv.end_pos.y - cam.y))
+            pg.draw.line(self.gameManager.screen, (230, 60, 60), start, end, getattr(conv, 'width', 4) + 4)
+        except Exception as e:
+            print(f"Error drawing conveyor hover: {e}")
+
+    def _hover_conveyor(self):
+        """Belt under the mouse, for the hover highlight.
+
+        With the threaded simulation the belt index is only read on the
+        simulation thread, which mutates it: the pick is posted there (one
+        at a time) and the result of the last finished pick is drawn.
+        """
+        world_x, world_y = self._to_world(self.mouse.position)
+        sim = getattr(self.gameManager, 'simulation', None)
+        if sim is None or not sim.is_alive():
+            return self._conveyor_at_world(world_x, world_y)
+        if not self._hover_pending:
+            self._hover_pending = True
+
+            def pick():
+                try:
+                    self._hover = self._conveyor_at_world(world_x, world_y)
+                finally:
+                    self._hover_pending = False
+            sim.post(pick)
+        return self._hover
+
+    def _to_world(self, screen_pos):
+        cam = getattr(self.gameManager, 'camera', pg.Vector2(0, 0))
+        return screen_pos[0] + cam.x, screen_pos[1] + cam.y
     
     def _get_conveyor_at_click(self, screen_pos):
         """Determina si hay una cinta cerca del click"""
+        return self._conveyor_at_world(*self._to_world(screen_pos))
+
+    def _conveyor_at_world(self, world_x, world_y):
+        """Cinta a menos de 20 px del punto del mundo, o None (en el hilo dueño del mundo)."""
         try:
-            cam = getattr(self.gameManager, 'camera', pg.Vector2(0, 0))
-            world_x = screen_pos[0] + cam.x
-            world_y = screen_pos[1] + cam.y
+            # Índice espacial: solo se prueban las cintas del bucket del click
+            belt_index = getattr(self.gameManager, 'belt_index', None)
+            if belt_index is not None:
+                return belt_index.at_point(world_x, world_y, threshold=20)
+
             click_world_pos = pg.Vector2(world_x, world_y)
-            
             conveyors = getattr(self.gameManager, 'conveyors', [])
             for conv in conveyors:
                 # Verificar si el click está cerca de la línea de la cinta
@@ -118,25 +166,41 @@ class DestroyState(GameState):
     
     def _destroy_conveyor(self, conveyor):
         """Destruye una cinta y devuelve puntos"""
+        destroy_conveyor(self.gameManager, conveyor)
+
+
+def destroy_conveyor(gameManager, conveyor):
+    """Remove ``conveyor`` from the world and refund its cost.
+
+    Used by :class:`DestroyState` and by input replay (:mod:`gm.replay`).
+    """
+    try:
+        conveyors = getattr(gameManager, 'conveyors', [])
+        index = None
+        if conveyor in conveyors:
+            index = conveyors.index(conveyor)
+            conveyors.remove(conveyor)
+
+        structures = getattr(gameManager, 'structures', [])
+        if conveyor in structures:
+            structures.remove(conveyor)
+
+        # Desconectar la cinta de las estructuras de sus extremos
+        if hasattr(gameManager, '_disconnect_conveyor'):
+            gameManager._disconnect_conveyor(conveyor)
+
+        # Devolver el coste configurado para cintas (usa gm.build_costs si existe)
         try:
-            conveyors = getattr(self.gameManager, 'conveyors', [])
-            if conveyor in conveyors:
-                conveyors.remove(conveyor)
-            
-            structures = getattr(self.gameManager, 'structures', [])
-            if conveyor in structures:
-                structures.remove(conveyor)
-            
-            # Devolver el coste configurado para cintas (usa gm.build_costs si existe)
-            try:
-                refund = int(getattr(self.gameManager, 'build_costs', {}).get('conveyor', 5))
-            except Exception:
-                refund = 5
-            if hasattr(self.gameManager, 'addPoints'):
-                self.gameManager.addPoints(refund)
-            elif hasattr(self.gameManager, 'points'):
-                self.gameManager.points += refund
-            
-            print(f"Conveyor destroyed. Refund: {refund} pts")
-        except Exception as e:
-            print(f"Error destroying conveyor: {e}")
\ No newline at end of file
+            refund = int(getattr(gameManager, 'build_costs', {}).get('conveyor', 5))
+        except Exception:
+            refund = 5
+        if hasattr(gameManager, 'addPoints'):
+            gameManager.addPoints(refund)
+        elif hasattr(gameManager, 'points'):
+            gameManager.points += refund
+        if index is not None and hasattr(gameManager, '_record_input'):
+            gameManager._record_input('conveyor_destroy', index=index)
+
+        print(f"Conveyor destroyed. Refund: {refund} pts")
+    except Exception as e:
+        print(f"Error destroying conveyor: {e}")
@@ -6,6 +6,8 @@ surfaces and exposes a simple modal API used by the HUD:
 
 - open(start_index=0), close(), next(), prev()
 - update(dt_ms), draw(screen)
+- frames advance on ``game.ui_timers`` (see :mod:`gm.timer_wheel`) when the
+  game has one; otherwise ``update(dt_ms)`` counts the frame time down
 - readable attributes: active, files, titles, index, frames,
   frame_durations, frame_index, frame_timer
 - buttons: prev_button, next_button, exit_button (pygame.Rect or None)
@@ -47,6 +49,7 @@ class GifModal:
         self.frame_durations = []
         self.frame_index = 0
         self.frame_timer = 0
+        self._frame_event = None
 
         # modal UI buttons (created during draw)
         self.prev_button = None
@@ -100,9 +103,13 @@ class GifModal:
             self.active = True
             self.frame_index = 0
             self.frame_timer = 0
+            self._restart_frames()
             try:
                 if hasattr(self, 'game') and self.game is not None:
-                    setattr(self.game, '_tutorial_paused', True)
+                    if hasattr(self.game, 'set_tutorial_paused'):
+                        self.game.set_tutorial_paused(True)
+                    else:
+                        setattr(self.game, '_tutorial_paused', True)
             except Exception:
                 pass
         except Exception:
@@ -111,6 +118,7 @@ class GifModal:
 
     def close(self):
         try:
+            self._cancel_frames()
             self.active = False
             self.files = []
             self.frames = []
@@ -120,7 +128,10 @@ class GifModal:
             self.exit_button = None
             try:
                 if hasattr(self, 'game') and self.game is not None:
-                    setattr(self.game, '_tutorial_paused', False)
+                    if hasattr(self.game, 'set_tutorial_paused'):
+                        self.game.set_tutorial_paused(False)
+                    else:
+                        setattr(self.game, '_tutorial_paused', False)
             except Exception:
                 pass
         except Exception:
@@ -134,6 +145,7 @@ class GifModal:
             self._load_current_gif_frames()
             self.frame_index = 0
             self.frame_timer = 0
+            self._restart_frames()
         except Exception:
             pass
 
@@ -145,6 +157,7 @@ class GifModal:
             self._load_current_gif_frames()
             self.frame_index = 0
             self.frame_timer = 0
+            self._restart_frames()
         except Exception:
             pass
 
@@ -202,9 +215,42 @@ class GifModal:
                 self.frames = []
                 self.frame_durations = []
 
+    # --- temporizado de frames ---
+    def _wheel(self):
+        return getattr(self.game, 'ui_timers', None) if self.game is not None else None
+
+    def _cancel_frames(self):
+        if self._frame_event is not None:
+            self._frame_event.cancel()
+            self._frame_event = None
+
+    def _current_duration(self):
+        try:
+            return max(1, int(self.frame_durations[self.frame_index]))
+        except Exception:
+            return 100
+
+    def _next_frame(self):
+        if not self.active or not self.frames:
+            return False
+        self.frame_index = (self.frame_index + 1) % max(1, len(self.frames))
+        return True
+
+    def _restart_frames(self):
+        """(Re)arm the frame timer for the GIF currently loaded."""
+        self._cancel_frames()
+        wheel = self._wheel()
+        if wheel is None or not self.active or len(self.frames) < 2:
+            return
+        self._frame_event = wheel.schedule(self._current_duration(), self._next_frame,
+                                           repeat=self._current_duration)
+
     def update(self, dt_ms: int):
         if not self.active or not self.frames:
             return
+        if self._frame_event is not None:
+            # los frames los avanza la rueda de temporizadores
+            return
         self.frame_timer += dt_ms
         if self.frame_durations:
             dur = self.frame_durations[self.frame_index]
@@ -227,11 +227,12 @@ class HUD:
     
     def update(self, delta_time):
         """Actualiza el estado del HUD"""
-        # Delegar el temporizado de popups al GameManager: decrementar
-        # `_popup_timer` si existe. Esto asegura una única fuente de verdad
-        # para el mensaje temporal.
+        # Con rueda de temporizadores (gm.ui_timers) el popup del GameManager
+        # caduca solo; si no, decrementar `_popup_timer` aquí como antes.
         try:
-            if hasattr(self.game, '_popup_timer') and getattr(self.game, '_popup_timer', None) is not None:
+            if getattr(self.game, 'ui_timers', None) is not None:
+                pass
+            elif hasattr(self.game, '_popup_timer') and getattr(self.game, '_popup_timer', None) is not None:
                 try:
                     self.game._popup_timer -= int(delta_time)
                 except Exception:
@@ -5,5 +5,6 @@ simpler imports (``from utils import is_prime``).
 """
 
 from .utils import is_prime
+from .number_format import format_number
 
-__all__ = ["is_prime"]
+__all__ = ["is_prime", "format_number"]
@@ -0,0 +1,133 @@
+"""Compact number labels for belt items and HUD text.
+
+Chained multiply modules make item values grow without bound. Rendering
+``str(value)`` for every item each frame is slow (and CPython refuses to
+convert integers with more than ~4300 digits to text at all), so values are
+shown abbreviated: ``950``, ``1.2K``, ``3.4M``, ``7.1T``, ``3.4e15``.
+
+:func:`format_number` never converts a large integer to decimal; the
+magnitude is derived from ``int.bit_length``. :class:`LabelCache` memoizes
+the rendered ``pygame.Surface`` per label so identical values on screen are
+rendered once.
+"""
+
+import math
+from collections import OrderedDict
+
+import pygame as pg
+
+_SUFFIXES = ((10 ** 12, "T"), (10 ** 9, "B"), (10 ** 6, "M"), (10 ** 3, "K"))
+_SCI_THRESHOLD = 10 ** 15
+_LOG10_2 = math.log10(2)
+
+
+def _log10_int(n):
+    """log10 of a positive integer of any size, without decimal conversion."""
+    bits = n.bit_length()
+    if bits <= 1000:
+        return math.log10(n)
+    shift = bits - 53
+    return math.log10(n >> shift) + shift * _LOG10_2
+
+
+def _trim(text):
+    """Drop a trailing ``.0`` (``1.0K`` -> ``1K``)."""
+    return text[:-2] if text.endswith(".0") else text
+
+
+def format_number(value):
+    """Return a short human readable label for ``value``.
+
+    Integers below 1000 are shown as is, up to 10**15 a K/M/B/T suffix with
+    one decimal is used and anything larger is shown in scientific notation
+    (``3.4e15``). Non numeric values fall back to ``str``.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+
+    sign = "-" if value < 0 else ""
+    n = -value if value < 0 else value
+    if n < 1000:
+        if isinstance(n, float) and not n.is_integer():
+            return f"{sign}{n:.1f}"
+        return f"{sign}{int(n)}"
+
+    if n < _SCI_THRESHOLD:
+        for i, (div, suffix) in enumerate(_SUFFIXES):
+            if n >= div:
+                scaled = n / div
+                # 999.96K se redondearía a "1000K": pasar al sufijo superior
+                if scaled >= 999.95:
+                    if i == 0:
+                        break
+                    div, suffix = _SUFFIXES[i - 1]
+                    scaled = n / div
+                return f"{sign}{_trim(f'{scaled:.1f}')}{suffix}"
+
+    exp10 = _log10_int(int(n)) if isinstance(n, int) else math.log10(n)
+    exponent = int(math.floor(exp10))
+    mantissa = 10 ** (exp10 - exponent)
+    if mantissa >= 9.95:
+        mantissa /= 10
+        exponent += 1
+    return f"{sign}{_trim(f'{mantissa:.1f}')}e{exponent}"
+
+
+class LabelCache:
+    """Bounded LRU cache of rendered label surfaces.
+
+    Args:
+        font_size: Size passed to ``pygame.font.Font(None, font_size)``.
+        max_entries: Maximum number of surfaces kept alive.
+    """
+
+    def __init__(self, font_size=20, max_entries=512):
+        self.font_size = font_size
+        self.max_entries = max_entries
+        self._font = None
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_font(self):
+        if self._font is None:
+            if not pg.font.get_init():
+                pg.font.init()
+            self._font = pg.font.Font(None, self.font_size)
+        return self._font
+
+    def get(self, value, color=(44, 62, 80)):
+        """Return the surface for ``value`` rendered in ``color``."""
+        label = format_number(value)
+        key = (label, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._get_font().render(label, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+_default_cache = None
+
+
+def label_surface(value, color=(44, 62, 80)):
+    """Rendered label for ``value`` from the shared size-20 :class:`LabelCache`."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LabelCache()
+    return _default_cache.get(value, color)
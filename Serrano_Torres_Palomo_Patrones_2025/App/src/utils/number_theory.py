@@ -0,0 +1,123 @@
+"""Shared number-theory helpers: primality and well scoring.
+
+Well scoring asks "is this number prime?" for every consumed item and for
+every well on every frame. Instead of trial division each time:
+
+- small numbers are looked up in a :class:`PrimeSieve`, a sieve of
+  Eratosthenes stored in a ``bytearray`` that doubles its bound on demand
+  (up to ``SIEVE_MAX``);
+- larger numbers use a Miller-Rabin test, deterministic below 3.3e24 and a
+  strong probable-prime test above that;
+- :func:`points_for_number` memoizes the resulting points in an LRU.
+
+The sieve is shared by the simulation thread and the render thread. It is
+replaced as a whole ``(limit, bits)`` tuple when it grows, so readers never
+see a half built table and no lock is needed.
+"""
+
+from functools import lru_cache
+
+SIEVE_INITIAL = 1 << 12
+SIEVE_MAX = 1 << 22
+
+# Bases for a deterministic Miller-Rabin test for n < 3.3 * 10**24
+_MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+class PrimeSieve:
+    """Growable sieve of Eratosthenes.
+
+    Args:
+        initial: First bound sieved.
+        max_limit: Largest bound the sieve grows to; numbers above it are
+            tested with Miller-Rabin.
+    """
+
+    def __init__(self, initial=SIEVE_INITIAL, max_limit=SIEVE_MAX):
+        self.max_limit = max_limit
+        self._table = (0, bytearray())
+        self._build(initial)
+
+    @property
+    def limit(self):
+        return self._table[0]
+
+    def _build(self, limit):
+        bits = bytearray([1]) * (limit + 1)
+        bits[0] = 0
+        if limit >= 1:
+            bits[1] = 0
+        i = 2
+        while i * i <= limit:
+            if bits[i]:
+                bits[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+            i += 1
+        self._table = (limit, bits)
+
+    def ensure(self, n):
+        """Grow the sieve (doubling) so that it covers ``n`` if allowed."""
+        limit = self._table[0]
+        if n <= limit or limit >= self.max_limit:
+            return
+        new_limit = limit
+        while new_limit < n:
+            new_limit *= 2
+        self._build(min(new_limit, self.max_limit))
+
+    def is_prime(self, n):
+        if n < 2:
+            return False
+        if n <= self.max_limit:
+            self.ensure(n)
+            limit, bits = self._table
+            if n <= limit:
+                return bool(bits[n])
+        return miller_rabin(n)
+
+
+def miller_rabin(n):
+    """Miller-Rabin primality test (deterministic for n < 3.3e24)."""
+    if n < 2:
+        return False
+    for p in _MR_BASES:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MR_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+_sieve = PrimeSieve()
+
+
+def is_prime(n):
+    """Return True if ``n`` is prime, using the shared sieve or Miller-Rabin."""
+    return _sieve.is_prime(n)
+
+
+@lru_cache(maxsize=4096)
+def points_for_number(num):
+    """Points awarded by a well for ``num``.
+
+    The number itself, or ``round(num * 1.2)`` when it is prime. The
+    bonus is computed in integer arithmetic (``6 * num / 5`` never ends in
+    .5) so it stays exact for huge values.
+    """
+    if num <= 1:
+        return num
+    if is_prime(num):
+        return (6 * num + 2) // 5
+    return num
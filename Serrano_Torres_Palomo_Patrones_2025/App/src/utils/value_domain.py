@@ -0,0 +1,35 @@
+"""Value-domain policy for numbers produced by operation modules.
+
+Wells only check ``number % consumingNumber == 0``, so belt values do not
+need to be exact: reducing them modulo a multiple of every well number keeps
+each well's verdict unchanged while values stay small machine integers.
+
+Policies (``settings.VALUE_DOMAIN``):
+
+- ``"exact"``: unbounded Python integers (original behaviour).
+- ``"modular"``: results are reduced into ``1..VALUE_MODULUS``. Sums and
+  products keep divisibility by any divisor of the modulus; integer
+  division does not, so DivModule results are approximate in this mode.
+- ``"capped"``: results saturate at ``VALUE_CAP``.
+"""
+
+from settings import VALUE_CAP, VALUE_DOMAIN, VALUE_MODULUS
+
+DOMAINS = ("exact", "modular", "capped")
+
+
+def normalize_value(value, domain=None):
+    """Map an operation result into the configured value domain."""
+    domain = domain or VALUE_DOMAIN
+    if domain == "exact" or not isinstance(value, int):
+        return value
+    if domain == "modular":
+        # representante en 1..M para que un múltiplo no se convierta en 0
+        # (los pozos rechazan números <= 0)
+        if value <= 0:
+            return value
+        r = value % VALUE_MODULUS
+        return r if r else VALUE_MODULUS
+    if domain == "capped":
+        return min(value, VALUE_CAP)
+    return value